@@ -1,17 +1,40 @@
-import google.generativeai as genai
 import base64
 import json
 import os
 import time
+from typing import List, Tuple
+
 from dotenv import load_dotenv
 
+from ai import prompts, schemas, usage
+from utils import metrics
+from utils.recorder import get_recorder
+
+# .env dagi QA_* sozlamalar pastdagi konstantalardan oldin o'qilishi kerak
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")
+VISION_MODEL_NAME = "gemini-2.5-flash"
+# Arzon matnli model — DOM tahlili uchun (rasm yuborilmaydi)
+TEXT_MODEL_NAME = os.getenv("QA_TEXT_MODEL", "gemini-2.5-flash-lite")
+
+# google.generativeai og'ir (grpc/protobuf) — birinchi haqiqiy chaqiruvda import va
+# configure qilinadi (_genai()). show_db, replay kabi yo'llar uni umuman yuklamaydi.
+_genai_module = None
+
+# Explicit context cache (CachedContent) ishlatilmaydi: system promptlar ~150-500 token,
+# API minimumi (1024) dan ancha kichik. Takrorlangan prefiksni Gemini o'zi (implicit)
+# keshlasa — usage_metadata.cached_content_token_count da keladi va hisobotda ko'rinadi.
+
+# (system_key, text_only) → model (birinchi chaqiruvda quriladi); system_key=None — promptsiz
+_prompt_models = {}
+
+# Matnli javob ishonchi shundan past bo'lsa screenshot (vision) ga o'tiladi
+TEXT_ROUTE_MIN_CONFIDENCE = float(os.getenv("QA_TEXT_ROUTE_MIN_CONFIDENCE", "0.75"))
+MODEL_ROUTING_ENABLED = os.getenv("QA_MODEL_ROUTING", "1") != "0"
+# JSON mode + response_schema (0 — eski erkin matn + _extract_json)
+STRUCTURED_OUTPUT_ENABLED = os.getenv("QA_STRUCTURED_OUTPUT", "1") != "0"
 
-# Global token counter
-token_stats = {"input": 0, "output": 0, "calls": 0}
+# Token/route/JSON hisoblari sessiya bo'yicha — ai/usage.py (UsageTracker, contextvar)
 
 
 def _extract_json(text: str) -> dict:
@@ -38,42 +61,110 @@ def _extract_json(text: str) -> dict:
     return {}
 
 
-def _call_gemini(parts: list, step_name: str = "") -> tuple:
+def _genai():
+    """google.generativeai ni kerak bo'lganda yuklaydi va bir marta sozlaydi."""
+    global _genai_module
+    if _genai_module is None:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _genai_module = genai
+    return _genai_module
+
+
+def _model_for(system_key: str, text_only: bool):
+    """
+    System prompti (system_instruction) bog'langan modelni qaytaradi (jarayon davomida
+    bir marta quriladi).
+    system_key=None — system promptsiz oddiy model (repair va h.k. chaqiruvlar uchun).
+    """
+    key = (system_key, text_only)
+    if key in _prompt_models:
+        return _prompt_models[key]
+
+    genai = _genai()
+    name = TEXT_MODEL_NAME if text_only else VISION_MODEL_NAME
+    if system_key is None:
+        _prompt_models[key] = genai.GenerativeModel(name)
+        return _prompt_models[key]
+
+    _prompt_models[key] = genai.GenerativeModel(
+        name, system_instruction=prompts.SYSTEM_PROMPTS[system_key]
+    )
+    return _prompt_models[key]
+
+
+def _call_gemini(parts: list, step_name: str = "", text_only: bool = False,
+                 response_schema: dict = None, system_key: str = None) -> tuple:
     """
     Gemini chaqiradi. Rate limit bo'lsa kutadi va qayta urinadi.
+    text_only=True — arzon matnli model (text_model) ishlatiladi.
+    response_schema — berilsa model JSON mode da shu sxema bo'yicha javob qaytaradi.
+    system_key — prompts.SYSTEM_PROMPTS dagi o'zgarmas prompt; parts faqat dinamik qism.
     Returns: (response_text, token_info)
     """
+    generation_config = None
+    if response_schema and STRUCTURED_OUTPUT_ENABLED:
+        generation_config = {
+            "response_mime_type": "application/json",
+            "response_schema": response_schema,
+        }
     max_retries = 3
     retry_delay = 25  # soniya
+    recorder = get_recorder()
+    route = "text" if text_only else "vision"
 
     for attempt in range(max_retries):
+        started = time.monotonic()
         try:
-            response = model.generate_content(parts)
-
-            usage = response.usage_metadata
-            input_tokens = getattr(usage, "prompt_token_count", 0)
-            output_tokens = getattr(usage, "candidates_token_count", 0)
-
-            token_stats["input"] += input_tokens
-            token_stats["output"] += output_tokens
-            token_stats["calls"] += 1
+            if recorder and recorder.is_replay:
+                # Replay: API chaqirilmaydi, yozilgan javob qaytariladi
+                recorded = recorder.next(f"gemini:{step_name}")
+                response_text = recorded["text"]
+                input_tokens = recorded.get("input_tokens", 0)
+                output_tokens = recorded.get("output_tokens", 0)
+                cached_tokens = recorded.get("cached_tokens", 0)
+            else:
+                active_model = _model_for(system_key, text_only)
+                response = active_model.generate_content(parts, generation_config=generation_config)
+                response_text = response.text
+
+                metadata = response.usage_metadata
+                input_tokens = getattr(metadata, "prompt_token_count", 0)
+                output_tokens = getattr(metadata, "candidates_token_count", 0)
+                cached_tokens = getattr(metadata, "cached_content_token_count", 0) or 0
+
+                if recorder:
+                    recorder.record(f"gemini:{step_name}", {
+                        "text": response_text,
+                        "input_tokens": input_tokens,
+                        "output_tokens": output_tokens,
+                        "cached_tokens": cached_tokens,
+                    })
+
+            latency_ms = (time.monotonic() - started) * 1000
+            totals = usage.record_call(step_name, route, input_tokens, output_tokens,
+                                       latency_ms, cached_tokens)
 
             token_info = {
                 "step": step_name,
+                "route": route,
+                "latency_ms": round(latency_ms),
                 "input_tokens": input_tokens,
+                "cached_tokens": cached_tokens,
                 "output_tokens": output_tokens,
                 "total_tokens": input_tokens + output_tokens,
-                "cumulative_total": token_stats["input"] + token_stats["output"],
-                "api_calls": token_stats["calls"],
+                "cumulative_total": totals["total"],
+                "api_calls": totals["calls"],
             }
+            metrics.observe_model_call(token_info)
 
             print(
                 f"  [TOKEN] {step_name}: "
                 f"in={input_tokens} out={output_tokens} "
-                f"| Jami: {token_stats['input'] + token_stats['output']} token "
-                f"({token_stats['calls']} API call)"
+                f"| Jami: {totals['total']} token "
+                f"({totals['calls']} API call)"
             )
-            return response.text, token_info
+            return response_text, token_info
 
         except Exception as e:
             err_str = str(e)
@@ -95,53 +186,77 @@ def _call_gemini(parts: list, step_name: str = "") -> tuple:
     raise Exception(f"Gemini {max_retries} urinishdan keyin ham javob bermadi")
 
 
-def reset_token_stats():
-    token_stats["input"] = 0
-    token_stats["output"] = 0
-    token_stats["calls"] = 0
+def _parse_json(text: str):
+    """JSON mode javobi toza JSON bo'ladi; eski/erkin javoblar uchun _extract_json."""
+    try:
+        return json.loads(text)
+    except Exception:
+        return _extract_json(text)
+
+
+def _call_json(parts: list, step_name: str, schema: dict, text_only: bool = False,
+               system_key: str = None) -> tuple:
+    """
+    Strukturali chaqiruv: JSON mode + response_schema, javob schemas.validate() dan o'tadi.
+    Sxemaga mos kelmasa — faqat shu javob qisqa tuzatish so'rovi bilan bir marta qayta
+    so'raladi (matnli model, rasm qayta yuborilmaydi).
+    Returns: (result_dict, token_info)
+    """
+    text, token_info = _call_gemini(parts, step_name, text_only, response_schema=schema,
+                                    system_key=system_key)
+    result, errors = schemas.validate(_parse_json(text), schema)
+    if not errors:
+        usage.record_json("ok")
+        return result, token_info
+
+    print(f"  [⚠️  JSON] {step_name}: javob sxemaga mos emas ({len(errors)} xato) — tuzatish so'ralmoqda")
+    for err in errors[:5]:
+        print(f"    - {err}")
+
+    repair_prompt = (
+        "Quyidagi JSON javob kerakli sxemaga mos emas.\n"
+        "Xatolar:\n" + "\n".join(f"- {e}" for e in errors[:10]) +
+        "\n\nMa'noni o'zgartirmasdan FAQAT tuzatilgan JSON ni qaytaring."
+    )
+    # Javob to'liq yuboriladi — kesilgan JSON (katta found_elements) ni tuzatib bo'lmaydi
+    repair_text, repair_info = _call_gemini(
+        [repair_prompt, text], f"{step_name}_repair", text_only=True, response_schema=schema
+    )
+    repaired, repair_errors = schemas.validate(_parse_json(repair_text), schema)
+    token_info = {**token_info, "repair_tokens": repair_info["total_tokens"]}
+    if not repair_errors:
+        usage.record_json("repaired")
+        return repaired, token_info
+
+    usage.record_json("failed")
+    print(f"  [❌ JSON] {step_name}: tuzatishdan keyin ham {len(repair_errors)} xato — qisman natija")
+    # Ikki urinishdan kamroq xatolisini qaytaramiz (maydonlar .get() bilan o'qiladi)
+    best = repaired if len(repair_errors) < len(errors) else result
+    return (best if isinstance(best, dict) else {}), token_info
+
+
+def reset_token_stats(name: str = "") -> usage.UsageTracker:
+    """Joriy kontekst uchun yangi sessiya hisobini boshlaydi (boshqa sessiyalarga tegmaydi)."""
+    return usage.start_session(name)
+
+
+def get_route_stats() -> dict:
+    """
+    step_name → {route, calls, input_tokens, output_tokens, cached_tokens,
+                 uncached_tokens, cached_ratio, avg_input_tokens, avg_latency_ms,
+                 escalations}
+    """
+    return usage.current().route_stats()
 
 
 def get_token_summary() -> dict:
-    return {
-        "total_input": token_stats["input"],
-        "total_output": token_stats["output"],
-        "total_tokens": token_stats["input"] + token_stats["output"],
-        "total_api_calls": token_stats["calls"],
-    }
+    return usage.current().summary()
 
 
-def parse_user_prompt(prompt: str) -> tuple:
-    system = """
-Siz professional QA test agentisiz.
-Foydalanuvchi beradigan test buyrug'ini tahlil qilib, bajarish uchun step-by-step checklist tuzing.
-
-Faqat quyidagi JSON formatda javob bering (boshqa hech narsa yozmang):
-{
-    "site_url": "https://example.com",
-    "test_name": "Test nomi",
-    "steps": [
-        {
-            "step_id": 1,
-            "description": "Qadamni inson tilidagi tavsifi",
-            "action_type": "navigate|login|find_and_click|find_and_fill|verify|wait",
-            "expected_result": "Bu qadam muvaffaqiyatli bo'lsa nima ko'rinadi"
-        }
-    ]
-}
-
-action_type:
-- navigate: URL ga o'tish
-- login: saytga kirish (email/parol)
-- find_and_click: elementni topib bosish
-- find_and_fill: forma to'ldirish
-- verify: natijani tekshirish
-- wait: sahifa yuklanishini kutish
-
-MUHIM: login stepsini FAQAT bitta qiling, login ni find_and_fill ga ajratmang!
-"""
-    text, token_info = _call_gemini([system, prompt], step_name="parse_prompt")
-    result = _extract_json(text)
-    if not result:
+def parse_user_prompt(prompt: str) -> Tuple[schemas.TestPlan, dict]:
+    result, token_info = _call_json([prompt], "parse_prompt", schemas.PLAN_SCHEMA,
+                                    system_key="plan")
+    if not result.get("steps"):
         result = {
             "site_url": None,
             "test_name": prompt[:50],
@@ -152,7 +267,7 @@ MUHIM: login stepsini FAQAT bitta qiling, login ni find_and_fill ga ajratmang!
 
 
 def analyze_page(screenshot_bytes: bytes, task: str, page_url: str,
-                 user_hint: str = None) -> dict:
+                 user_hint: str = None) -> schemas.PageAnalysis:
     """
     Sahifa screenshotini tahlil qiladi.
     Barcha topilgan elementlarni va locatorlarni qaytaradi.
@@ -160,56 +275,14 @@ def analyze_page(screenshot_bytes: bytes, task: str, page_url: str,
     """
     image_data = base64.b64encode(screenshot_bytes).decode("utf-8")
 
-    hint_block = ""
-    if user_hint:
-        hint_block = f"\nFoydalanuvchi yo'riqnomasi: \"{user_hint}\"\nBu yo'riqnomaga asosan sahifada elementni toping.\n"
-
-    system = f"""
-Siz web sahifa tahlilchisisiz.
-Joriy sahifa URL: {page_url}
-Vazifa: {task}{hint_block}
-
-Screenshotni diqqat bilan ko'rib, FAQAT quyidagi JSON formatda javob bering:
-{{
-    "page_type": "login|dashboard|form|list|detail|error|other",
-    "page_title": "sahifa sarlavhasi yoki asosiy kontent nomi",
-    "page_description": "sahifada nima ko'rinmoqda (qisqacha 1-2 gap)",
-    "task_possible": true/false,
-    "task_possible_reason": "nima uchun mumkin yoki mumkin emas",
-    "found_elements": [
-        {{
-            "name": "element_nomi (snake_case)",
-            "type": "input|button|link|select|textarea|checkbox",
-            "visible_text": "elementda ko'ringan matn yoki placeholder",
-            "css_selector": "eng aniq CSS selector",
-            "xpath": "//tag[@attr='value'] kabi xpath",
-            "location": "top-left|top-center|top-right|center|bottom"
-        }}
-    ],
-    "login_detected": false,
-    "error_detected": false,
-    "error_text": "agar sahifada xato xabari bo'lsa u matn"
-}}
-
-CSS selector qoidalari (MUHIM!):
-1. id bo'lsa: #element-id
-2. name bo'lsa: input[name='fieldname']
-3. placeholder bo'lsa: input[placeholder='matn']
-4. type bo'lsa: input[type='password']
-5. class + text bo'lsa: button.classname yoki button:has-text('matn')
-6. Hech narsa bo'lmasa: //tag[contains(text(),'matn')]
-
-HECH QACHON contains() CSS da ishlatma — faqat XPath da!
-"""
-
-    text, token_info = _call_gemini(
-        [system, {"mime_type": "image/png", "data": image_data}],
-        step_name="analyze_page"
+    result, token_info = _call_json(
+        [prompts.dynamic_page(page_url, task, user_hint),
+         {"mime_type": "image/png", "data": image_data}],
+        "analyze_page", schemas.PAGE_SCHEMA, system_key="page"
     )
 
     # DEBUG: AI ning to'liq javobini chop etamiz
     print(f"\n  ┌─ [DEBUG: AI TAHLIL NATIJASI] ─────────────────────")
-    result = _extract_json(text)
     print(f"  │ Sahifa turi   : {result.get('page_type', '?')}")
     print(f"  │ Sahifa nomi   : {result.get('page_title', '?')}")
     print(f"  │ Holat         : {result.get('page_description', '?')}")
@@ -228,51 +301,15 @@ HECH QACHON contains() CSS da ishlatma — faqat XPath da!
     return result
 
 
-def analyze_form_page(screenshot_bytes: bytes, form_purpose: str, page_url: str) -> dict:
+def analyze_form_page(screenshot_bytes: bytes, form_purpose: str, page_url: str) -> schemas.FormAnalysis:
     image_data = base64.b64encode(screenshot_bytes).decode("utf-8")
 
-    system = f"""
-Siz web forma tahlilchisisiz.
-Joriy sahifa URL: {page_url}
-Forma maqsadi: {form_purpose}
-
-Screenshotdagi BARCHA forma maydonlarini aniqlab, FAQAT JSON qaytaring:
-{{
-    "form_title": "forma sarlavhasi",
-    "form_found": true/false,
-    "fields": [
-        {{
-            "field_id": 1,
-            "name": "maydon_nomi",
-            "label": "ko'rinuvchi label",
-            "type": "text|email|password|number|select|textarea|checkbox|radio|date",
-            "placeholder": "placeholder yoki null",
-            "required": true/false,
-            "css_selector": "aniq CSS selector",
-            "xpath": "aniq xpath"
-        }}
-    ],
-    "submit_button": {{
-        "text": "tugma matni",
-        "css_selector": "selector",
-        "xpath": "xpath"
-    }}
-}}
-
-CSS selector qoidalari:
-- id bo'lsa: #id-name
-- name bo'lsa: input[name='name']
-- placeholder bo'lsa: input[placeholder='hint']
-- HECH QACHON contains() CSS da ishlatma
-"""
-
-    text, token_info = _call_gemini(
-        [system, {"mime_type": "image/png", "data": image_data}],
-        step_name="analyze_form"
+    result, token_info = _call_json(
+        [prompts.dynamic_form(page_url, form_purpose),
+         {"mime_type": "image/png", "data": image_data}],
+        "analyze_form", schemas.FORM_SCHEMA, system_key="form"
     )
 
-    result = _extract_json(text)
-
     # DEBUG
     print(f"\n  ┌─ [DEBUG: FORMA TAHLILI] ───────────────────────────")
     print(f"  │ Forma nomi  : {result.get('form_title', '?')}")
@@ -289,54 +326,22 @@ CSS selector qoidalari:
     return result
 
 
-def decide_field_value(field_info: dict, context: dict) -> dict:
-    system = """
-Siz QA test ma'lumotlari generatorsiz.
-Forma maydoni uchun mos test qiymat taklif qiling.
-
-FAQAT JSON qaytaring:
-{
-    "value": "kiritilishi kerak bo'lgan qiymat",
-    "needs_user_input": false,
-    "user_question": "agar needs_user_input=true bo'lsa savol"
-}
-
-Qoidalar:
-- name/nomi/title → "Test Mahsulot 001"
-- price/narx/cost → "99000"
-- description/tavsif → "Test uchun kiritilgan tavsif"
-- code/kod/sku → "TST-001"
-- email → "test@test.com"
-- Agar maydon noaniq yoki muhim bo'lsa → needs_user_input: true
-"""
+def decide_field_value(field_info: dict, context: dict) -> schemas.FieldValue:
     prompt = f"Maydon: {json.dumps(field_info, ensure_ascii=False)}\nKontekst: {json.dumps(context, ensure_ascii=False)}"
-    text, token_info = _call_gemini([system, prompt], step_name="decide_value")
-    result = _extract_json(text)
+    result, token_info = _call_json([prompt], "decide_value", schemas.FIELD_VALUE_SCHEMA,
+                                    system_key="decide")
     result["_token_info"] = token_info
     return result
 
 
-def verify_action_result(screenshot_bytes: bytes, expected: str, page_url: str) -> dict:
+def verify_action_result(screenshot_bytes: bytes, expected: str, page_url: str) -> schemas.VerifyResult:
     image_data = base64.b64encode(screenshot_bytes).decode("utf-8")
 
-    system = f"""
-Siz QA test natijasi tekshiruvchisisiz.
-Sahifa URL: {page_url}
-Kutilgan natija: {expected}
-
-FAQAT JSON qaytaring:
-{{
-    "success": true/false,
-    "current_state": "hozir sahifada nima ko'rinmoqda",
-    "error_message": "xato matni yoki null",
-    "confidence": 0.0-1.0
-}}
-"""
-    text, token_info = _call_gemini(
-        [system, {"mime_type": "image/png", "data": image_data}],
-        step_name="verify_result"
+    result, token_info = _call_json(
+        [prompts.dynamic_verify(page_url, expected),
+         {"mime_type": "image/png", "data": image_data}],
+        "verify_result", schemas.VERIFY_SCHEMA, system_key="verify"
     )
-    result = _extract_json(text)
 
     # DEBUG
     print(f"\n  ┌─ [DEBUG: VERIFY NATIJASI] ─────────────────────────")
@@ -350,33 +355,17 @@ FAQAT JSON qaytaring:
     return result
 
 
-def analyze_stuck_page(screenshot_bytes: bytes, expected_action: str, page_url: str) -> dict:
+def analyze_stuck_page(screenshot_bytes: bytes, expected_action: str, page_url: str) -> schemas.StuckAnalysis:
     """
     URL o'zgarmadi — sahifada nima muammo borligini tahlil qiladi.
     """
     image_data = base64.b64encode(screenshot_bytes).decode("utf-8")
 
-    system = f"""
-Siz web sahifa muammo tahlilchisisiz.
-Sahifa URL: {page_url}
-Kutilgan harakat: {expected_action}
-
-Harakat bajarildi lekin sahifa o'zgarmadi. Nima muammo bo'lishi mumkin?
-
-FAQAT JSON qaytaring:
-{{
-    "problem_type": "validation_error|permission|not_found|ui_blocked|wrong_element|page_loading|other",
-    "problem_description": "muammo tavsifi",
-    "visible_errors": ["sahifada ko'ringan xato xabarlari"],
-    "suggestion": "qanday harakat qilish kerak",
-    "retry_possible": true/false
-}}
-"""
-    text, token_info = _call_gemini(
-        [system, {"mime_type": "image/png", "data": image_data}],
-        step_name="analyze_stuck"
+    result, token_info = _call_json(
+        [prompts.dynamic_stuck(page_url, expected_action),
+         {"mime_type": "image/png", "data": image_data}],
+        "analyze_stuck", schemas.STUCK_SCHEMA, system_key="stuck"
     )
-    result = _extract_json(text)
     result["_token_info"] = token_info
 
     print(f"\n  ┌─ [DEBUG: STUCK SAHIFA TAHLILI] ───────────────────")
@@ -387,3 +376,208 @@ FAQAT JSON qaytaring:
     print(f"  └───────────────────────────────────────────────────")
 
     return result
+
+
+
+# ═══════════════════════════════════════════════════════════════
+#  MODEL ROUTING — avval arzon matnli model (DOM), kerak bo'lsa vision
+# ═══════════════════════════════════════════════════════════════
+
+def analyze_page_dom(dom_digest: str, task: str, page_url: str,
+                     user_hint: str = None) -> schemas.PageAnalysis:
+    """
+    analyze_page ning matnli varianti: screenshot o'rniga sahifaning ixcham DOM
+    tavsifi (BrowserAgent.dom_digest) yuboriladi. Javob analyze_page bilan bir xil
+    formatda + "confidence" (0.0-1.0).
+    """
+    result, token_info = _call_json(
+        [prompts.dynamic_page(page_url, task, user_hint), dom_digest],
+        "analyze_page_dom", schemas.PAGE_SCHEMA, text_only=True, system_key="page_dom"
+    )
+    result["_token_info"] = token_info
+    return result
+
+
+def verify_action_dom(dom_digest: str, expected: str, page_url: str) -> schemas.VerifyResult:
+    """verify_action_result ning matnli varianti (DOM tavsifi bo'yicha)."""
+    result, token_info = _call_json(
+        [prompts.dynamic_verify(page_url, expected), dom_digest],
+        "verify_dom", schemas.VERIFY_SCHEMA, text_only=True, system_key="verify_dom"
+    )
+    result["_token_info"] = token_info
+    return result
+
+
+def _confident(result: dict) -> bool:
+    try:
+        return float(result.get("confidence", 0)) >= TEXT_ROUTE_MIN_CONFIDENCE
+    except (TypeError, ValueError):
+        return False
+
+
+def _escalate(step_name: str):
+    usage.record_escalation(step_name)
+
+
+def _merge_token_info(step: str, calls: list, **extra) -> dict:
+    """Bir nechta chaqiruv (text → vision) token_info larini bitta yozuvga yig'adi."""
+    merged = {
+        "step": step,
+        "route": "+".join(c["route"] for c in calls),
+        **extra,
+        "latency_ms": sum(c["latency_ms"] for c in calls),
+        "input_tokens": sum(c["input_tokens"] for c in calls),
+        "cached_tokens": sum(c.get("cached_tokens", 0) for c in calls),
+        "output_tokens": sum(c["output_tokens"] for c in calls),
+        "total_tokens": sum(c["total_tokens"] for c in calls),
+        "api_calls": len(calls),
+    }
+    repair_tokens = sum(c.get("repair_tokens", 0) for c in calls)
+    if repair_tokens:
+        merged["repair_tokens"] = repair_tokens
+    if "cumulative_total" in calls[-1]:
+        merged["cumulative_total"] = calls[-1]["cumulative_total"]
+    return merged
+
+
+def route_analyze_page(dom_digest: str, screenshot_bytes: bytes, task: str, page_url: str,
+                       user_hint: str = None) -> schemas.PageAnalysis:
+    """
+    1) DOM tavsifi bilan arzon matnli model
+    2) ishonch past yoki element topilmasa → screenshot bilan analyze_page
+    """
+    text_info = None
+    if MODEL_ROUTING_ENABLED and dom_digest:
+        result = analyze_page_dom(dom_digest, task, page_url, user_hint)
+        if _confident(result) and result.get("found_elements"):
+            print(f"  [🔀 ROUTE] analyze_page → text (ishonch={result.get('confidence')}, "
+                  f"{len(result['found_elements'])} element)")
+            result["_route"] = "text"
+            return result
+        _escalate("analyze_page_dom")
+        text_info = result.get("_token_info")
+        print(f"  [🔀 ROUTE] analyze_page → vision (matnli ishonch={result.get('confidence')})")
+    result = analyze_page(screenshot_bytes, task, page_url, user_hint)
+    result["_route"] = "vision"
+    if text_info:
+        # Escalation: qadam narxi matnli + vision chaqiruvlar yig'indisi
+        result["_token_info"] = _merge_token_info("analyze_page", [text_info, result["_token_info"]])
+    return result
+
+
+def route_verify(dom_digest: str, screenshot_bytes, expected: str,
+                 page_url: str) -> schemas.VerifyResult:
+    """
+    1) DOM bo'yicha matnli tekshiruv  2) ishonch past bo'lsa → screenshot bilan verify.
+    screenshot_bytes — bytes yoki ularni qaytaruvchi funksiya (faqat vision kerak bo'lsa chaqiriladi).
+    """
+    text_info = None
+    if MODEL_ROUTING_ENABLED and dom_digest:
+        result = verify_action_dom(dom_digest, expected, page_url)
+        if _confident(result):
+            print(f"  [🔀 ROUTE] verify → text (success={result.get('success')}, "
+                  f"ishonch={result.get('confidence')})")
+            result["_route"] = "text"
+            return result
+        _escalate("verify_dom")
+        text_info = result.get("_token_info")
+        print(f"  [🔀 ROUTE] verify → vision (matnli ishonch={result.get('confidence')})")
+    if callable(screenshot_bytes):
+        screenshot_bytes = screenshot_bytes()
+    result = verify_action_result(screenshot_bytes, expected, page_url)
+    result["_route"] = "vision"
+    if text_info:
+        result["_token_info"] = _merge_token_info("verify", [text_info, result["_token_info"]])
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════
+#  BATCH VERIFY — bir xil sahifadagi ketma-ket tekshiruvlar bitta chaqiruvda
+# ═══════════════════════════════════════════════════════════════
+
+def _batch_results(result: dict, count: int) -> List[schemas.VerifyBatchItem]:
+    """results[] ni so'rov tartibiga keltiradi; javobsiz qolgan band — ishonchsiz 'failed'."""
+    ordered = [None] * count
+    for item in result.get("results") or []:
+        index = item.get("index")
+        if isinstance(index, int) and 1 <= index <= count and ordered[index - 1] is None:
+            ordered[index - 1] = {k: v for k, v in item.items() if k != "index"}
+    return [
+        item or {"success": False, "confidence": 0.0, "current_state": "",
+                 "error_message": "Model bu band uchun natija qaytarmadi"}
+        for item in ordered
+    ]
+
+
+def verify_batch_dom(dom_digest: str, expectations: list,
+                     page_url: str) -> Tuple[List[schemas.VerifyBatchItem], dict]:
+    """Returns: (natijalar ro'yxati — expectations tartibida, token_info)"""
+    result, token_info = _call_json(
+        [prompts.dynamic_verify_batch(page_url, expectations), dom_digest],
+        "verify_batch_dom", schemas.VERIFY_BATCH_SCHEMA, text_only=True,
+        system_key="verify_batch_dom"
+    )
+    return _batch_results(result, len(expectations)), token_info
+
+
+def verify_batch_result(screenshot_bytes: bytes, expectations: list,
+                        page_url: str) -> Tuple[List[schemas.VerifyBatchItem], dict]:
+    image_data = base64.b64encode(screenshot_bytes).decode("utf-8")
+    result, token_info = _call_json(
+        [prompts.dynamic_verify_batch(page_url, expectations),
+         {"mime_type": "image/png", "data": image_data}],
+        "verify_batch", schemas.VERIFY_BATCH_SCHEMA, system_key="verify_batch"
+    )
+    results = _batch_results(result, len(expectations))
+
+    # DEBUG
+    print(f"\n  ┌─ [DEBUG: BATCH VERIFY NATIJASI] ───────────────────")
+    for expected, item in zip(expectations, results):
+        print(f"  │ {'✅' if item.get('success') else '❌'} ({item.get('confidence')}) {expected[:60]}")
+    print(f"  └───────────────────────────────────────────────────")
+
+    return results, token_info
+
+
+def route_verify_batch(dom_digest: str, screenshot_bytes, expectations: list,
+                       page_url: str) -> List[schemas.VerifyBatchItem]:
+    """
+    route_verify ning ko'p bandli varianti:
+    1) barcha bandlar bitta matnli (DOM) chaqiruvda
+    2) ishonchi past qolgan bandlar — bitta vision chaqiruvda (screenshot bir marta yuboriladi)
+    Returns: expectations tartibida verify natijalari. Paketning umumiy token_info si
+             birinchi natijaning "_token_info" sida, qolganlarida "_batched": True.
+    """
+    results = [None] * len(expectations)
+    calls = []
+
+    if MODEL_ROUTING_ENABLED and dom_digest:
+        text_results, token_info = verify_batch_dom(dom_digest, expectations, page_url)
+        calls.append(token_info)
+        for i, item in enumerate(text_results):
+            if _confident(item):
+                item["_route"] = "text"
+                results[i] = item
+        confident = sum(1 for item in results if item is not None)
+        print(f"  [🔀 ROUTE] verify x{len(expectations)} → text: {confident} ta ishonchli")
+        if confident < len(expectations):
+            _escalate("verify_batch_dom")
+
+    pending = [i for i, item in enumerate(results) if item is None]
+    if pending:
+        print(f"  [🔀 ROUTE] verify x{len(pending)} → vision")
+        if callable(screenshot_bytes):
+            screenshot_bytes = screenshot_bytes()
+        vision_results, token_info = verify_batch_result(
+            screenshot_bytes, [expectations[i] for i in pending], page_url
+        )
+        calls.append(token_info)
+        for i, item in zip(pending, vision_results):
+            item["_route"] = "vision"
+            results[i] = item
+
+    results[0]["_token_info"] = _merge_token_info("verify_batch", calls,
+                                                  batch_size=len(expectations))
+    for item in results[1:]:
+        item["_batched"] = True
+    return results
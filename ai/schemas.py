@@ -0,0 +1,283 @@
+"""
+Gemini structured output uchun javob sxemalari va ularni tekshirish.
+
+Har sxema ikki joyda ishlatiladi:
+1. generation_config.response_schema — model faqat shu shakldagi JSON qaytaradi
+2. validate() — kelgan javobni sxema bo'yicha tekshirib, turlarni to'g'rilaydi
+   ("true" → True, "0.8" → 0.8) va tuzatib bo'lmaydigan xatolar ro'yxatini beradi
+
+Sxemalar Gemini API ning OpenAPI qismi formatida (type: OBJECT/STRING/...).
+"""
+from typing import List, Optional, TypedDict
+
+
+# ─── TYPED SHAKLLAR ───────────────────────────────────────────
+
+class Assertion(TypedDict, total=False):
+    kind: str            # url | title | text_visible | element_count | toast
+    value: str
+    selector: str        # element_count uchun
+    op: str              # >= | <= | == | > | <
+    count: int
+    negate: bool
+
+
+class PlanStep(TypedDict, total=False):
+    step_id: int
+    description: str
+    action_type: str
+    expected_result: str
+    depends_on: List[int]
+    assertion: Optional[Assertion]
+
+
+class TestPlan(TypedDict, total=False):
+    site_url: Optional[str]
+    test_name: str
+    steps: List[PlanStep]
+
+
+class FoundElement(TypedDict, total=False):
+    name: str
+    type: str
+    visible_text: str
+    css_selector: str
+    xpath: str
+    location: str
+
+
+class PageAnalysis(TypedDict, total=False):
+    page_type: str
+    page_title: str
+    page_description: str
+    task_possible: bool
+    task_possible_reason: str
+    found_elements: List[FoundElement]
+    login_detected: bool
+    error_detected: bool
+    error_text: str
+    confidence: float
+
+
+class FormField(TypedDict, total=False):
+    field_id: int
+    name: str
+    label: str
+    type: str
+    placeholder: Optional[str]
+    required: bool
+    css_selector: str
+    xpath: str
+    options: List[str]
+
+
+class FormAnalysis(TypedDict, total=False):
+    form_title: str
+    form_found: bool
+    fields: List[FormField]
+    submit_button: dict
+
+
+class FieldValue(TypedDict, total=False):
+    value: str
+    needs_user_input: bool
+    user_question: str
+
+
+class VerifyResult(TypedDict, total=False):
+    success: bool
+    current_state: str
+    error_message: Optional[str]
+    confidence: float
+
+
+class VerifyBatchItem(VerifyResult, total=False):
+    index: int
+
+
+class VerifyBatch(TypedDict, total=False):
+    results: List[VerifyBatchItem]
+
+
+class StuckAnalysis(TypedDict, total=False):
+    problem_type: str
+    problem_description: str
+    visible_errors: List[str]
+    suggestion: str
+    retry_possible: bool
+
+
+# ─── SXEMALAR ─────────────────────────────────────────────────
+
+def _obj(properties: dict, required: list = None) -> dict:
+    return {"type": "OBJECT", "properties": properties, "required": required or []}
+
+
+_STR = {"type": "STRING"}
+_STR_NULL = {"type": "STRING", "nullable": True}
+_BOOL = {"type": "BOOLEAN"}
+_NUM = {"type": "NUMBER"}
+_INT = {"type": "INTEGER"}
+
+# verify qadamining deterministik tekshiruvi (BrowserAgent.check_assertion)
+ASSERTION_SCHEMA = {**_obj({
+    "kind": _STR,
+    "value": _STR,
+    "selector": _STR,
+    "op": _STR,
+    "count": _INT,
+    "negate": _BOOL,
+}, ["kind"]), "nullable": True}
+
+PLAN_SCHEMA = _obj({
+    "site_url": _STR_NULL,
+    "test_name": _STR,
+    "steps": {"type": "ARRAY", "items": _obj({
+        "step_id": _INT,
+        "description": _STR,
+        "action_type": _STR,
+        "expected_result": _STR,
+        "depends_on": {"type": "ARRAY", "items": _INT},
+        "assertion": ASSERTION_SCHEMA,
+    }, ["step_id", "description", "action_type"])},
+}, ["test_name", "steps"])
+
+ELEMENT_SCHEMA = _obj({
+    "name": _STR,
+    "type": _STR,
+    "visible_text": _STR,
+    "css_selector": _STR,
+    "xpath": _STR,
+    "location": _STR,
+}, ["name", "type"])
+
+PAGE_SCHEMA = _obj({
+    "page_type": _STR,
+    "page_title": _STR,
+    "page_description": _STR,
+    "task_possible": _BOOL,
+    "task_possible_reason": _STR,
+    "found_elements": {"type": "ARRAY", "items": ELEMENT_SCHEMA},
+    "login_detected": _BOOL,
+    "error_detected": _BOOL,
+    "error_text": _STR,
+    "confidence": _NUM,
+}, ["page_type", "found_elements"])
+
+FORM_SCHEMA = _obj({
+    "form_title": _STR,
+    "form_found": _BOOL,
+    "fields": {"type": "ARRAY", "items": _obj({
+        "field_id": _INT,
+        "name": _STR,
+        "label": _STR,
+        "type": _STR,
+        "placeholder": _STR_NULL,
+        "required": _BOOL,
+        "css_selector": _STR,
+        "xpath": _STR,
+        "options": {"type": "ARRAY", "items": _STR},
+    }, ["name", "type"])},
+    "submit_button": _obj({
+        "text": _STR,
+        "css_selector": _STR,
+        "xpath": _STR,
+    }),
+}, ["form_found", "fields"])
+
+FIELD_VALUE_SCHEMA = _obj({
+    "value": _STR,
+    "needs_user_input": _BOOL,
+    "user_question": _STR,
+}, ["value"])
+
+VERIFY_SCHEMA = _obj({
+    "success": _BOOL,
+    "current_state": _STR,
+    "error_message": _STR_NULL,
+    "confidence": _NUM,
+}, ["success", "confidence"])
+
+# Bir nechta kutilgan natija bitta chaqiruvda: index — so'rovdagi tartib raqami (1 dan)
+VERIFY_BATCH_SCHEMA = _obj({
+    "results": {"type": "ARRAY", "items": _obj({
+        "index": _INT,
+        **VERIFY_SCHEMA["properties"],
+    }, ["index", "success", "confidence"])},
+}, ["results"])
+
+STUCK_SCHEMA = _obj({
+    "problem_type": _STR,
+    "problem_description": _STR,
+    "visible_errors": {"type": "ARRAY", "items": _STR},
+    "suggestion": _STR,
+    "retry_possible": _BOOL,
+}, ["problem_type"])
+
+
+# ─── TEKSHIRISH ───────────────────────────────────────────────
+
+_TRUE = {"true", "yes", "ha", "1"}
+_FALSE = {"false", "no", "yo'q", "0", ""}
+
+
+def _coerce(value, schema: dict, path: str, errors: list):
+    kind = schema.get("type")
+    if value is None:
+        if schema.get("nullable"):
+            return None
+        errors.append(f"{path}: null bo'lmasligi kerak")
+        return None
+
+    if kind == "OBJECT":
+        if not isinstance(value, dict):
+            errors.append(f"{path}: object kutilgan, {type(value).__name__} keldi")
+            return {}
+        out = dict(value)
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: majburiy maydon yo'q")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                out[key] = _coerce(value[key], sub, f"{path}.{key}", errors)
+        return out
+
+    if kind == "ARRAY":
+        if not isinstance(value, list):
+            errors.append(f"{path}: array kutilgan, {type(value).__name__} keldi")
+            return []
+        return [_coerce(v, schema["items"], f"{path}[{i}]", errors) for i, v in enumerate(value)]
+
+    if kind == "BOOLEAN":
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        errors.append(f"{path}: boolean kutilgan, '{value}' keldi")
+        return False
+
+    if kind in ("NUMBER", "INTEGER"):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            errors.append(f"{path}: son kutilgan, '{value}' keldi")
+            return 0
+        return int(number) if kind == "INTEGER" else number
+
+    if kind == "STRING":
+        return value if isinstance(value, str) else str(value)
+
+    return value
+
+
+def validate(data, schema: dict):
+    """
+    Javobni sxema bo'yicha tekshiradi va turlarni to'g'rilaydi.
+    Returns: (tozalangan_dict, xatolar_ro'yxati) — xato bo'lmasa ro'yxat bo'sh.
+    """
+    errors = []
+    cleaned = _coerce(data, schema, "$", errors)
+    return cleaned, errors
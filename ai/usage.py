@@ -0,0 +1,263 @@
+"""
+Gemini token va chaqiruvlar hisobi — sessiya (bitta run_agent) bo'yicha.
+
+Avval token_stats/route_stats/json_stats modul darajasidagi dict lar edi: bir jarayonda
+bir nechta test ketma-ket yoki parallel ishlasa hisoblar aralashib ketardi.
+Endi har sessiya o'z UsageTracker iga ega:
+
+- joriy tracker contextvar da turadi — asyncio task lari (asyncio.gather, create_task)
+  va asyncio.to_thread uni avtomatik meros oladi, boshqa sessiyaga o'tmaydi
+- har yozuv bir vaqtda jarayon darajasidagi umumiy (process) trackerga ham qo'shiladi;
+  u reset qilinmaydi va Prometheus text formatida eksport qilinadi
+- yangilanishlar threading.Lock ostida (to_thread dagi chaqiruvlar uchun)
+
+Selector healing hisoblari (urinish/tiklandi/rad etildi — browser/healing.py) ham
+shu trackerda: parallel sessiyalarning heal natijalari aralashmaydi.
+
+QA_USAGE_PROM_FILE berilsa run_agent oxirida umumiy ko'rsatkichlar shu faylga yoziladi
+(node_exporter textfile collector kabi lokal agent uchun). Worker jarayonlarida har biri
+o'z fayliga yozadi (usage.prom → usage.worker0.prom, usage.worker1.prom, ...) va
+seriyalarga worker="<index>" label i qo'shiladi — collector ularni birlashtira oladi.
+"""
+import contextvars
+import itertools
+import os
+import threading
+
+PROM_FILE = os.getenv("QA_USAGE_PROM_FILE", "")
+
+_session_ids = itertools.count(1)
+# worker.py jarayoni o'z indeksini o'rnatadi; oddiy CLI ishga tushirishda None
+_worker_index = None
+
+
+class UsageTracker:
+    """Bitta sessiya (yoki butun jarayon) bo'yicha token, route va JSON hisoblari."""
+
+    def __init__(self, name: str = ""):
+        self.session_id = next(_session_ids)
+        self.name = name
+        self._lock = threading.Lock()
+        self.tokens = {"input": 0, "output": 0, "calls": 0, "cached": 0}
+        # Har step_name bo'yicha: route (text/vision), chaqiruvlar, tokenlar, kechikish
+        self.routes = {}
+        # ok — birinchi urinishda to'g'ri, repaired — tuzatishdan keyin, failed — tuzalmadi
+        self.json = {"ok": 0, "repaired": 0, "failed": 0}
+        # BrowserAgent.find_similar_element: attempts — urinishlar, healed/rejected — natija
+        self.healing = {"attempts": 0, "healed": 0, "rejected": 0}
+
+    def record_call(self, step_name: str, route: str, input_tokens: int, output_tokens: int,
+                    latency_ms: float, cached_tokens: int = 0) -> dict:
+        """Bitta API chaqiruvini qo'shadi. Returns: yozuvdan keyingi {total, calls}."""
+        with self._lock:
+            self.tokens["input"] += input_tokens
+            self.tokens["output"] += output_tokens
+            self.tokens["cached"] += cached_tokens
+            self.tokens["calls"] += 1
+            entry = self.routes.setdefault(step_name, {
+                "route": route, "calls": 0, "input_tokens": 0, "output_tokens": 0,
+                "cached_tokens": 0, "latency_ms": 0.0, "escalations": 0,
+            })
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cached_tokens"] += cached_tokens
+            entry["latency_ms"] += latency_ms
+            return {"total": self.tokens["input"] + self.tokens["output"],
+                    "calls": self.tokens["calls"]}
+
+    def record_escalation(self, step_name: str):
+        with self._lock:
+            if step_name in self.routes:
+                self.routes[step_name]["escalations"] += 1
+
+    def record_json(self, outcome: str):
+        with self._lock:
+            self.json[outcome] += 1
+
+    def record_heal(self, outcome: str):
+        with self._lock:
+            self.healing[outcome] += 1
+
+    def heal_stats(self) -> dict:
+        with self._lock:
+            return dict(self.healing)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "total_input": self.tokens["input"],
+                "total_output": self.tokens["output"],
+                "total_tokens": self.tokens["input"] + self.tokens["output"],
+                "total_api_calls": self.tokens["calls"],
+                "total_cached": self.tokens["cached"],
+                # prompt_token_count keshlangan qismni ham o'z ichiga oladi — u o'lchangan
+                # baseline (kesh bo'lmasa to'liq narxda hisoblanadigan kirish)
+                "total_uncached": self.tokens["input"] - self.tokens["cached"],
+                "cached_ratio": (round(self.tokens["cached"] / self.tokens["input"], 4)
+                                 if self.tokens["input"] else 0.0),
+                "json_parse": dict(self.json),
+            }
+
+    def route_stats(self) -> dict:
+        """
+        step_name → {route, calls, input_tokens, output_tokens, cached_tokens,
+                     uncached_tokens, cached_ratio, avg_input_tokens, avg_latency_ms,
+                     escalations}
+        """
+        with self._lock:
+            return {
+                name: {
+                    **e,
+                    "uncached_tokens": e["input_tokens"] - e["cached_tokens"],
+                    "cached_ratio": (round(e["cached_tokens"] / e["input_tokens"], 4)
+                                     if e["input_tokens"] else 0.0),
+                    "avg_input_tokens": round(e["input_tokens"] / e["calls"]) if e["calls"] else 0,
+                    "avg_latency_ms": round(e["latency_ms"] / e["calls"]) if e["calls"] else 0,
+                }
+                for name, e in self.routes.items()
+            }
+
+    def __repr__(self):
+        return (f"UsageTracker(#{self.session_id} {self.name!r} calls={self.tokens['calls']} "
+                f"tokens={self.tokens['input'] + self.tokens['output']})")
+
+
+# Jarayon bo'yicha umumiy hisob — hech qachon reset qilinmaydi
+process_usage = UsageTracker("process")
+_sessions_started = 0
+_sessions_lock = threading.Lock()
+
+# Sessiya boshlanmagan kontekst (masalan, bitta funksiyani alohida chaqirish) uchun
+_default_session = UsageTracker("default")
+_current = contextvars.ContextVar("qa_usage_session", default=None)
+
+
+def start_session(name: str = "") -> UsageTracker:
+    """
+    Joriy kontekst (asyncio task) uchun yangi tracker o'rnatadi va uni qaytaradi.
+    Keyingi Gemini chaqiruvlari (shu task va undan tug'ilgan task/threadlarda) unga yoziladi.
+    """
+    global _sessions_started
+    tracker = UsageTracker(name)
+    _current.set(tracker)
+    with _sessions_lock:
+        _sessions_started += 1
+    return tracker
+
+
+def current() -> UsageTracker:
+    return _current.get() or _default_session
+
+
+def record_call(step_name: str, route: str, input_tokens: int, output_tokens: int,
+                latency_ms: float, cached_tokens: int = 0) -> dict:
+    """Joriy sessiyaga va umumiy hisobga yozadi. Returns: sessiyaning {total, calls}."""
+    process_usage.record_call(step_name, route, input_tokens, output_tokens,
+                              latency_ms, cached_tokens)
+    return current().record_call(step_name, route, input_tokens, output_tokens,
+                                 latency_ms, cached_tokens)
+
+
+def record_escalation(step_name: str):
+    process_usage.record_escalation(step_name)
+    current().record_escalation(step_name)
+
+
+def record_json(outcome: str):
+    process_usage.record_json(outcome)
+    current().record_json(outcome)
+
+
+def record_heal(outcome: str):
+    """outcome: 'attempts' | 'healed' | 'rejected'."""
+    process_usage.record_heal(outcome)
+    current().record_heal(outcome)
+
+
+# ─── PROMETHEUS ───────────────────────────────────────────────
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def set_worker_index(index: int):
+    global _worker_index
+    _worker_index = index
+
+
+def to_prometheus(tracker: UsageTracker = None, const_labels: dict = None) -> str:
+    """
+    Tracker (standart: jarayon bo'yicha umumiy) ni Prometheus text formatida qaytaradi.
+    const_labels: har seriyaga qo'shiladigan label lar (masalan {"worker": "0"}).
+    """
+    tracker = tracker or process_usage
+    const_labels = const_labels or {}
+    summary = tracker.summary()
+    routes = tracker.route_stats()
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            text = ",".join(f'{k}="{_label(v)}"' for k, v in {**const_labels, **labels}.items())
+            lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+
+    metric("qa_gemini_api_calls_total", "counter", "Gemini API chaqiruvlari soni",
+           [({}, summary["total_api_calls"])])
+    metric("qa_gemini_tokens_total", "counter", "Gemini tokenlari (turi bo'yicha)", [
+        ({"type": "input"}, summary["total_input"]),
+        ({"type": "output"}, summary["total_output"]),
+        ({"type": "cached"}, summary["total_cached"]),
+    ])
+    metric("qa_gemini_step_calls_total", "counter", "step_name bo'yicha chaqiruvlar",
+           [({"step": n, "route": e["route"]}, e["calls"]) for n, e in routes.items()])
+    metric("qa_gemini_step_tokens_total", "counter", "step_name bo'yicha tokenlar",
+           [({"step": n, "type": t}, e[f"{t}_tokens"])
+            for n, e in routes.items() for t in ("input", "output", "cached")])
+    metric("qa_gemini_step_latency_seconds_total", "counter",
+           "step_name bo'yicha jami kechikish (soniya)",
+           [({"step": n}, round(e["latency_ms"] / 1000, 3)) for n, e in routes.items()])
+    metric("qa_gemini_step_escalations_total", "counter", "text → vision o'tishlar",
+           [({"step": n}, e["escalations"]) for n, e in routes.items()])
+    metric("qa_gemini_json_parse_total", "counter", "Strukturali javoblar natijasi",
+           [({"outcome": k}, v) for k, v in summary["json_parse"].items()])
+    metric("qa_heal_total", "counter", "Selector healing (urinish va natijalar)",
+           [({"outcome": k}, v) for k, v in tracker.heal_stats().items()])
+    if tracker is process_usage:
+        with _sessions_lock:
+            sessions = _sessions_started
+        metric("qa_usage_sessions_total", "counter", "Boshlangan sessiyalar (run_agent)",
+               [({}, sessions)])
+    return "\n".join(lines) + "\n"
+
+
+def prom_path(path: str = None) -> str:
+    """Worker jarayonida fayl nomiga indeks qo'shiladi: usage.prom → usage.worker0.prom."""
+    path = path or PROM_FILE
+    if not path or _worker_index is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker{_worker_index}{ext}"
+
+
+def write_prometheus(path: str = None) -> bool:
+    """
+    Umumiy ko'rsatkichlarni faylga atomar yozadi (textfile collector uchun).
+    Worker lar bir-birining faylini ustidan yozmasligi uchun fayl nomi va worker label i
+    jarayon indeksidan olinadi.
+    """
+    path = prom_path(path)
+    if not path:
+        return False
+    labels = {"worker": str(_worker_index)} if _worker_index is not None else None
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(const_labels=labels))
+        os.replace(tmp, path)
+        return True
+    except OSError as e:
+        print(f"  [⚠️  USAGE] Prometheus fayli yozilmadi ({path}): {e}")
+        return False
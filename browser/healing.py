@@ -0,0 +1,336 @@
+"""
+Self-healing selectorlar — saqlangan CSS/XPath ishlamay qolganda elementni joriy DOM dan
+modelsiz qayta topish.
+
+Saqlangan element (page_elements yozuvi, form_knowledge maydoni yoki checklist elementi)
+fingerprint ga aylantiriladi: id, data-testid, name, placeholder, label, matn, tag/type/role,
+classlar, joylashuv (bbox) va ota-elementlar zanjiri hash i. Muvaffaqiyatli click/fill dan
+keyin jonli DOM dan olingan to'liq fingerprint (FINGERPRINT_JS) saqlanadi; u bo'lmasa
+belgilar selector matnidan ajratib olinadi. Brauzerda har bir mos nomzod (click uchun bosiladigan,
+fill uchun kiritish elementlari) shu belgilar bo'yicha 0..1 oralig'ida baholanadi.
+Faqat fingerprint da bor belgilar hisobga olinadi (og'irliklar qayta normallanadi).
+
+Eng yaxshi nomzod qabul qilinadi, agar:
+- ball >= QA_HEAL_MIN_SCORE
+- ikkinchi nomzoddan kamida HEAL_MIN_MARGIN ustun bo'lsa (ikki o'xshash tugma — noaniq)
+"""
+import hashlib
+import json
+import os
+import re
+from collections.abc import Mapping
+
+HEAL_MIN_SCORE = float(os.getenv("QA_HEAL_MIN_SCORE", "0.7"))
+HEAL_MIN_MARGIN = 0.08
+
+# Shu belgilardan kamida bittasi bo'lmasa fingerprint juda kuchsiz (faqat tag/type) — tiklanmaydi
+_IDENTIFYING = ("id", "testid", "name", "text", "label", "placeholder")
+
+_ATTR_RE = re.compile(r"\[\s*([\w-]+)\s*[*^$~|]?=\s*['\"]([^'\"]*)['\"]\s*\]")
+_ID_RE = re.compile(r"#([A-Za-z_][\w-]*)")
+_CLASS_RE = re.compile(r"\.([A-Za-z_][\w-]*)")
+_TAG_RE = re.compile(r"^\s*([a-zA-Z][a-zA-Z0-9]*)")
+_HAS_TEXT_RE = re.compile(r":has-text\(\s*['\"]([^'\"]+)['\"]\s*\)")
+_XPATH_TAG_RE = re.compile(r"^\(?//?([a-zA-Z][a-zA-Z0-9]*)")
+_XPATH_ATTR_RE = re.compile(r"@([\w-]+)\s*=\s*['\"]([^'\"]*)['\"]")
+_XPATH_TEXT_RE = re.compile(r"(?:contains\(\s*(?:text\(\)|\.)\s*,|(?:text\(\)|\.)\s*=)\s*['\"]([^'\"]+)['\"]")
+
+# Model beradigan element turlari → DOM tag
+_TYPE_TAGS = {"button": "button", "link": "a", "select": "select", "textarea": "textarea"}
+_INPUT_TYPES = {"text", "email", "password", "number", "date", "tel", "search", "url",
+                "checkbox", "radio", "file", "datetime-local", "month"}
+
+
+def fingerprint_from_element(el: Mapping) -> dict:
+    """
+    Saqlangan element ma'lumotidan fingerprint yig'adi: aniq maydonlar (visible_text,
+    label/label_text, placeholder, type) + CSS/XPath ichidagi id, name, class, tag va matn.
+    el["fingerprint"] bo'lsa (jonli DOM dan olingan) — u ustun turadi.
+    """
+    fp = {}
+    css = el.get("css_selector") or ""
+    xpath = el.get("xpath") or ""
+
+    m = _TAG_RE.match(css)
+    if m:
+        fp["tag"] = m.group(1).lower()
+    m = _ID_RE.search(css)
+    if m:
+        fp["id"] = m.group(1)
+    classes = _CLASS_RE.findall(css.split(":")[0])
+    if classes:
+        fp["classes"] = classes
+    for attr, value in _ATTR_RE.findall(css) + _XPATH_ATTR_RE.findall(xpath):
+        key = {"aria-label": "label"}.get(attr, attr)
+        if key in ("id", "name", "placeholder", "type", "label", "role") and value:
+            fp.setdefault(key, value)
+    m = _HAS_TEXT_RE.search(css) or _XPATH_TEXT_RE.search(xpath)
+    if m:
+        fp["text"] = m.group(1)
+    m = _XPATH_TAG_RE.match(xpath)
+    if m and m.group(1) != "*":
+        fp.setdefault("tag", m.group(1).lower())
+
+    text = el.get("visible_text") or ""
+    if text.strip():
+        fp["text"] = text.strip()
+    label = el.get("label") or el.get("label_text") or ""
+    if label.strip():
+        fp["label"] = label.strip()
+    if el.get("placeholder"):
+        fp["placeholder"] = el["placeholder"]
+
+    el_type = (el.get("type") or el.get("element_type") or "").lower()
+    if el_type in _TYPE_TAGS:
+        fp.setdefault("tag", _TYPE_TAGS[el_type])
+    elif el_type in _INPUT_TYPES:
+        fp.setdefault("type", el_type)
+
+    stored = el.get("fingerprint")
+    if isinstance(stored, Mapping):
+        fp.update(flatten_fingerprint(stored))
+    return fp
+
+
+def is_identifying(fp: dict) -> bool:
+    return any(fp.get(key) for key in _IDENTIFYING)
+
+
+def pick_candidate(candidates: list):
+    """
+    Returns: (eng yaxshi nomzod yoki None, sabab). Nomzodlar ball bo'yicha kamayish tartibida.
+    """
+    if not candidates:
+        return None, "nomzod yo'q"
+    best = candidates[0]
+    runner_up = candidates[1]["score"] if len(candidates) > 1 else 0.0
+    if best["score"] < HEAL_MIN_SCORE:
+        return None, f"eng yaxshi ball {best['score']:.2f} < {HEAL_MIN_SCORE}"
+    if best["score"] - runner_up < HEAL_MIN_MARGIN:
+        return None, f"noaniq: {best['score']:.2f} va {runner_up:.2f} juda yaqin"
+    return best, f"ball {best['score']:.2f} (keyingi {runner_up:.2f})"
+
+
+# ─── JONLI DOM FINGERPRINT ────────────────────────────────────
+
+# Hash ga kiradigan barqaror belgilar (bbox va matn uzunligi kabi tebranuvchilar kirmaydi)
+_HASH_KEYS = ("tag", "role", "accessible_name", "ancestor_hash")
+_HASH_ATTRS = ("id", "name", "type", "data-testid", "data-test", "data-qa")
+_TESTID_ATTRS = ("data-testid", "data-test", "data-qa", "data-cy")
+
+
+def fingerprint_hash(fp: Mapping) -> str:
+    """Element identifikatori: bir xil element har safar bir xil hash beradi (bbox hisobga olinmaydi)."""
+    attrs = fp.get("attrs") or {}
+    parts = [str(fp.get(k) or "") for k in _HASH_KEYS]
+    parts += [f"{k}={attrs.get(k, '')}" for k in _HASH_ATTRS]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def flatten_fingerprint(fp: Mapping) -> dict:
+    """Saqlangan (FINGERPRINT_JS shaklidagi) fingerprint → SIMILARITY_JS belgilari."""
+    attrs = fp.get("attrs") or {}
+    flat = {
+        "tag": fp.get("tag"),
+        "role": fp.get("role"),
+        "label": fp.get("accessible_name"),
+        "text": fp.get("text"),
+        "id": attrs.get("id"),
+        "name": attrs.get("name"),
+        "type": attrs.get("type"),
+        "placeholder": attrs.get("placeholder"),
+        "testid": next((attrs[k] for k in _TESTID_ATTRS if attrs.get(k)), None),
+        "bbox": fp.get("bbox"),
+        "ancestor_hash": fp.get("ancestor_hash"),
+    }
+    return {k: v for k, v in flat.items() if v not in (None, "", [], {})}
+
+
+def stable_selector(fp: Mapping):
+    """
+    Fingerprint atributlaridan barqaror CSS: data-testid → id → tag[name].
+    Bitta querySelector bilan aniq topiladi (o'xshashlik qidiruvisiz). Returns: str yoki None
+    """
+    attrs = (fp or {}).get("attrs") or {}
+    for key in _TESTID_ATTRS:
+        if attrs.get(key):
+            return f"[{key}={json.dumps(attrs[key])}]"
+    if attrs.get("id"):
+        value = attrs["id"]
+        return f"#{value}" if re.fullmatch(r"[A-Za-z_][\w-]*", value) else f"[id={json.dumps(value)}]"
+    if attrs.get("name") and fp.get("tag"):
+        return f"{fp['tag']}[name={json.dumps(attrs['name'])}]"
+    return None
+
+
+# Ikkala skript uchun umumiy yordamchilar (nom/rol/ota-zanjir hash i bir xil hisoblanadi)
+_JS_HELPERS = r"""
+    const norm = s => (s || '').toString().toLowerCase().replace(/\s+/g, ' ').trim();
+    const clip = (s, n) => (s || '').toString().replace(/\s+/g, ' ').trim().substring(0, n);
+    const implicitRole = el => {
+        const explicit = el.getAttribute('role');
+        if (explicit) return explicit;
+        const tag = el.tagName.toLowerCase(), type = (el.getAttribute('type') || 'text').toLowerCase();
+        if (tag === 'a' && el.hasAttribute('href')) return 'link';
+        if (tag === 'button' || (tag === 'input' && ['submit', 'button', 'reset'].includes(type))) return 'button';
+        if (tag === 'select') return 'combobox';
+        if (tag === 'textarea') return 'textbox';
+        if (tag === 'input') return {checkbox: 'checkbox', radio: 'radio', search: 'searchbox',
+                                     number: 'spinbutton'}[type] || 'textbox';
+        return '';
+    };
+    const labelOf = el => {
+        const ref = el.getAttribute('aria-labelledby');
+        const node = ref && document.getElementById(ref);
+        if (node) return node.innerText;
+        if (el.getAttribute('aria-label')) return el.getAttribute('aria-label');
+        if (el.labels && el.labels.length) return el.labels[0].innerText;
+        return '';
+    };
+    const textOf = el => el.innerText || el.value || el.getAttribute('aria-label') ||
+                         el.getAttribute('title') || '';
+    const accessibleName = el => clip(labelOf(el) || el.getAttribute('alt') || el.getAttribute('title') ||
+        (['input', 'select', 'textarea'].includes(el.tagName.toLowerCase())
+            ? el.getAttribute('placeholder') : el.innerText) || '', 120);
+    const ancestorHash = el => {
+        // FNV-1a: 5 ta ota-element (tag#id[role]) zanjiri
+        const path = [];
+        for (let n = el.parentElement; n && n !== document.documentElement && path.length < 5; n = n.parentElement)
+            path.push(n.tagName.toLowerCase() + (n.id ? '#' + n.id : '') +
+                      (n.getAttribute('role') ? '[' + n.getAttribute('role') + ']' : ''));
+        let h = 0x811c9dc5;
+        for (const ch of path.join('>')) { h ^= ch.codePointAt(0); h = Math.imul(h, 0x01000193) >>> 0; }
+        return h.toString(16).padStart(8, '0');
+    };
+"""
+
+# locator.evaluate(FINGERPRINT_JS) — muvaffaqiyatli click/fill qilingan elementning fingerprint i
+FINGERPRINT_JS = "(el) => {" + _JS_HELPERS + r"""
+    const attrs = {};
+    for (const a of el.attributes) {
+        if (['id', 'name', 'type', 'placeholder', 'href', 'aria-label'].includes(a.name) ||
+            a.name.startsWith('data-'))
+            attrs[a.name] = a.value.substring(0, 200);
+    }
+    const r = el.getBoundingClientRect();
+    return {
+        tag: el.tagName.toLowerCase(),
+        role: implicitRole(el),
+        accessible_name: accessibleName(el),
+        text: clip(textOf(el), 120),
+        attrs,
+        bbox: {x: Math.round(r.x + window.scrollX), y: Math.round(r.y + window.scrollY),
+               width: Math.round(r.width), height: Math.round(r.height)},
+        ancestor_hash: ancestorHash(el),
+    };
+}"""
+
+# Brauzerda bajariladi: args = {fp, kind, limit} → [{score, css_selector, xpath, tag, text, label}]
+SIMILARITY_JS = "(args) => {" + _JS_HELPERS + r"""
+    const fp = args.fp, kind = args.kind;
+    const W = {id: .25, testid: .3, name: .2, text: .25, label: .2, placeholder: .15, tag: .05,
+               type: .05, role: .05, classes: .1, bbox: .1, ancestor_hash: .1};
+    const tokens = s => new Set(norm(s).split(/[^\p{L}\p{N}]+/u).filter(Boolean));
+    const jaccard = (A, B) => {
+        if (!A.size || !B.size) return 0;
+        let inter = 0;
+        A.forEach(t => { if (B.has(t)) inter++; });
+        return inter / (A.size + B.size - inter);
+    };
+    const textSim = (a, b) => {
+        a = norm(a); b = norm(b);
+        if (!a || !b) return 0;
+        if (a === b) return 1;
+        if (a.length > 2 && b.length > 2 && (a.includes(b) || b.includes(a)))
+            return 0.5 + 0.4 * Math.min(a.length, b.length) / Math.max(a.length, b.length);
+        return jaccard(tokens(a), tokens(b));
+    };
+    const idSim = (a, b) => a === b ? 1 : 0.8 * textSim((a || '').replace(/[-_]/g, ' '), (b || '').replace(/[-_]/g, ' '));
+    const testidOf = el => el.getAttribute('data-testid') || el.getAttribute('data-test') ||
+                           el.getAttribute('data-qa') || el.getAttribute('data-cy') || '';
+
+    const SEL = kind === 'fill'
+        ? 'input:not([type=hidden]), textarea, select, [contenteditable=true], [role=textbox], [role=combobox]'
+        : 'a, button, input[type=submit], input[type=button], [role=button], [role=link], ' +
+          '[role=menuitem], [role=tab], [onclick], summary';
+    const visible = el => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+
+    const cssPath = el => {
+        if (el.id && document.querySelectorAll('#' + CSS.escape(el.id)).length === 1)
+            return '#' + CSS.escape(el.id);
+        const tag = el.tagName.toLowerCase();
+        for (const attr of ['data-testid', 'data-test', 'data-qa', 'name', 'aria-label', 'placeholder']) {
+            const value = el.getAttribute(attr);
+            if (!value) continue;
+            const sel = `${tag}[${attr}=${JSON.stringify(value)}]`;
+            if (document.querySelectorAll(sel).length === 1) return sel;
+        }
+        const parts = [];
+        for (let n = el; n && n.nodeType === 1 && n !== document.documentElement; n = n.parentElement) {
+            if (n.id && n !== el) { parts.unshift('#' + CSS.escape(n.id)); break; }
+            let part = n.tagName.toLowerCase();
+            const same = n.parentElement
+                ? Array.from(n.parentElement.children).filter(c => c.tagName === n.tagName) : [];
+            if (same.length > 1) part += `:nth-of-type(${same.indexOf(n) + 1})`;
+            parts.unshift(part);
+        }
+        return parts.join(' > ');
+    };
+    const xpathOf = el => {
+        if (el.id) return `//*[@id=${JSON.stringify(el.id)}]`;
+        const parts = [];
+        for (let n = el; n && n.nodeType === 1; n = n.parentElement) {
+            const same = n.parentElement
+                ? Array.from(n.parentElement.children).filter(c => c.tagName === n.tagName) : [n];
+            parts.unshift(n.tagName.toLowerCase() + (same.length > 1 ? `[${same.indexOf(n) + 1}]` : ''));
+        }
+        return '/' + parts.join('/');
+    };
+
+    const scored = [];
+    for (const el of document.querySelectorAll(SEL)) {
+        if (!visible(el)) continue;
+        let total = 0, weight = 0;
+        const add = (key, sim) => {
+            const want = fp[key];
+            if (want === undefined || want === null || want === '' || (Array.isArray(want) && !want.length)) return;
+            total += W[key] * sim;
+            weight += W[key];
+        };
+        add('id', el.id ? idSim(el.id, fp.id) : 0);
+        add('testid', testidOf(el) === fp.testid ? 1 : 0);
+        add('name', el.getAttribute('name') === fp.name ? 1 : 0);
+        add('text', textSim(textOf(el), fp.text));
+        add('label', textSim(labelOf(el) || accessibleName(el), fp.label));
+        add('placeholder', textSim(el.getAttribute('placeholder'), fp.placeholder));
+        add('tag', el.tagName.toLowerCase() === fp.tag ? 1 : 0);
+        add('type', norm(el.getAttribute('type')) === norm(fp.type) ? 1 : 0);
+        add('role', implicitRole(el) === fp.role ? 1 : 0);
+        add('classes', jaccard(new Set(el.classList), new Set(fp.classes || [])));
+        if (fp.bbox) {
+            const r = el.getBoundingClientRect();
+            const dx = (r.x + window.scrollX + r.width / 2) - (fp.bbox.x + fp.bbox.width / 2);
+            const dy = (r.y + window.scrollY + r.height / 2) - (fp.bbox.y + fp.bbox.height / 2);
+            add('bbox', Math.max(0, 1 - Math.hypot(dx, dy) / 400));
+        }
+        add('ancestor_hash', ancestorHash(el) === fp.ancestor_hash ? 1 : 0);
+        if (!weight) continue;
+        let score = total / weight;
+        // Noyob identifikator (data-testid yoki id) aynan mos — matn o'zgargan bo'lsa ham shu element
+        if ((fp.testid && testidOf(el) === fp.testid) || (fp.id && el.id === fp.id))
+            score = Math.max(score, 0.85);
+        scored.push({el, score});
+    }
+    scored.sort((a, b) => b.score - a.score);
+    return scored.slice(0, args.limit || 3).map(({el, score}) => ({
+        score: Math.round(score * 1000) / 1000,
+        css_selector: cssPath(el),
+        xpath: xpathOf(el),
+        tag: el.tagName.toLowerCase(),
+        text: clip(textOf(el), 120),
+        label: clip(labelOf(el), 120),
+    }));
+}"""
@@ -0,0 +1,291 @@
+"""
+Tarmoq so'rovlarini boshqarish (Playwright route) — test uchun keraksiz og'ir resurslarni
+bloklaydi va statik fayllarni ishga tushirishlar orasida diskdagi keshdan beradi.
+
+Screenshot to'g'ri ko'rinishi uchun CSS, rasm, shrift va JS bloklanmaydi —
+ular faqat keshlanadi. Bloklanadi: video/audio, analitika va reklama domenlari,
+hamda sayt uchun DB (network_rules) da saqlangan qo'shimcha patternlar:
+
+    python main.py block <url> "*/chat-widget/*"     # pattern qo'shish
+    python main.py block <url>                       # sayt patternlari ro'yxati
+
+Kesh HTTP qoidalariga amal qiladi: no-store/private saqlanmaydi; yangilik muddati
+Cache-Control max-age (yoki Expires) dan olinadi, no-cache — har safar tekshiriladi.
+Muddati o'tgan yozuv ETag/Last-Modified bo'yicha shartli so'rov bilan tekshiriladi:
+304 kelsa diskdagi tana beriladi. Muddat berilmagan bo'lsa faqat Last-Modified bo'yicha
+evristika (RFC 9111: (Date - Last-Modified) ning 10%, QA_HTTP_CACHE_TTL_HOURS dan
+oshmaydi); validatorsiz javob saqlanmaydi. Kalit faqat URL — shuning uchun Vary
+(Accept-Encoding dan tashqari) li javoblar ham saqlanmaydi.
+"""
+import asyncio
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "memory", "http_cache")
+# Evristik (Last-Modified bo'yicha) yangilik muddatining yuqori chegarasi
+CACHE_TTL = int(os.getenv("QA_HTTP_CACHE_TTL_HOURS", "168")) * 3600
+
+# Screenshotga ta'sir qilmaydigan resurs turlari
+DEFAULT_BLOCKED_TYPES = {"media", "texttrack"}
+
+# Analitika / reklama / trekking domenlari
+DEFAULT_BLOCKED_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "connect.facebook.net",
+    "mc.yandex.ru",
+    "hotjar.com",
+    "clarity.ms",
+    "top-fwz1.mail.ru",
+]
+
+# Diskda keshlanadigan statik resurslar
+CACHEABLE_TYPES = {"stylesheet", "script", "font", "image"}
+
+# Keshga yozilmaydigan / qayta yuboriladigan response headerlar
+_SKIP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+# Tana diskda ochilgan (decoded) holda saqlanadi — Accept-Encoding bo'yicha farq yo'q
+_IGNORED_VARY = {"accept-encoding"}
+
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)")
+
+
+def _http_date(value: str):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers: dict) -> float:
+    """
+    Javob necha soniya yangi hisoblanadi: no-cache → 0, max-age, Expires - Date,
+    aks holda (Date - Last-Modified) * 0.1 (CACHE_TTL gacha), Last-Modified ham
+    bo'lmasa 0 — har foydalanishda tekshiriladi. Age header (proxy da turgan vaqt) ayriladi.
+    """
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    if match:
+        lifetime = int(match.group(1))
+    elif headers.get("expires"):
+        expires = _http_date(headers["expires"])
+        date = _http_date(headers.get("date", "")) or time.time()
+        lifetime = max(0, expires - date) if expires is not None else 0
+    else:
+        last_modified = _http_date(headers.get("last-modified", ""))
+        date = _http_date(headers.get("date", "")) or time.time()
+        lifetime = min(0.1 * (date - last_modified), CACHE_TTL) if last_modified is not None else 0
+    try:
+        lifetime -= int(headers.get("age", 0))
+    except ValueError:
+        pass
+    return max(0, lifetime)
+
+
+class NetworkPolicy:
+    def __init__(self, blocked_patterns: list = None, use_cache: bool = True,
+                 blocked_types: set = None):
+        """
+        blocked_patterns: sayt uchun qo'shimcha patternlar — '*' bo'lsa glob,
+                          aks holda URL ichida qidiriladigan matn.
+        """
+        self.blocked_patterns = list(blocked_patterns or [])
+        self.blocked_types = set(blocked_types if blocked_types is not None else DEFAULT_BLOCKED_TYPES)
+        self.use_cache = use_cache
+        self.stats = {
+            "requests": 0,
+            "blocked": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "revalidated": 0,
+            "bytes_from_cache": 0,
+            "bytes_downloaded": 0,
+        }
+
+    # ─── Bloklash ─────────────────────────────────────────────
+
+    def is_blocked(self, url: str, resource_type: str) -> bool:
+        if resource_type in self.blocked_types:
+            return True
+        host = urlparse(url).netloc.lower()
+        if any(host == d or host.endswith("." + d) for d in DEFAULT_BLOCKED_DOMAINS):
+            return True
+        for pattern in self.blocked_patterns:
+            if "*" in pattern:
+                if fnmatch.fnmatch(url, pattern):
+                    return True
+            elif pattern in url:
+                return True
+        return False
+
+    # ─── Disk kesh ────────────────────────────────────────────
+
+    @staticmethod
+    def _cache_paths(url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        folder = os.path.join(CACHE_DIR, key[:2])
+        return os.path.join(folder, key + ".body"), os.path.join(folder, key + ".json")
+
+    def _cache_read(self, url: str):
+        """
+        Returns: (meta, body, fresh) yoki None. Muddati o'tgan, lekin ETag/Last-Modified
+        bor yozuv ham qaytariladi (fresh=False) — shartli so'rov bilan tekshiriladi.
+        """
+        body_path, meta_path = self._cache_paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            headers = meta.get("headers", {})
+            # Eski qoidalar bilan yozilgan (Vary, validatorsiz) yozuvlar ishlatilmaydi
+            if not self._is_storable(meta.get("status", 0), headers):
+                return None
+            fresh = time.time() - meta.get("stored_at", 0) < freshness_lifetime(headers)
+            if not fresh and not (headers.get("etag") or headers.get("last-modified")):
+                return None
+            with open(body_path, "rb") as f:
+                return meta, f.read(), fresh
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta_path: str, meta: dict):
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _cache_write(self, url: str, status: int, headers: dict, body: bytes):
+        body_path, meta_path = self._cache_paths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        with open(body_path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(body_path + ".tmp", body_path)
+        self._write_meta(meta_path, {"url": url, "status": status, "headers": headers,
+                                     "size": len(body), "stored_at": time.time()})
+
+    def _cache_refresh(self, meta: dict, headers: dict) -> dict:
+        """304 dan keyin: yangi headerlar (ETag, Cache-Control, ...) qo'shiladi, muddat yangilanadi."""
+        _, meta_path = self._cache_paths(meta["url"])
+        meta = {**meta, "headers": {**meta["headers"], **headers}, "stored_at": time.time()}
+        self._write_meta(meta_path, meta)
+        return meta
+
+    @staticmethod
+    def _conditional_headers(request_headers: dict, cached_headers: dict) -> dict:
+        headers = dict(request_headers)
+        if cached_headers.get("etag"):
+            headers["if-none-match"] = cached_headers["etag"]
+        if cached_headers.get("last-modified"):
+            headers["if-modified-since"] = cached_headers["last-modified"]
+        return headers
+
+    @staticmethod
+    def _is_storable(status: int, headers: dict) -> bool:
+        cache_control = headers.get("cache-control", "").lower()
+        if status != 200 or "no-store" in cache_control or "private" in cache_control:
+            return False
+        # Kalitda faqat URL bor — so'rov headerlariga qarab farq qiladigan javob saqlanmaydi
+        vary = {v.strip().lower() for v in headers.get("vary", "").split(",") if v.strip()}
+        if vary - _IGNORED_VARY:
+            return False
+        # Muddati ham, validatori ham yo'q javobni keyin hech qachon berib bo'lmaydi
+        return bool(freshness_lifetime(headers) or headers.get("etag") or headers.get("last-modified"))
+
+    # ─── Route handler ────────────────────────────────────────
+
+    async def handle(self, route):
+        """context.route("**/*", policy.handle) uchun."""
+        request = route.request
+        self.stats["requests"] += 1
+        try:
+            if self.is_blocked(request.url, request.resource_type):
+                self.stats["blocked"] += 1
+                await route.abort("blockedbyclient")
+                return
+
+            if (not self.use_cache or request.method != "GET"
+                    or request.resource_type not in CACHEABLE_TYPES):
+                await route.continue_()
+                return
+
+            cached = await asyncio.to_thread(self._cache_read, request.url)
+            if cached and cached[2]:
+                meta, body, _ = cached
+                self.stats["cache_hits"] += 1
+                self.stats["bytes_from_cache"] += len(body)
+                await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+                return
+
+            if cached:
+                # Muddati o'tgan — server o'zgarmagan desa (304) diskdagi tana beriladi
+                meta, body, _ = cached
+                response = await route.fetch(
+                    headers=self._conditional_headers(request.headers, meta["headers"])
+                )
+                if response.status == 304:
+                    fresh_headers = {k.lower(): v for k, v in response.headers.items()
+                                     if k.lower() not in _SKIP_HEADERS}
+                    meta = await asyncio.to_thread(self._cache_refresh, meta, fresh_headers)
+                    self.stats["revalidated"] += 1
+                    self.stats["cache_hits"] += 1
+                    self.stats["bytes_from_cache"] += len(body)
+                    await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+                    return
+            else:
+                response = await route.fetch()
+
+            self.stats["cache_misses"] += 1
+            body = await response.body()
+            self.stats["bytes_downloaded"] += len(body)
+            headers = {k: v for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS}
+            if self._is_storable(response.status, response.headers):
+                await asyncio.to_thread(self._cache_write, request.url, response.status, headers, body)
+            await route.fulfill(status=response.status, headers=headers, body=body)
+        except Exception as ex:
+            print(f"  [⚠️  NETWORK] {request.url[:80]} → {str(ex)[:80]}")
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    def summary(self) -> dict:
+        total = self.stats["cache_hits"] + self.stats["cache_misses"]
+        return {
+            **self.stats,
+            "cache_hit_ratio": round(self.stats["cache_hits"] / total, 3) if total else 0.0,
+        }
+
+
+# ─── CLI ──────────────────────────────────────────────────────
+
+def main(argv: list = None):
+    """python main.py block <url> [pattern ...] — network_rules ga qo'shadi yoki ro'yxatini chiqaradi."""
+    from memory.db import init_db, save_network_rule, get_network_rules
+    from utils.common import get_base_url
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or "://" not in argv[0]:
+        print('  Ishlatish: python main.py block <url> ["*/pattern/*" ...]')
+        return
+    init_db()
+    site_url = get_base_url(argv[0])
+    for pattern in argv[1:]:
+        save_network_rule(site_url, pattern)
+    print(f"\n  ┌─ [TARMOQ QOIDALARI: {site_url}] ─────────────────────")
+    for pattern in get_network_rules(site_url) or ["(yo'q)"]:
+        print(f"  │ 🚫 {pattern}")
+    print(f"  └───────────────────────────────────────────────────")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,230 @@
-from playwright.async_api import async_playwright, Page, Browser
+import asyncio
+import os
+import re
+import time
+from datetime import date
+from typing import TYPE_CHECKING
+
+from ai import usage
+from browser import healing
+from utils import metrics
+
+if TYPE_CHECKING:
+    # Faqat type hint uchun — playwright start() ichida yuklanadi
+    from playwright.async_api import Page, Browser
+
+# Fayl yuklash maydonlari uchun lokal test fayllari
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures")
+
+# Verify assertion: shart bajarilishini shuncha kutiladi (toast/matn kechikib chiqadi)
+ASSERT_TIMEOUT_MS = int(os.getenv("QA_ASSERT_TIMEOUT_MS", "3000"))
+ASSERT_POLL_MS = 250
+# Qadam harakati belgilanmagan bo'lsa (mark_action) toast shuncha ms ichida ko'ringan bo'lsa hisobga olinadi
+TOAST_WINDOW_MS = int(os.getenv("QA_TOAST_WINDOW_MS", "30000"))
+ASSERTION_KINDS = ("url", "title", "text_visible", "element_count", "toast")
+
+# Har hujjatga (kontekst darajasida, tablar ham) o'rnatiladi: paydo bo'lgan toast/alert
+# matnlarini window.__qaToasts ga va sessionStorage ga yozadi — forma submit dan keyingi
+# redirect da ham oldingi sahifadagi "Saqlandi" xabari yo'qolmaydi.
+_TOAST_OBSERVER_JS = """
+(() => {
+    if (window.__qaToastObserver) return;
+    const SEL = '[role=alert], [role=status], [aria-live], .toast, .alert, .notification, ' +
+                '.snackbar, .Toastify__toast, .swal2-popup, .ant-message, .el-message, .noty_body';
+    const KEY = '__qaToasts';
+    const load = () => { try { return JSON.parse(sessionStorage.getItem(KEY) || '[]'); } catch (e) { return []; } };
+    window.__qaToasts = load();
+    const ERR = /error|danger|fail|invalid|warn/i;
+    const ERR_TEXT = /xato|muvaffaqiyatsiz|ошибк|не удалось|error|failed/i;
+    const push = (el) => {
+        const text = (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim().substring(0, 200);
+        if (!text) return;
+        const last = window.__qaToasts[window.__qaToasts.length - 1];
+        if (last && last.text === text && Date.now() - last.t < 1000) return;
+        const cls = String(el.className || '') + ' ' + String((el.parentElement || {}).className || '');
+        const err = ERR.test(cls) || ERR_TEXT.test(text);
+        window.__qaToasts.push({text, t: Date.now(), err});
+        window.__qaToasts = window.__qaToasts.slice(-50);
+        try { sessionStorage.setItem(KEY, JSON.stringify(window.__qaToasts)); } catch (e) {}
+    };
+    const scan = (node) => {
+        if (!(node instanceof Element)) return;
+        if (node.matches(SEL)) push(node);
+        node.querySelectorAll(SEL).forEach(push);
+    };
+    window.__qaToastObserver = new MutationObserver(mutations => {
+        for (const m of mutations) {
+            if (m.type === 'childList') m.addedNodes.forEach(scan);
+            else if (m.target && m.target.parentElement) {
+                const host = m.target.parentElement.closest(SEL);
+                if (host) push(host);
+            }
+        }
+    });
+    const start = () => window.__qaToastObserver.observe(document.documentElement,
+        {childList: true, subtree: true, characterData: true});
+    if (document.documentElement) start();
+    else document.addEventListener('DOMContentLoaded', start);
+})();
+"""
+
+# Qabul qilinadigan sana formatlari → (regex, guruhlar tartibi)
+_DATE_PATTERNS = [
+    (re.compile(r"^(\d{4})[-./](\d{1,2})[-./](\d{1,2})"), ("y", "m", "d")),
+    (re.compile(r"^(\d{1,2})[-./](\d{1,2})[-./](\d{4})"), ("d", "m", "y")),
+]
+
+
+def normalize_date(value: str, input_type: str = "date") -> str:
+    """
+    Har xil ko'rinishdagi sanani (25.12.2024, 2024/12/25, ...) HTML
+    input[type=date|datetime-local|month] qabul qiladigan ISO formatga keltiradi.
+    Tanib bo'lmasa bugungi sana qaytariladi.
+    """
+    text = str(value or "").strip()
+    parsed = None
+    for pattern, order in _DATE_PATTERNS:
+        m = pattern.match(text)
+        if m:
+            parts = dict(zip(order, (int(g) for g in m.groups())))
+            try:
+                parsed = date(parts["y"], parts["m"], parts["d"])
+            except ValueError:
+                parsed = None
+            break
+    if parsed is None:
+        parsed = date.today()
+
+    if input_type == "datetime-local":
+        time_part = re.search(r"(\d{1,2}):(\d{2})", text)
+        hh, mm = (int(time_part.group(1)), int(time_part.group(2))) if time_part else (0, 0)
+        return f"{parsed.isoformat()}T{hh:02d}:{mm:02d}"
+    if input_type == "month":
+        return parsed.strftime("%Y-%m")
+    return parsed.isoformat()
+
+
+def pick_fixture_file(accept: str = "") -> str:
+    """input[accept] ga qarab fixtures/ papkasidan mos test faylini tanlaydi."""
+    accept = (accept or "").lower()
+    if "image" in accept or any(ext in accept for ext in (".png", ".jpg", ".jpeg")):
+        name = "test_image.png"
+    elif "pdf" in accept:
+        name = "test_document.pdf"
+    else:
+        name = "test_file.txt"
+    return os.path.join(FIXTURES_DIR, name)
+
+
+async def launch_browser(headless: bool = True) -> tuple:
+    """
+    Chromium ni ishga tushiradi. Returns: (playwright, browser).
+    Worker jarayoni bitta brauzerni ko'p ishlar uchun shared_browser sifatida ishlatadi.
+    """
+    from playwright.async_api import async_playwright
+
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(headless=headless)
+    return playwright, browser
 
 
 class BrowserAgent:
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, network_policy=None,
+                 har_path: str = None, har_mode: str = None, shared_browser=None):
+        """
+        network_policy: browser.network.NetworkPolicy — berilsa barcha so'rovlar
+        u orqali o'tadi (og'ir resurslar bloklanadi, statik fayllar diskdan keshlanadi).
+        har_path/har_mode: 'record' — butun trafik HAR ga yoziladi,
+                           'replay' — javoblar faqat HAR dan beriladi (tarmoqsiz).
+        shared_browser: oldindan ishga tushirilgan Chromium (launch_browser()) — berilsa
+                        start() faqat yangi kontekst ochadi, stop() faqat uni yopadi.
+        """
         self.headless = headless
+        self.network_policy = network_policy
+        self.har_path = har_path
+        self.har_mode = har_mode
         self._playwright = None
-        self._browser: Browser = None
-        self._page: Page = None
-
-    async def start(self):
-        self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(headless=self.headless)
-        context = await self._browser.new_context(
-            viewport={"width": 1366, "height": 768}
-        )
-        self._page = await context.new_page()
+        self._browser: "Browser" = shared_browser
+        self._owns_browser = shared_browser is None
+        self._context = None
+        self._page: "Page" = None
+        self.session_restored = False   # start() saqlangan sessiya bilan ochilganmi
+        self._is_tab = False            # new_tab() orqali yaratilgan (brauzer egasi emas)
+        # Oxirgi muvaffaqiyatli click/fill elementining jonli DOM fingerprint i (healing.FINGERPRINT_JS)
+        self.last_fingerprint = None
+        # mark_action() vaqti (sahifa soati, ms) — toast assertion faqat shundan keyingi xabarlarni sanaydi
+        self._action_mark = None
+
+    async def start(self, storage_state: dict = None):
+        """
+        storage_state: oldingi logindan saqlangan cookie/localStorage (memory/session_store).
+        Berilsa, kontekst shu sessiya bilan ochiladi va login qayta bajarilmasligi mumkin.
+        """
+        if self._owns_browser:
+            self._playwright, self._browser = await launch_browser(self.headless)
+        context_options = {
+            "viewport": {"width": 1366, "height": 768},
+            "storage_state": storage_state or None,
+        }
+        if self.har_mode == "record":
+            context_options["record_har_path"] = self.har_path
+            context_options["record_har_content"] = "embed"
+        self._context = await self._browser.new_context(**context_options)
+        metrics.browser_open.inc(kind="context")
+        self.session_restored = bool(storage_state)
+        await self._context.add_init_script(_TOAST_OBSERVER_JS)
+
+        if self.har_mode == "replay":
+            # HAR da yo'q so'rovlar tarmoqqa chiqmaydi — to'liq oflayn
+            await self._context.route_from_har(self.har_path, not_found="abort")
+        elif self.network_policy:
+            await self._context.route("**/*", self.network_policy.handle)
+        self._page = await self._context.new_page()
+
+    async def storage_state(self) -> dict:
+        """Joriy kontekstning cookie va localStorage holati (sessiyani saqlash uchun)."""
+        return await self._context.storage_state()
+
+    async def has_login_form(self) -> bool:
+        """
+        Sahifada ko'rinadigan parol maydoni bormi — sessiya hali amal qilishini
+        screenshot va AI siz tekshirish uchun.
+        """
+        try:
+            return await self._page.evaluate("""
+            () => Array.from(document.querySelectorAll('input[type=password]'))
+                .some(el => { const r = el.getBoundingClientRect(); return r.width > 0 && r.height > 0; })
+            """)
+        except Exception:
+            return False
+
+    async def new_tab(self) -> "BrowserAgent":
+        """
+        Shu kontekstda yangi tab ochadi va uni alohida BrowserAgent sifatida qaytaradi.
+        Cookie/sessiya va tarmoq qoidalari umumiy; tab.stop() faqat tabni yopadi.
+        """
+        tab = BrowserAgent(headless=self.headless, network_policy=self.network_policy)
+        tab._playwright = self._playwright
+        tab._browser = self._browser
+        tab._context = self._context
+        tab._page = await self._context.new_page()
+        tab.session_restored = self.session_restored
+        tab._is_tab = True
+        tab._owns_browser = False
+        metrics.browser_open.inc(kind="tab")
+        return tab
 
     async def stop(self):
+        if self._is_tab:
+            metrics.browser_open.dec(kind="tab")
+            await self._page.close()
+            return
+        # HAR fayli faqat kontekst yopilganda diskka yoziladi
+        if self._context:
+            metrics.browser_open.dec(kind="context")
+            await self._context.close()
+        if not self._owns_browser:
+            return
         if self._browser:
             await self._browser.close()
         if self._playwright:
@@ -26,8 +234,9 @@ class BrowserAgent:
         await self._page.goto(url, wait_until="domcontentloaded", timeout=30000)
         await self._page.wait_for_timeout(1500)
 
-    async def screenshot(self) -> bytes:
-        return await self._page.screenshot(full_page=False)
+    async def screenshot(self, clip: dict = None) -> bytes:
+        """clip: {'x','y','width','height'} — faqat shu hudud (o'zgargan qism) uchun."""
+        return await self._page.screenshot(full_page=False, clip=clip)
 
     async def current_url(self) -> str:
         return self._page.url
@@ -35,6 +244,162 @@ class BrowserAgent:
     async def get_page_title(self) -> str:
         return await self._page.title()
 
+    async def page_text(self, max_chars: int = 50000) -> dict:
+        """Arzon DOM tekshiruvlari uchun: {"title", "text"} — ko'rinadigan matn (innerText)."""
+        try:
+            return await self._page.evaluate("""
+            (maxChars) => ({
+                title: document.title || '',
+                text: (document.body ? document.body.innerText : '')
+                    .replace(/\\s+/g, ' ').trim().substring(0, maxChars),
+            })
+            """, max_chars)
+        except Exception as ex:
+            print(f"  [⚠️  DOM] sahifa matni olinmadi: {str(ex)[:80]}")
+            return {"title": "", "text": ""}
+
+    async def check_assertion(self, assertion: dict, timeout_ms: int = None) -> dict:
+        """
+        Deterministik verify (screenshot va modelsiz). assertion — reja qadamidagi:
+            {"kind": "url",           "value": "/products"}        # substring yoki regex
+            {"kind": "title",         "value": "Tovarlar"}
+            {"kind": "text_visible",  "value": "Muvaffaqiyatli saqlandi"}
+            {"kind": "element_count", "selector": "table tbody tr", "op": ">=", "count": 1}
+            {"kind": "toast",         "value": "saqlandi"}           # value bo'sh — istalgan xatosiz toast
+            "negate": true — shart bajarilMASligi kerak
+        Shart timeout_ms gacha har ASSERT_POLL_MS da qayta tekshiriladi.
+        Returns: {"passed": True/False/None, "detail": str}; None — noaniq (noma'lum tur,
+                 noto'g'ri selector/regex, sahifa xatosi) → qarorni model qiladi.
+        """
+        kind = (assertion or {}).get("kind")
+        if kind not in ASSERTION_KINDS:
+            return {"passed": None, "detail": f"noma'lum assertion turi: {kind}"}
+        negate = bool(assertion.get("negate"))
+        timeout_ms = ASSERT_TIMEOUT_MS if timeout_ms is None else timeout_ms
+        deadline = time.monotonic() + timeout_ms / 1000
+
+        while True:
+            try:
+                ok, detail = await self._assertion_state(kind, assertion)
+            except Exception as ex:
+                return {"passed": None, "detail": f"{kind}: {str(ex)[:120]}"}
+            if ok is None:
+                return {"passed": None, "detail": detail}
+            if ok != negate or time.monotonic() >= deadline:
+                passed = ok != negate
+                print(f"  [🎯 ASSERT] {kind}{' (negate)' if negate else ''}: "
+                      f"{'✅' if passed else '❌'} {detail}")
+                return {"passed": passed, "detail": detail}
+            await asyncio.sleep(ASSERT_POLL_MS / 1000)
+
+    async def _assertion_state(self, kind: str, assertion: dict) -> tuple:
+        """Bitta tekshiruv. Returns: (True/False/None, tavsif)"""
+        value = (assertion.get("value") or "").strip()
+
+        if kind == "url":
+            if not value:
+                return None, "url: value bo'sh"
+            url = self._page.url
+            try:
+                ok = value in url or bool(re.search(value, url))
+            except re.error:
+                ok = False
+            return ok, f"URL '{url}' ~ '{value}'"
+
+        if kind == "title":
+            if not value:
+                return None, "title: value bo'sh"
+            title = await self._page.title()
+            return value.lower() in title.lower(), f"title '{title}' ∋ '{value}'"
+
+        if kind == "text_visible":
+            if not value:
+                return None, "text_visible: value bo'sh"
+            locator = self._page.get_by_text(value)
+            count = await locator.count()
+            for i in range(min(count, 5)):
+                if await locator.nth(i).is_visible():
+                    return True, f"'{value}' ko'rinadi"
+            return False, f"'{value}' ko'rinmadi ({count} ta yashirin moslik)"
+
+        if kind == "element_count":
+            selector = (assertion.get("selector") or value).strip()
+            if not selector:
+                return None, "element_count: selector bo'sh"
+            expected = int(assertion.get("count") if assertion.get("count") is not None else 1)
+            op = assertion.get("op") or ">="
+            compare = {">=": int.__ge__, "<=": int.__le__, "==": int.__eq__,
+                       ">": int.__gt__, "<": int.__lt__}.get(op)
+            if compare is None:
+                return None, f"element_count: noma'lum op '{op}'"
+            target = f"xpath={selector}" if selector.startswith(("/", "(")) else selector
+            count = await self._page.locator(target).count()
+            return compare(count, expected), f"'{selector}' soni {count} {op} {expected}"
+
+        # toast — faqat qadam harakatidan (mark_action) keyin paydo bo'lganlar; sessionStorage dagi
+        # oldingi qadamlar xabarlari hisobga olinmaydi
+        toasts = await self._page.evaluate("""
+        ([since, windowMs]) => {
+            const from = since === null ? Date.now() - windowMs : since;
+            return (window.__qaToasts || []).filter(x => x.t >= from);
+        }
+        """, [self._action_mark, TOAST_WINDOW_MS])
+        if value:
+            matched = [t for t in toasts if value.lower() in t["text"].lower()]
+        else:
+            # value bo'sh — istalgan muvaffaqiyat xabari (xato toasti "toast chiqdi" deb sanalmaydi)
+            matched = [t for t in toasts if not t.get("err")]
+        if matched:
+            return True, f"toast: '{matched[-1]['text'][:80]}'"
+        return False, f"toast '{value}' yo'q ({len(toasts)} ta boshqa xabar)"
+
+    async def mark_action(self):
+        """Qadam harakati boshlanishini belgilaydi (toast assertion shundan keyingilarni sanaydi)."""
+        try:
+            self._action_mark = await self._page.evaluate("Date.now()")
+        except Exception:
+            self._action_mark = None
+
+    async def _remember(self, locator):
+        """Topilgan elementning fingerprint ini last_fingerprint ga yozadi (xato bo'lsa — None)."""
+        try:
+            fp = await locator.evaluate(healing.FINGERPRINT_JS)
+            fp["hash"] = healing.fingerprint_hash(fp)
+            self.last_fingerprint = fp
+        except Exception:
+            self.last_fingerprint = None
+
+    async def find_similar_element(self, fingerprint: dict, kind: str = "click"):
+        """
+        Saqlangan selector ishlamay qolganda: joriy DOM dagi eng o'xshash elementni
+        fingerprint bo'yicha topadi (browser/healing.py). Model chaqirilmaydi.
+        kind: 'click' — bosiladigan elementlar, 'fill' — kiritish maydonlari.
+        Returns: {"score", "css_selector", "xpath", "tag", "text", "label"} yoki None
+        """
+        usage.record_heal("attempts")
+        if not healing.is_identifying(fingerprint):
+            usage.record_heal("rejected")
+            print(f"  [🩹 HEAL] fingerprint juda kuchsiz: {fingerprint}")
+            return None
+        try:
+            candidates = await self._page.evaluate(
+                healing.SIMILARITY_JS, {"fp": fingerprint, "kind": kind, "limit": 3}
+            )
+        except Exception as ex:
+            usage.record_heal("rejected")
+            print(f"  [⚠️  HEAL] DOM baholanmadi: {str(ex)[:80]}")
+            return None
+
+        best, reason = healing.pick_candidate(candidates)
+        print(f"\n  ┌─ [HEAL: {kind}] ──────────────────────────────────────")
+        print(f"  │ Fingerprint : {fingerprint}")
+        for c in candidates:
+            print(f"  │ {c['score']:.2f}  {c['tag']} '{c['text'][:40]}' → {c['css_selector']}")
+        print(f"  │ Natija      : {'✅' if best else '❌'} {reason}")
+        print(f"  └───────────────────────────────────────────────────")
+        usage.record_heal("healed" if best else "rejected")
+        return best
+
     async def wait(self, ms: int = 1000):
         await self._page.wait_for_timeout(ms)
 
@@ -73,6 +438,7 @@ class BrowserAgent:
         print(f"  │ css         : {css_selector}")
         print(f"  │ xpath       : {xpath}")
 
+        self.last_fingerprint = None
         strategies = []
 
         # 1. get_by_placeholder — eng ishonchli (placeholder bo'lsa)
@@ -140,10 +506,16 @@ class BrowserAgent:
                     print(f"  │   ⚠️  Bu element input emas, o'tkazib yuborildi")
                     continue
 
+                fill_value = str(value)
+                if el_type in ("date", "datetime-local", "month"):
+                    fill_value = normalize_date(value, el_type)
+                    print(f"  │   sana normallashtirildi: '{value}' → '{fill_value}'")
+
                 await el.scroll_into_view_if_needed()
-                await el.fill(str(value), timeout=5000)
+                await el.fill(fill_value, timeout=5000)
                 await self._page.wait_for_timeout(300)
-                print(f"  │ ✅ TO'LDIRILDI: '{value}' → [{strategy}] '{str(loc_val)[:50]}'")
+                await self._remember(el)
+                print(f"  │ ✅ TO'LDIRILDI: '{fill_value}' → [{strategy}] '{str(loc_val)[:50]}'")
                 print(f"  └───────────────────────────────────────────────────")
                 return True
 
@@ -151,10 +523,215 @@ class BrowserAgent:
                 print(f"  │ ❌ [{strategy}] xato: {str(ex)[:100]}")
                 continue
 
+        self.last_fingerprint = None
         print(f"  │ ❌ Hech bir locator ishlamadi!")
         print(f"  └───────────────────────────────────────────────────")
         return False
 
+    # ═══════════════════════════════════════════════════════════
+    #  TYPED FIELDS — select, checkbox/radio, file
+    #  try_fill bilan bir xil locator tartibi, lekin har tur o'z
+    #  Playwright API si bilan to'ldiriladi (fill emas)
+    # ═══════════════════════════════════════════════════════════
+
+    async def _locate_field(
+        self,
+        css_selector: str = None,
+        xpath: str = None,
+        label_text: str = None,
+        role: str = None,
+        role_name: str = None,
+        fallback_css: str = None,
+        require_visible: bool = True,
+    ):
+        """
+        Maydonni topadi: role → label → css → xpath → fallback_css.
+        Topilgan birinchi locator ni (strategiya nomi bilan) qaytaradi, topilmasa (None, None).
+        require_visible=False — yashirin elementlar uchun (masalan custom checkbox yoki file input).
+        """
+        self.last_fingerprint = None
+        strategies = []
+        if role and role_name:
+            strategies.append(("role", (role, role_name)))
+        if label_text:
+            strategies.append(("label", label_text))
+        if css_selector:
+            strategies.append(("css", css_selector))
+        if xpath:
+            strategies.append(("xpath", xpath))
+        if fallback_css:
+            strategies.append(("fallback", fallback_css))
+
+        for strategy, loc_val in strategies:
+            try:
+                if strategy == "role":
+                    el = self._page.get_by_role(loc_val[0], name=loc_val[1]).first
+                elif strategy == "label":
+                    el = self._page.get_by_label(loc_val, exact=False).first
+                elif strategy == "xpath":
+                    el = self._page.locator(f"xpath={loc_val}").first
+                else:
+                    el = self._page.locator(loc_val).first
+
+                if await el.count() == 0:
+                    continue
+                if require_visible and not await el.is_visible(timeout=2000):
+                    print(f"  │ [{strategy}] '{str(loc_val)[:50]}' → ko'rinmaydi")
+                    continue
+                await self._remember(el)
+                return el, strategy
+            except Exception as ex:
+                print(f"  │ ❌ [{strategy}] xato: {str(ex)[:100]}")
+        return None, None
+
+    async def try_select(
+        self,
+        value: str = None,
+        css_selector: str = None,
+        xpath: str = None,
+        label_text: str = None,
+    ) -> bool:
+        """
+        Native <select> uchun select_option. value bo'lsa label/value bo'yicha tanlaydi,
+        bo'lmasa yoki mos variant topilmasa — birinchi bo'sh bo'lmagan variantni tanlaydi.
+        """
+        print(f"\n  ┌─ [PLAYWRIGHT: try_select] ─────────────────────────")
+        print(f"  │ Qiymat      : '{value}'")
+        print(f"  │ label_text  : {label_text}")
+        print(f"  │ css         : {css_selector}")
+        print(f"  │ xpath       : {xpath}")
+
+        el, strategy = await self._locate_field(
+            css_selector=css_selector, xpath=xpath, label_text=label_text,
+            role="combobox", role_name=label_text,
+        )
+        if el is None:
+            print(f"  │ ❌ Select topilmadi!")
+            print(f"  └───────────────────────────────────────────────────")
+            return False
+
+        try:
+            tag = await el.evaluate("el => el.tagName.toLowerCase()")
+            if tag != "select":
+                print(f"  │   ⚠️  tag={tag} — native select emas")
+                print(f"  └───────────────────────────────────────────────────")
+                return False
+
+            options = await el.evaluate("""
+            el => Array.from(el.options)
+                .filter(o => !o.disabled)
+                .map(o => ({ value: o.value, label: (o.label || o.text || '').trim() }))
+            """)
+            wanted = str(value or "").strip().lower()
+            chosen = None
+            if wanted:
+                for opt in options:
+                    if wanted in (opt["label"].lower(), opt["value"].lower()):
+                        chosen = opt
+                        break
+                if not chosen:
+                    chosen = next((o for o in options if wanted in o["label"].lower()), None)
+            if not chosen:
+                chosen = next((o for o in options if o["value"] and o["label"]), None)
+            if not chosen:
+                print(f"  │ ❌ Tanlanadigan variant yo'q ({len(options)} ta variant)")
+                print(f"  └───────────────────────────────────────────────────")
+                return False
+
+            await el.select_option(value=chosen["value"], timeout=5000)
+            await self._page.wait_for_timeout(300)
+            print(f"  │ ✅ TANLANDI: '{chosen['label']}' (value={chosen['value']}) → [{strategy}]")
+            print(f"  └───────────────────────────────────────────────────")
+            return True
+        except Exception as ex:
+            print(f"  │ ❌ [{strategy}] xato: {str(ex)[:100]}")
+            print(f"  └───────────────────────────────────────────────────")
+            return False
+
+    async def try_check(
+        self,
+        checked: bool = True,
+        css_selector: str = None,
+        xpath: str = None,
+        label_text: str = None,
+        input_type: str = "checkbox",   # 'checkbox' | 'radio'
+    ) -> bool:
+        """Checkbox/radio ni check yoki uncheck qiladi (radio faqat check qilinadi)."""
+        print(f"\n  ┌─ [PLAYWRIGHT: try_check] ──────────────────────────")
+        print(f"  │ Tur/holat   : {input_type} → {'check' if checked else 'uncheck'}")
+        print(f"  │ label_text  : {label_text}")
+        print(f"  │ css         : {css_selector}")
+        print(f"  │ xpath       : {xpath}")
+
+        # Custom dizaynli checkboxlarda input ko'pincha yashirin bo'ladi
+        el, strategy = await self._locate_field(
+            css_selector=css_selector, xpath=xpath, label_text=label_text,
+            role=input_type, role_name=label_text,
+            require_visible=False,
+        )
+        if el is None:
+            print(f"  │ ❌ {input_type} topilmadi!")
+            print(f"  └───────────────────────────────────────────────────")
+            return False
+
+        try:
+            if checked or input_type == "radio":
+                await el.check(timeout=5000, force=True)
+            else:
+                await el.uncheck(timeout=5000, force=True)
+            await self._page.wait_for_timeout(200)
+            print(f"  │ ✅ {'BELGILANDI' if checked else 'OLIB TASHLANDI'}: [{strategy}]")
+            print(f"  └───────────────────────────────────────────────────")
+            return True
+        except Exception as ex:
+            print(f"  │ ❌ [{strategy}] xato: {str(ex)[:100]}")
+            print(f"  └───────────────────────────────────────────────────")
+            return False
+
+    async def try_upload(
+        self,
+        file_path: str = None,
+        css_selector: str = None,
+        xpath: str = None,
+        label_text: str = None,
+    ) -> bool:
+        """
+        input[type=file] ga set_input_files orqali lokal fixture faylni biriktiradi.
+        file_path berilmasa input ning accept atributiga qarab fixtures/ dan tanlanadi.
+        """
+        print(f"\n  ┌─ [PLAYWRIGHT: try_upload] ─────────────────────────")
+        print(f"  │ label_text  : {label_text}")
+        print(f"  │ css         : {css_selector}")
+        print(f"  │ xpath       : {xpath}")
+
+        el, strategy = await self._locate_field(
+            css_selector=css_selector, xpath=xpath, label_text=label_text,
+            fallback_css="input[type='file']",
+            require_visible=False,
+        )
+        if el is None:
+            print(f"  │ ❌ File input topilmadi!")
+            print(f"  └───────────────────────────────────────────────────")
+            return False
+
+        try:
+            if not file_path:
+                accept = await el.evaluate("el => el.accept || ''")
+                file_path = pick_fixture_file(accept)
+            if not os.path.exists(file_path):
+                print(f"  │ ❌ Fixture fayl yo'q: {file_path}")
+                print(f"  └───────────────────────────────────────────────────")
+                return False
+            await el.set_input_files(file_path, timeout=5000)
+            await self._page.wait_for_timeout(300)
+            print(f"  │ ✅ YUKLANDI: '{os.path.basename(file_path)}' → [{strategy}]")
+            print(f"  └───────────────────────────────────────────────────")
+            return True
+        except Exception as ex:
+            print(f"  │ ❌ [{strategy}] xato: {str(ex)[:100]}")
+            print(f"  └───────────────────────────────────────────────────")
+            return False
+
     # ═══════════════════════════════════════════════════════════
     #  SMART CLICK — button, link, va boshqa bosiladigan elementlar
     # ═══════════════════════════════════════════════════════════
@@ -176,6 +753,7 @@ class BrowserAgent:
         print(f"  │ css         : {css_selector}")
         print(f"  │ xpath       : {xpath}")
 
+        self.last_fingerprint = None
         strategies = []
 
         # 1. get_by_role("button", name=...) — eng ishonchli
@@ -231,6 +809,8 @@ class BrowserAgent:
                     continue
 
                 await el.scroll_into_view_if_needed()
+                # Click dan OLDIN — navigatsiyadan keyin element DOM da qolmaydi
+                await self._remember(el)
                 await el.click(timeout=5000)
                 await self._page.wait_for_timeout(800)
                 print(f"  │ ✅ BOSILDI: [{strategy}] '{loc_str}'")
@@ -241,6 +821,7 @@ class BrowserAgent:
                 print(f"  │ ❌ [{strategy}] '{loc_str}' → XATO: {str(ex)[:120]}")
                 continue
 
+        self.last_fingerprint = None
         print(f"  │ ❌ Hech bir locator ishlamadi! ({len(strategies)} ta strategiya sinaldi)")
         print(f"  └───────────────────────────────────────────────────")
         return False
@@ -280,6 +861,194 @@ class BrowserAgent:
         """)
         return result
 
+    async def dom_snapshot(self) -> list:
+        """
+        Sahifadagi (butun hujjat, faqat viewport emas) ko'rinadigan interaktiv elementlarning
+        yengil "izi". Har element: sig (tag|type|id|name|matn|href), text, in_view va
+        viewportga kesilgan bounding box (in_view=False bo'lsa 0).
+        Click dan keyin ikki snapshot solishtirilib, faqat yangi paydo bo'lgan
+        qism (modal, dropdown) tahlil qilinadi; scroll elementni "yo'qotmaydi".
+        """
+        return await self._page.evaluate("""
+        () => {
+            const out = [];
+            const vw = window.innerWidth, vh = window.innerHeight;
+            const sel = 'a[href], button, input:not([type=hidden]), textarea, select, ' +
+                        '[role=button], [role=menuitem], [role=option], [role=tab], [role=dialog]';
+            document.querySelectorAll(sel).forEach(el => {
+                const r = el.getBoundingClientRect();
+                if (r.width <= 0 || r.height <= 0) return;
+                const st = window.getComputedStyle(el);
+                if (st.visibility === 'hidden' || st.display === 'none') return;
+                const text = (el.innerText || el.value || el.getAttribute('aria-label') || '')
+                    .trim().substring(0, 60);
+                const inView = !(r.bottom < 0 || r.right < 0 || r.top > vh || r.left > vw);
+                out.push({
+                    sig: [el.tagName.toLowerCase(), el.type || '', el.id || '', el.name || '',
+                          text, el.getAttribute('href') || ''].join('|'),
+                    text: text,
+                    in_view: inView,
+                    x: inView ? Math.max(0, r.left) : 0,
+                    y: inView ? Math.max(0, r.top) : 0,
+                    w: inView ? Math.min(r.right, vw) - Math.max(0, r.left) : 0,
+                    h: inView ? Math.min(r.bottom, vh) - Math.max(0, r.top) : 0,
+                });
+            });
+            return out;
+        }
+        """)
+
+    async def extract_page_elements(self) -> dict:
+        """
+        Screenshot va AI siz, to'g'ridan DOM dan checklist formatidagi elementlar,
+        forma maydonlari va linklar (crawler uchun).
+        Returns: {"elements": [...], "form_fields": [...], "submit_selector": str, "links": [...]}
+        """
+        return await self._page.evaluate(r"""
+        () => {
+            const visible = el => {
+                const r = el.getBoundingClientRect();
+                return r.width > 0 && r.height > 0;
+            };
+            const q = v => v.replace(/'/g, "\\'");
+            const textOf = el => (el.innerText || el.value || el.getAttribute('aria-label') || '')
+                .trim().replace(/\s+/g, ' ').substring(0, 80);
+            const labelOf = el => {
+                if (el.id) {
+                    const l = document.querySelector(`label[for='${CSS.escape(el.id)}']`);
+                    if (l) return l.innerText.trim();
+                }
+                const p = el.closest('label');
+                return p ? p.innerText.trim() : (el.getAttribute('aria-label') || '');
+            };
+            const snake = s => s.toLowerCase().replace(/[^\w\u0400-\u04FF]+/g, '_')
+                .replace(/^_+|_+$/g, '').substring(0, 40);
+            const cssOf = el => {
+                const tag = el.tagName.toLowerCase();
+                if (el.id && !/^\d/.test(el.id)) return '#' + CSS.escape(el.id);
+                if (el.name) return `${tag}[name='${q(el.name)}']`;
+                if (el.placeholder) return `${tag}[placeholder='${q(el.placeholder)}']`;
+                const t = textOf(el);
+                if (t && ['a', 'button'].includes(tag)) return `${tag}:has-text('${q(t)}')`;
+                return '';
+            };
+            const xpathOf = el => {
+                const tag = el.tagName.toLowerCase();
+                if (el.id) return `//${tag}[@id='${el.id}']`;
+                if (el.name) return `//${tag}[@name='${el.name}']`;
+                const t = textOf(el);
+                if (t && !t.includes("'")) return `//${tag}[normalize-space()='${t}']`;
+                return '';
+            };
+            const typeOf = el => {
+                const tag = el.tagName.toLowerCase();
+                if (tag === 'a') return 'link';
+                if (tag === 'button' || el.getAttribute('role') === 'button') return 'button';
+                if (tag === 'select' || tag === 'textarea') return tag;
+                const t = (el.type || 'text').toLowerCase();
+                if (['submit', 'button', 'reset'].includes(t)) return 'button';
+                if (['checkbox', 'radio', 'file'].includes(t)) return t;
+                return 'input';
+            };
+
+            const elements = [], formFields = [], links = [];
+            const seen = new Set();
+            const sel = 'a[href], button, input:not([type=hidden]), textarea, select, [role=button], [role=menuitem]';
+            document.querySelectorAll(sel).forEach(el => {
+                if (!visible(el)) return;
+                const type = typeOf(el);
+                const text = textOf(el);
+                const label = labelOf(el);
+                const css = cssOf(el);
+                const xpath = xpathOf(el);
+                if (!css && !xpath) return;
+                const name = snake(label || text || el.placeholder || el.name || el.id || type);
+                const key = name + '|' + css;
+                if (!name || seen.has(key)) return;
+                seen.add(key);
+                elements.push({
+                    name, type, visible_text: text || el.placeholder || '',
+                    label_text: label, css_selector: css, xpath,
+                });
+                if (['input', 'select', 'textarea', 'checkbox', 'radio', 'file'].includes(type)
+                        && el.closest('form, [role=dialog], .modal')) {
+                    formFields.push({
+                        field_id: formFields.length + 1,
+                        name,
+                        label: label || el.placeholder || el.name || '',
+                        type: type === 'input' ? (el.type || 'text') : type,
+                        placeholder: el.placeholder || null,
+                        required: !!el.required,
+                        css_selector: css,
+                        xpath,
+                        options: type === 'select'
+                            ? Array.from(el.options).filter(o => o.value && !o.disabled)
+                                .map(o => (o.label || o.text || '').trim()).slice(0, 30)
+                            : [],
+                    });
+                }
+            });
+
+            const submit = document.querySelector(
+                'form button[type=submit], form input[type=submit], form button:not([type])');
+            document.querySelectorAll('a[href]').forEach(a => {
+                if (!visible(a)) return;
+                links.push({
+                    href: a.href,
+                    text: textOf(a),
+                    nav: !!a.closest('nav, header, aside, [role=navigation], [role=menu]'),
+                });
+            });
+            return {
+                elements,
+                form_fields: formFields,
+                submit_selector: submit ? cssOf(submit) : '',
+                links,
+            };
+        }
+        """)
+
+    async def dom_digest(self, max_elements: int = 120, max_text: int = 1500) -> str:
+        """
+        Sahifaning matnli modelga yuboriladigan ixcham tavsifi:
+        sarlavha, headinglar, alert/toast matnlari, interaktiv elementlar (css/xpath bilan)
+        va ko'rinadigan matnning boshi. Screenshotdan bir necha barobar kam token.
+        """
+        try:
+            extracted = await self.extract_page_elements()
+            meta = await self._page.evaluate("""
+            () => {
+                const pick = sel => Array.from(document.querySelectorAll(sel))
+                    .filter(el => el.offsetParent !== null)
+                    .map(el => (el.innerText || '').trim().replace(/\\s+/g, ' ').substring(0, 120))
+                    .filter(Boolean);
+                return {
+                    title: document.title,
+                    headings: pick('h1, h2, h3').slice(0, 15),
+                    alerts: pick('[role=alert], [role=status], .alert, .toast, .notification, .error, .invalid-feedback').slice(0, 10),
+                    text: (document.body ? document.body.innerText : '').replace(/\\s+/g, ' ').trim(),
+                };
+            }
+            """)
+        except Exception as ex:
+            print(f"  [⚠️  DOM] digest olinmadi: {str(ex)[:80]}")
+            return ""
+
+        lines = [f"TITLE: {meta['title']}"]
+        if meta["headings"]:
+            lines.append("HEADINGS: " + " | ".join(meta["headings"]))
+        if meta["alerts"]:
+            lines.append("ALERTS: " + " | ".join(meta["alerts"]))
+        lines.append("ELEMENTS:")
+        for i, el in enumerate(extracted["elements"][:max_elements]):
+            lines.append(
+                f"[{i}] {el['type']} \"{el['visible_text'][:60]}\""
+                + (f" label=\"{el['label_text'][:40]}\"" if el.get("label_text") else "")
+                + f" css={el['css_selector']} xpath={el['xpath']}"
+            )
+        lines.append("TEXT: " + meta["text"][:max_text])
+        return "\n".join(lines)
+
     async def get_all_buttons(self) -> list:
         """
         Sahifadagi barcha ko'rinadigan button va submit inputlarni qaytaradi.
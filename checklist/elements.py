@@ -0,0 +1,58 @@
+"""
+Checklist elementining ixcham ko'rinishi.
+
+Gemini har sahifa uchun o'nlab elementlarni dict sifatida qaytaradi; sessiya davomida
+ular PageState.checklist da turadi. ChecklistElement __slots__ bilan ~3 barobar kam
+xotira oladi va Mapping interfeysini saqlaydi — el.get("css_selector"), el["name"],
+{**el, "source": ...} kabi mavjud kod o'zgarishsiz ishlaydi.
+"""
+from collections.abc import Mapping
+
+
+class ChecklistElement(Mapping):
+    FIELDS = ("name", "type", "visible_text", "css_selector", "xpath", "location")
+    __slots__ = FIELDS + ("_extra",)
+
+    def __init__(self, name: str = "", type: str = "", visible_text: str = "",
+                 css_selector: str = "", xpath: str = "", location: str = "", **extra):
+        self.name = name or ""
+        self.type = type or ""
+        self.visible_text = visible_text or ""
+        self.css_selector = css_selector or ""
+        self.xpath = xpath or ""
+        self.location = location or ""
+        # Kam uchraydigan qo'shimcha maydonlar (source, role, ...) — faqat bo'lsa dict
+        self._extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data) -> "ChecklistElement":
+        if isinstance(data, cls):
+            return data
+        return cls(**{str(k): v for k, v in dict(data).items()})
+
+    def __getitem__(self, key):
+        if key in ChecklistElement.FIELDS:
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from ChecklistElement.FIELDS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return len(ChecklistElement.FIELDS) + (len(self._extra) if self._extra else 0)
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __repr__(self):
+        return (f"ChecklistElement({self.type}:{self.name!r} text={self.visible_text!r} "
+                f"css={self.css_selector!r})")
+
+
+def compact_checklist(elements: list) -> list:
+    """AI javobidagi dict lar ro'yxatini ChecklistElement larga aylantiradi."""
+    return [ChecklistElement.from_dict(e) for e in elements or [] if isinstance(e, Mapping)]
@@ -0,0 +1,77 @@
+"""
+Test rejasidagi qadamlar bog'liqligi (depends_on) va mustaqil tarmoqlar.
+
+parse_user_prompt har qadamga depends_on — oldin tugashi kerak bo'lgan step_id lar
+ro'yxatini qo'yadi. Masalan login dan keyingi bir nechta ro'yxat sahifasini tekshirish:
+
+    1 navigate            depends_on=[]
+    2 login               depends_on=[1]
+    3 Tovarlar → verify   depends_on=[2]      ← tarmoq A
+    4 Mijozlar → verify   depends_on=[2]      ← tarmoq B (3 ni kutmaydi)
+
+build_branches() rejani ketma-ket zanjirlarga (tarmoqlarga) ajratadi: har tarmoq
+bitta tabda bajariladi, yangi tarmoq fork_from qadami tugagan sahifadan boshlanadi.
+"""
+from typing import List
+
+
+def normalize_dependencies(steps: list) -> list:
+    """
+    depends_on ni tozalaydi: faqat rejada OLDINROQ kelgan step_id lar qoladi.
+    depends_on umuman berilmagan qadam oldingi qadamga bog'liq deb olinadi
+    (eski, to'liq ketma-ket rejalar o'zgarishsiz ishlaydi).
+    """
+    seen = []
+    for step in steps:
+        deps = step.get("depends_on")
+        if deps is None:
+            deps = seen[-1:]
+        step["depends_on"] = sorted({d for d in deps if d in seen})
+        seen.append(step["step_id"])
+    return steps
+
+
+def build_branches(steps: list) -> List[dict]:
+    """
+    Returns: [{"steps": [...], "fork_from": step_id | None}, ...] — reja tartibida.
+    Qadam eng so'nggi bog'liqligi (max(depends_on)) tugagan tarmoqni davom ettiradi;
+    o'sha tarmoqni boshqa qadam allaqachon davom ettirgan bo'lsa — yangi tarmoq ochiladi.
+    """
+    branches = []
+    tails = {}   # step_id → shu qadam bilan tugayotgan tarmoq indeksi
+    for step in normalize_dependencies(steps):
+        deps = step["depends_on"]
+        primary = max(deps) if deps else None
+        if primary is not None and primary in tails:
+            index = tails.pop(primary)
+        else:
+            branches.append({"steps": [], "fork_from": primary})
+            index = len(branches) - 1
+        branches[index]["steps"].append(step)
+        tails[step["step_id"]] = index
+    return branches
+
+
+def is_sequential(branches: list) -> bool:
+    return len(branches) <= 1
+
+
+def group_verify_runs(steps: list) -> List[list]:
+    """
+    Qadamlarni bajarish birliklariga ajratadi: ketma-ket kelgan verify qadamlari bitta
+    guruhga (sahifa ular orasida o'zgarmaydi — bitta ko'p bandli model chaqiruvi),
+    qolgan har qadam alohida. Guruhdagi keyingi verify faqat shu guruhdagi oldingi
+    qadamlarga bog'liq bo'lishi kerak — aks holda u boshqa tarmoqni kutadi va yangi guruh boshlanadi.
+    Returns: [[step], [verify, verify, ...], ...] — reja tartibida
+    """
+    units = []
+    for step in steps:
+        last = units[-1] if units else None
+        if (step.get("action_type") == "verify" and last
+                and last[0].get("action_type") == "verify"
+                and step.get("depends_on")
+                and set(step["depends_on"]) <= {s["step_id"] for s in last}):
+            last.append(step)
+        else:
+            units.append([step])
+    return units
@@ -0,0 +1,218 @@
+"""
+Sayt crawler — element xotirasini (page_elements, form_knowledge) testdan OLDIN to'ldiradi.
+Ishlatish: python main.py crawl <url> [--depth 2] [--concurrency 4] [--max-pages 50] [--no-model]
+
+- Saqlangan login sessiyasi (memory/session_store) bilan boshlanadi
+- Navbar linklari birinchi, keyin qolganlari — BFS, --depth gacha
+- Elementlar DOM dan olinadi; AI (screenshot tahlili) faqat DB da hali yo'q sahifalarga
+- Natijalar har BFS qatlamidan keyin DB ga bitta tranzaksiyada yoziladi
+"""
+import asyncio
+import sys
+from urllib.parse import urlparse, urldefrag
+
+from memory.db import (
+    init_db, get_page_elements, save_page_elements_bulk,
+    get_form_knowledge, save_form_knowledge, get_network_rules
+)
+from memory.session_store import load_session_state
+from ai.gemini_agent import analyze_page, get_token_summary
+from browser.playwright_agent import BrowserAgent
+from browser.network import NetworkPolicy
+from utils import metrics
+from utils.common import get_base_url, get_form_key, print_token_summary
+
+# Bosilmaydigan linklar (sessiyani yopadi yoki fayl yuklaydi)
+SKIP_LINK_KW = ["logout", "signout", "sign-out", "log-out", "chiqish", "выход", "exit"]
+SKIP_EXTENSIONS = (".pdf", ".zip", ".xls", ".xlsx", ".doc", ".docx", ".csv", ".png", ".jpg", ".jpeg")
+
+
+def _normalize(url: str) -> str:
+    return urldefrag(url)[0].rstrip("/")
+
+
+def _crawlable(href: str, host: str) -> bool:
+    p = urlparse(href)
+    if p.scheme not in ("http", "https") or p.netloc != host:
+        return False
+    low = href.lower()
+    if any(kw in low for kw in SKIP_LINK_KW):
+        return False
+    return not p.path.lower().endswith(SKIP_EXTENSIONS)
+
+
+def _merge_elements(model_elements: list, dom_elements: list) -> list:
+    """AI nomlagan elementlar ustuvor, DOM dagilari qolganini to'ldiradi."""
+    merged, seen = [], set()
+    for el in model_elements + dom_elements:
+        name = el.get("name")
+        if not name or name in seen or not (el.get("css_selector") or el.get("xpath")):
+            continue
+        seen.add(name)
+        merged.append(el)
+    return merged
+
+
+async def _visit(tab: BrowserAgent, url: str, use_model: bool) -> dict:
+    await tab.navigate(url)
+    final_url = await tab.current_url()
+    extracted = await tab.extract_page_elements()
+    elements = extracted["elements"]
+
+    model_used = False
+    if use_model and not get_page_elements(final_url):
+        # Yangi sahifa — AI nomlari va turlari bilan boyitamiz
+        screenshot = await tab.screenshot()
+        analysis = await asyncio.to_thread(
+            analyze_page, screenshot, "Sahifadagi barcha interaktiv elementlarni toping", final_url
+        )
+        elements = _merge_elements(analysis.get("found_elements", []), elements)
+        model_used = True
+
+    return {
+        "url": final_url,
+        "elements": elements,
+        "form_fields": extracted["form_fields"],
+        "submit_selector": extracted["submit_selector"],
+        # Navbar linklari oldinda
+        "links": [l["href"] for l in sorted(extracted["links"], key=lambda l: not l["nav"])],
+        "model_used": model_used,
+    }
+
+
+def _persist_level(base_url: str, pages: list) -> int:
+    rows = []
+    for page in pages:
+        for el in page["elements"]:
+            rows.append({
+                "site_url": base_url,
+                "page_url": page["url"],
+                "element_name": el["name"],
+                "element_type": el.get("type", ""),
+                "css_selector": el.get("css_selector", ""),
+                "xpath": el.get("xpath", ""),
+                "visible_text": el.get("visible_text", ""),
+                "label_text": el.get("label_text", ""),
+            })
+        if len(page["form_fields"]) >= 2:
+            form_key = get_form_key(page["url"])
+            if not get_form_knowledge(base_url, form_key):
+                save_form_knowledge(base_url, form_key, page["url"],
+                                    page["form_fields"], page["submit_selector"])
+    save_page_elements_bulk(rows)
+    return len(rows)
+
+
+async def crawl_site(start_url: str, max_depth: int = 2, concurrency: int = 4,
+                     max_pages: int = 50,
+                     use_model: bool = True, headless: bool = True) -> dict:
+    """
+    start_url dan BFS (faqat shu host). concurrency — tablar soni (pool), ya'ni saytga
+    bir vaqtda nechta so'rov. Returns: statistika dict.
+    """
+    init_db()
+    base_url = get_base_url(start_url)
+    host = urlparse(start_url).netloc
+
+    session = load_session_state(base_url)
+    if not session:
+        print(f"  [⚠️ ] {base_url} uchun saqlangan sessiya yo'q — login talab qiladigan "
+              f"sahifalar ko'rinmaydi. Avval login testini ishga tushiring.")
+
+    browser = BrowserAgent(
+        headless=headless,
+        network_policy=NetworkPolicy(blocked_patterns=get_network_rules(base_url)),
+    )
+    await browser.start(storage_state=session)
+
+    pool = asyncio.Queue()
+    for _ in range(max(concurrency, 1)):
+        pool.put_nowait(await browser.new_tab())
+    metrics.pool_slots.inc(pool.qsize(), pool="crawler")
+
+    async def visit(url: str):
+        tab = await pool.get()
+        metrics.pool_busy.inc(pool="crawler")
+        try:
+            return await _visit(tab, url, use_model)
+        except Exception as ex:
+            print(f"  [❌] {url}: {str(ex)[:100]}")
+            return None
+        finally:
+            metrics.pool_busy.dec(pool="crawler")
+            pool.put_nowait(tab)
+
+    stats = {"pages": 0, "elements": 0, "model_calls": 0}
+    seen = {_normalize(start_url)}
+    level = [start_url]
+    try:
+        for depth in range(max_depth + 1):
+            if not level or stats["pages"] >= max_pages:
+                break
+            level = level[:max_pages - stats["pages"]]
+            print(f"\n  [🕸️  Crawl] Chuqurlik {depth}: {len(level)} ta sahifa")
+            pages = [p for p in await asyncio.gather(*(visit(u) for u in level)) if p]
+
+            stats["pages"] += len(pages)
+            stats["model_calls"] += sum(1 for p in pages if p["model_used"])
+            stats["elements"] += _persist_level(base_url, pages)
+            for p in pages:
+                print(f"    📄 {p['url']} → {len(p['elements'])} element"
+                      f"{' (+AI)' if p['model_used'] else ''}")
+
+            next_level = []
+            for p in pages:
+                seen.add(_normalize(p["url"]))
+                for href in p["links"]:
+                    norm = _normalize(href)
+                    if norm not in seen and _crawlable(href, host):
+                        seen.add(norm)
+                        next_level.append(href)
+            level = next_level
+    finally:
+        metrics.pool_slots.dec(pool.qsize(), pool="crawler")
+        while not pool.empty():
+            await pool.get_nowait().stop()
+        await browser.stop()
+
+    print(f"\n  [✅ Crawl] {stats['pages']} sahifa, {stats['elements']} element, "
+          f"{stats['model_calls']} AI chaqiruv")
+    print_token_summary(get_token_summary())
+    return stats
+
+
+def main(argv: list = None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv:
+        print("Ishlatish: python main.py crawl <url> [--depth N] [--concurrency N] "
+              "[--max-pages N] [--no-model] [--show]")
+        return
+
+    options = {"max_depth": 2, "concurrency": 4, "max_pages": 50,
+               "use_model": True, "headless": True}
+    url = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--depth":
+            options["max_depth"] = int(argv[i + 1]); i += 1
+        elif arg == "--concurrency":
+            options["concurrency"] = int(argv[i + 1]); i += 1
+        elif arg == "--max-pages":
+            options["max_pages"] = int(argv[i + 1]); i += 1
+        elif arg == "--no-model":
+            options["use_model"] = False
+        elif arg == "--show":
+            options["headless"] = False
+        else:
+            url = arg
+        i += 1
+
+    if not url:
+        print("  URL berilmadi.")
+        return
+    asyncio.run(crawl_site(url, **options))
+
+
+if __name__ == "__main__":
+    main()
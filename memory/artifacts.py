@@ -0,0 +1,123 @@
+"""
+Kontent bo'yicha manzillanadigan artefakt ombori (screenshotlar va h.k.).
+
+    memory/artifacts/<hash[:2]>/<sha256>.<ext>
+
+- Bir xil kontent bir marta yoziladi (dedup) — qayta put() faqat mtime ni yangilaydi
+- put() yozishni asyncio.to_thread orqali event loop dan tashqarida bajaradi
+- step_results.artifact_hash shu hash ga ishora qiladi (qadam oxiridagi screenshot)
+- Hajm QA_ARTIFACTS_MAX_MB dan oshsa eng eski (mtime) fayllar o'chiriladi
+"""
+import asyncio
+import hashlib
+import os
+import threading
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(__file__), "artifacts")
+MAX_BYTES = int(float(os.getenv("QA_ARTIFACTS_MAX_MB", "500")) * 1024 * 1024)
+# Har shuncha yangi yozuvdan keyin hajm tekshiriladi
+EVICT_EVERY = 50
+
+_lock = threading.Lock()
+_stats = {"writes": 0, "dedup_hits": 0, "bytes_written": 0, "evicted": 0}
+
+
+def artifact_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def path_for(digest: str, ext: str = "png") -> str:
+    return os.path.join(ARTIFACTS_DIR, digest[:2], f"{digest}.{ext}")
+
+
+def put_bytes(data: bytes, ext: str = "png") -> str:
+    """Kontentni saqlaydi (sinxron). Returns: sha256 hash."""
+    digest = artifact_hash(data)
+    path = path_for(digest, ext)
+    if os.path.exists(path):
+        os.utime(path)   # LRU eviction uchun "yaqinda ishlatilgan"
+        with _lock:
+            _stats["dedup_hits"] += 1
+        return digest
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)   # atomar — yarim yozilgan fayl hech qachon ko'rinmaydi
+
+    with _lock:
+        _stats["writes"] += 1
+        _stats["bytes_written"] += len(data)
+        check = _stats["writes"] % EVICT_EVERY == 0
+    if check:
+        evict()
+    return digest
+
+
+async def put(data: bytes, ext: str = "png") -> str:
+    """put_bytes ning async varianti — hash va disk I/O alohida threadda."""
+    return await asyncio.to_thread(put_bytes, data, ext)
+
+
+def get_bytes(digest: str, ext: str = "png"):
+    """Returns: bytes yoki None (yo'q yoki eviction da o'chirilgan)."""
+    try:
+        with open(path_for(digest, ext), "rb") as f:
+            return f.read()
+    except (FileNotFoundError, TypeError):
+        return None
+
+
+async def get(digest: str, ext: str = "png"):
+    return await asyncio.to_thread(get_bytes, digest, ext)
+
+
+def _scan() -> list:
+    files = []
+    if not os.path.isdir(ARTIFACTS_DIR):
+        return files
+    for root, _, names in os.walk(ARTIFACTS_DIR):
+        for name in names:
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+    return files
+
+
+def evict(max_bytes: int = None) -> dict:
+    """Jami hajm max_bytes dan oshsa eng eski fayllarni o'chiradi."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    files = _scan()
+    total = sum(size for _, size, _ in files)
+    removed = freed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        freed += size
+        removed += 1
+    if removed:
+        with _lock:
+            _stats["evicted"] += removed
+        print(f"  [🗑️  ARTEFAKT] {removed} ta eski fayl o'chirildi ({freed / 1024 / 1024:.1f} MB)")
+    return {"removed": removed, "freed": freed, "total": total}
+
+
+def get_stats(scan: bool = True) -> dict:
+    """scan=False — faqat hisoblagichlar (diskni aylanib chiqmaydi, metrics scrape uchun)."""
+    if not scan:
+        with _lock:
+            return dict(_stats)
+    files = _scan()
+    with _lock:
+        return {**_stats, "files": len(files), "total_bytes": sum(s for _, s, _ in files)}
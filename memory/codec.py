@@ -0,0 +1,50 @@
+"""
+JSON ustunlar (test_runs.steps, step_results.token_info, form_knowledge.fields,
+navigation_paths.steps, ...) uchun ixcham kodlash.
+
+Formatlar:
+    zjson (standart) — b"QZ1" + zlib(ixcham JSON, utf-8)   → BLOB
+    json             — oddiy JSON matn (eski format)         → TEXT
+
+decode() ikkala formatni ham tushunadi, shuning uchun eski va yangi yozuvlar
+bitta bazada aralash tura oladi. Eski bazani to'liq o'tkazish: python -m memory.migrate
+Format QA_DB_ENCODING env orqali tanlanadi.
+"""
+import json
+import os
+import zlib
+
+TAG_ZJSON = b"QZ1"
+ENCODINGS = ("zjson", "json")
+
+ENCODING = os.getenv("QA_DB_ENCODING", "zjson").lower()
+if ENCODING not in ENCODINGS:
+    ENCODING = "zjson"
+
+
+def encode(obj, encoding: str = None):
+    """Python ob'ektni DB ustuni uchun kodlaydi (bytes yoki str)."""
+    encoding = encoding or ENCODING
+    if encoding == "json":
+        return json.dumps(obj, ensure_ascii=False)
+    raw = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return TAG_ZJSON + zlib.compress(raw, 6)
+
+
+def decode(value, default=None):
+    """DB ustunidagi qiymatni (zjson BLOB yoki JSON matn) Python ob'ektga qaytaradi."""
+    if value is None or value == "" or value == b"":
+        return default
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, bytes):
+        if value.startswith(TAG_ZJSON):
+            return json.loads(zlib.decompress(value[len(TAG_ZJSON):]).decode("utf-8"))
+        value = value.decode("utf-8")
+    return json.loads(value)
+
+
+def is_encoded_as(value, encoding: str) -> bool:
+    if encoding == "zjson":
+        return isinstance(value, (bytes, memoryview)) and bytes(value[:len(TAG_ZJSON)]) == TAG_ZJSON
+    return isinstance(value, str)
@@ -1,16 +1,160 @@
 import sqlite3
 import json
 import os
+import copy
+import functools
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from memory import codec
+from utils import metrics
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "qa_memory.db")
 
+# Bir nechta worker jarayoni bitta bazaga yozganda "database is locked" o'rniga kutish (soniya)
+BUSY_TIMEOUT = float(os.getenv("QA_DB_BUSY_TIMEOUT", "30"))
+
 
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+# ─── READ CACHE ───────────────────────────────────────────────
+# Bir run ichida bir xil o'qishlar (resolve_element, find_and_fill) SQLite va
+# json.loads ga qayta bormasligi uchun jarayon ichidagi LRU kesh.
+# Har save_* o'z jadvalining yozuvlarini keshdan o'chiradi.
+
+class _LRUCache:
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, table: str):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == table]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+_cache = _LRUCache(int(os.getenv("QA_DB_CACHE_SIZE", "512")))
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _cached_read(table: str):
+    """O'qish funksiyasi natijasini keshlaydi. Qaytgan qiymat nusxa — uni o'zgartirish keshga ta'sir qilmaydi."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (table, fn.__name__, DB_PATH, _freeze(args), _freeze(kwargs))
+            found, value = _cache.get(key)
+            if not found:
+                value = fn(*args, **kwargs)
+                _cache.put(key, value)
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
+
+
+def _timed_write(fn):
+    """Yozish funksiyasi vaqtini utils.metrics ga yozadi (qa_db_write_duration_seconds)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.observe_db_write(fn.__name__, time.perf_counter() - started)
+    return wrapper
+
+
+def _invalidates(*tables: str):
+    """Yozish funksiyasidan keyin tegishli jadval keshini tozalaydi."""
+    def decorator(fn):
+        timed = _timed_write(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return timed(*args, **kwargs)
+            finally:
+                for table in tables:
+                    _cache.invalidate(table)
+        return wrapper
+    return decorator
+
+
+def use_db(path: str) -> str:
+    """DB_PATH ni almashtiradi (replay snapshoti va h.k.) va o'qish keshini tozalaydi. Returns: oldingi yo'l."""
+    global DB_PATH
+    previous, DB_PATH = DB_PATH, path
+    _cache.clear()
+    return previous
+
+
+def snapshot_db(dest_path: str, src_path: str = None):
+    """Bazaning izchil nusxasi (sqlite backup API — ochiq yozuvlar bo'lsa ham butun holat)."""
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    src = sqlite3.connect(src_path or DB_PATH, timeout=BUSY_TIMEOUT)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def get_cache_stats() -> dict:
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
+
+
 def init_db():
     conn = get_connection()
     cur = conn.cursor()
@@ -36,6 +180,15 @@ def init_db():
             visible_text TEXT,
             label_text TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_confirmed_at TIMESTAMP,
+            -- Jonli DOM fingerprint (muvaffaqiyatli click/fill dan keyin, browser/healing.py)
+            tag TEXT,
+            role TEXT,
+            accessible_name TEXT,
+            attrs TEXT,               -- JSON: id, name, type, placeholder, data-* ...
+            bbox TEXT,                -- JSON: x, y, width, height (sahifa koordinatasi)
+            ancestor_hash TEXT,
+            fingerprint_hash TEXT,
             UNIQUE(page_url, element_name)
         );
 
@@ -96,16 +249,103 @@ def init_db():
             status TEXT,
             token_info TEXT,
             error_message TEXT,
+            artifact_hash TEXT,                -- memory/artifacts dagi qadam screenshoti
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (test_run_id) REFERENCES test_runs(id)
         );
+
+        -- Navigatsiya grafi: sahifalar (tugunlar)
+        CREATE TABLE IF NOT EXISTS nav_nodes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            site_url TEXT NOT NULL,
+            url TEXT NOT NULL UNIQUE,
+            title TEXT,
+            page_type TEXT,
+            visit_count INTEGER DEFAULT 0,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Navigatsiya grafi: click lar (qirralar) — qaysi element qaysi sahifaga olib boradi
+        CREATE TABLE IF NOT EXISTS nav_edges (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            site_url TEXT NOT NULL,
+            from_node INTEGER NOT NULL,
+            to_node INTEGER NOT NULL,
+            element_name TEXT NOT NULL DEFAULT '',
+            css_selector TEXT,
+            xpath TEXT,
+            visible_text TEXT,
+            success_count INTEGER DEFAULT 0,
+            total_latency_ms INTEGER DEFAULT 0,
+            is_link INTEGER DEFAULT 0,
+            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(from_node, to_node, element_name),
+            FOREIGN KEY (from_node) REFERENCES nav_nodes(id),
+            FOREIGN KEY (to_node) REFERENCES nav_nodes(id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_nav_nodes_site ON nav_nodes(site_url);
+        CREATE INDEX IF NOT EXISTS idx_nav_edges_from ON nav_edges(from_node);
+        CREATE INDEX IF NOT EXISTS idx_nav_edges_to ON nav_edges(to_node);
+
+        -- Sayt uchun bloklanadigan tarmoq so'rovlari (URL pattern)
+        CREATE TABLE IF NOT EXISTS network_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            site_url TEXT NOT NULL,
+            pattern TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(site_url, pattern)
+        );
+
+        -- Worker navbati (worker.py): claim_job() lease bilan oladi, muddati o'tgan
+        -- lease (worker o'lgan) boshqa worker tomonidan qayta olinadi
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prompt TEXT NOT NULL,
+            suite TEXT,
+            priority INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'queued',      -- queued / running / passed / failed
+            attempts INTEGER DEFAULT 0,
+            max_attempts INTEGER DEFAULT 2,
+            lease_owner TEXT,
+            lease_expires_at REAL,             -- unix vaqt
+            test_run_id INTEGER,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, priority, id);
+        CREATE INDEX IF NOT EXISTS idx_test_runs_site_created ON test_runs(site_url, created_at);
+        CREATE INDEX IF NOT EXISTS idx_step_results_run ON step_results(test_run_id);
+        CREATE INDEX IF NOT EXISTS idx_page_elements_site ON page_elements(site_url);
     """)
+    # Eski bazalarga keyin qo'shilgan ustunlar
+    _ensure_columns(conn, "page_elements", {
+        "last_confirmed_at": "TIMESTAMP",
+        **{name: "TEXT" for name in FINGERPRINT_COLUMNS},
+    })
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_page_elements_fp ON page_elements(page_url, fingerprint_hash)"
+    )
+    _ensure_columns(conn, "step_results", {"artifact_hash": "TEXT"})
+    # 0 — forma yuborish va h.k. (URL o'zgargan harakat); faqat is_link=1 qirralar marshrutga kiradi
+    _ensure_columns(conn, "nav_edges", {"is_link": "INTEGER DEFAULT 0"})
     conn.commit()
     conn.close()
 
 
+def _ensure_columns(conn, table: str, columns: dict):
+    """Jadvalda yo'q ustunlarni ALTER TABLE bilan qo'shadi (eski qa_memory.db lar uchun)."""
+    existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
 # ─── CREDENTIALS ──────────────────────────────────────────────
 
+@_invalidates("credentials")
 def save_credentials(site_url: str, email: str, password: str):
     conn = get_connection()
     conn.execute("""
@@ -117,6 +357,7 @@ def save_credentials(site_url: str, email: str, password: str):
     conn.close()
 
 
+@_cached_read("credentials")
 def get_credentials(site_url: str) -> dict:
     conn = get_connection()
     row = conn.execute(
@@ -128,36 +369,133 @@ def get_credentials(site_url: str) -> dict:
 
 # ─── PAGE ELEMENTS ────────────────────────────────────────────
 
+FINGERPRINT_COLUMNS = ("tag", "role", "accessible_name", "attrs", "bbox",
+                       "ancestor_hash", "fingerprint_hash")
+
+
+def _fingerprint_values(fingerprint: dict) -> tuple:
+    if not fingerprint:
+        return (None,) * len(FINGERPRINT_COLUMNS)
+    return (
+        fingerprint.get("tag"),
+        fingerprint.get("role"),
+        fingerprint.get("accessible_name"),
+        json.dumps(fingerprint.get("attrs") or {}, ensure_ascii=False),
+        json.dumps(fingerprint.get("bbox")) if fingerprint.get("bbox") else None,
+        fingerprint.get("ancestor_hash"),
+        fingerprint.get("hash"),
+    )
+
+
+def _row_fingerprint(data: dict):
+    """page_elements qatoridagi fingerprint ustunlari → healing.FINGERPRINT_JS shakli (yo'q bo'lsa None)."""
+    if not data.get("fingerprint_hash"):
+        return None
+    return {
+        "tag": data.get("tag"),
+        "role": data.get("role"),
+        "accessible_name": data.get("accessible_name"),
+        "text": data.get("visible_text"),
+        "attrs": json.loads(data["attrs"]) if data.get("attrs") else {},
+        "bbox": json.loads(data["bbox"]) if data.get("bbox") else None,
+        "ancestor_hash": data.get("ancestor_hash"),
+        "hash": data["fingerprint_hash"],
+    }
+
+@_invalidates("page_elements")
 def save_page_element(site_url: str, page_url: str, element_name: str,
                       element_type: str = "", css_selector: str = "",
-                      xpath: str = "", visible_text: str = "", label_text: str = ""):
+                      xpath: str = "", visible_text: str = "", label_text: str = "",
+                      fingerprint: dict = None):
+    """
+    Muvaffaqiyatli ishlatilgan elementni saqlaydi — last_confirmed_at yangilanadi.
+    fingerprint (BrowserAgent.last_fingerprint) berilsa fingerprint ustunlari ham yoziladi;
+    shu sahifada bir xil fingerprint_hash li yozuv boshqa nom bilan bo'lsa — o'sha yangilanadi
+    (bitta haqiqiy element — bitta qator).
+    """
     conn = get_connection()
+    if fingerprint and fingerprint.get("hash"):
+        same = conn.execute(
+            "SELECT element_name FROM page_elements WHERE page_url=? AND fingerprint_hash=? LIMIT 1",
+            (page_url, fingerprint["hash"])
+        ).fetchone()
+        if same:
+            element_name = same["element_name"]
     conn.execute("""
+        INSERT INTO page_elements
+            (site_url, page_url, element_name, element_type, css_selector, xpath, visible_text, label_text,
+             last_confirmed_at, tag, role, accessible_name, attrs, bbox, ancestor_hash, fingerprint_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(page_url, element_name) DO UPDATE SET
+            element_type=excluded.element_type,
+            css_selector=excluded.css_selector,
+            xpath=excluded.xpath,
+            visible_text=excluded.visible_text,
+            label_text=excluded.label_text,
+            last_confirmed_at=CURRENT_TIMESTAMP,
+            tag=COALESCE(excluded.tag, tag),
+            role=COALESCE(excluded.role, role),
+            accessible_name=COALESCE(excluded.accessible_name, accessible_name),
+            attrs=COALESCE(excluded.attrs, attrs),
+            bbox=COALESCE(excluded.bbox, bbox),
+            ancestor_hash=COALESCE(excluded.ancestor_hash, ancestor_hash),
+            fingerprint_hash=COALESCE(excluded.fingerprint_hash, fingerprint_hash)
+    """, (site_url, page_url, element_name, element_type, css_selector, xpath, visible_text, label_text,
+          *_fingerprint_values(fingerprint)))
+    conn.commit()
+    conn.close()
+
+
+@_invalidates("page_elements")
+def save_page_elements_bulk(rows: list):
+    """
+    Ko'p elementni bitta tranzaksiyada saqlaydi (crawler uchun).
+    rows: [{site_url, page_url, element_name, element_type, css_selector, xpath, visible_text, label_text}]
+    Testda tasdiqlangan (last_confirmed_at) yozuvlar o'zgartirilmaydi — ularning selektori
+    va fingerprint i crawler ning DOM dan taxminidan ishonchliroq.
+    """
+    if not rows:
+        return
+    conn = get_connection()
+    conn.executemany("""
         INSERT INTO page_elements
             (site_url, page_url, element_name, element_type, css_selector, xpath, visible_text, label_text)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (:site_url, :page_url, :element_name, :element_type, :css_selector, :xpath,
+                :visible_text, :label_text)
         ON CONFLICT(page_url, element_name) DO UPDATE SET
             element_type=excluded.element_type,
             css_selector=excluded.css_selector,
             xpath=excluded.xpath,
             visible_text=excluded.visible_text,
             label_text=excluded.label_text
-    """, (site_url, page_url, element_name, element_type, css_selector, xpath, visible_text, label_text))
+        WHERE page_elements.last_confirmed_at IS NULL
+    """, [
+        {"element_type": "", "css_selector": "", "xpath": "",
+         "visible_text": "", "label_text": "", **row}
+        for row in rows
+    ])
     conn.commit()
     conn.close()
 
 
+@_cached_read("page_elements")
 def get_page_elements(page_url: str) -> list:
     conn = get_connection()
     rows = conn.execute(
         "SELECT * FROM page_elements WHERE page_url = ?", (page_url,)
     ).fetchall()
     conn.close()
-    return [dict(r) for r in rows]
+    elements = []
+    for r in rows:
+        data = dict(r)
+        data["fingerprint"] = _row_fingerprint(data)
+        elements.append(data)
+    return elements
 
 
 # ─── NAVIGATION PATHS ─────────────────────────────────────────
 
+@_invalidates("navigation_paths")
 def save_navigation_path(site_url: str, action_name: str, steps: list,
                          final_url: str = "", description: str = ""):
     conn = get_connection()
@@ -166,11 +504,12 @@ def save_navigation_path(site_url: str, action_name: str, steps: list,
         VALUES (?, ?, ?, ?, ?)
         ON CONFLICT(site_url, action_name) DO UPDATE SET
             steps=excluded.steps, final_url=excluded.final_url, description=excluded.description
-    """, (site_url, action_name, json.dumps(steps, ensure_ascii=False), final_url, description))
+    """, (site_url, action_name, codec.encode(steps), final_url, description))
     conn.commit()
     conn.close()
 
 
+@_cached_read("navigation_paths")
 def get_navigation_path(site_url: str, action_name: str) -> dict:
     conn = get_connection()
     row = conn.execute(
@@ -180,13 +519,161 @@ def get_navigation_path(site_url: str, action_name: str) -> dict:
     conn.close()
     if row:
         data = dict(row)
-        data["steps"] = json.loads(data["steps"])
+        data["steps"] = codec.decode(data["steps"], [])
         return data
     return None
 
 
+# ─── NAVIGATION GRAPH ─────────────────────────────────────────
+
+def _normalize_nav_url(url: str) -> str:
+    return url.split("#")[0].rstrip("/")
+
+
+def _upsert_nav_node(conn, site_url: str, url: str, title: str = "", page_type: str = "") -> int:
+    conn.execute("""
+        INSERT INTO nav_nodes (site_url, url, title, page_type, visit_count)
+        VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT(url) DO UPDATE SET
+            title=COALESCE(NULLIF(excluded.title, ''), nav_nodes.title),
+            page_type=COALESCE(NULLIF(excluded.page_type, ''), nav_nodes.page_type),
+            visit_count=nav_nodes.visit_count + 1,
+            last_seen=CURRENT_TIMESTAMP
+    """, (site_url, url, title, page_type))
+    return conn.execute("SELECT id FROM nav_nodes WHERE url=?", (url,)).fetchone()["id"]
+
+
+@_timed_write
+def record_nav_edge(site_url: str, url_before: str, url_after: str, element: dict,
+                    latency_ms: int = 0, title: str = "", page_type: str = "",
+                    is_link: bool = False):
+    """
+    Muvaffaqiyatli click ni grafga yozadi: url_before --element--> url_after.
+    title/page_type — yangi (url_after) sahifaning tahlil natijasi.
+    is_link — oddiy GET havola (<a href>); forma yuborish/saqlash kabi harakatlar False —
+    ular grafda qoladi, lekin find_nav_target/find_shortest_path ularni ishlatmaydi.
+    """
+    url_before = _normalize_nav_url(url_before)
+    url_after = _normalize_nav_url(url_after)
+    if url_before == url_after:
+        return
+    conn = get_connection()
+    from_id = _upsert_nav_node(conn, site_url, url_before)
+    to_id = _upsert_nav_node(conn, site_url, url_after, title, page_type)
+    conn.execute("""
+        INSERT INTO nav_edges
+            (site_url, from_node, to_node, element_name, css_selector, xpath, visible_text,
+             success_count, total_latency_ms, is_link)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+        ON CONFLICT(from_node, to_node, element_name) DO UPDATE SET
+            css_selector=excluded.css_selector,
+            xpath=excluded.xpath,
+            visible_text=excluded.visible_text,
+            is_link=excluded.is_link,
+            success_count=nav_edges.success_count + 1,
+            total_latency_ms=nav_edges.total_latency_ms + excluded.total_latency_ms,
+            last_used=CURRENT_TIMESTAMP
+    """, (site_url, from_id, to_id, element.get("name", ""), element.get("css_selector", ""),
+          element.get("xpath", ""), element.get("visible_text", ""), int(latency_ms),
+          1 if is_link else 0))
+    conn.commit()
+    conn.close()
+
+
+def find_nav_target(site_url: str, keywords: list):
+    """
+    Kalit so'zlar bo'yicha ilgari ko'rilgan sahifani topadi.
+    Faqat ishonchli moslik: biror kalit so'z shu sahifaga olib boruvchi link matniga
+    TO'LIQ teng, yoki sahifa sarlavhasida barcha kalit so'zlar bor.
+    Faqat havola (is_link=1) orqali kirilgan sahifalar — forma yuborishdan keyingi
+    sahifa ("Saqlash" → /items/5) nishon bo'lmaydi.
+    Returns: {"id", "url", "title", ...} yoki None
+    """
+    kws = [k.lower() for k in keywords if k]
+    if not kws:
+        return None
+    conn = get_connection()
+    rows = conn.execute("""
+        SELECT n.id, n.url, n.title, n.page_type, e.visible_text, e.success_count
+        FROM nav_nodes n JOIN nav_edges e ON e.to_node = n.id AND e.is_link = 1
+        WHERE n.site_url = ?
+    """, (site_url,)).fetchall()
+    conn.close()
+
+    best, best_score = None, 0
+    for r in rows:
+        text = (r["visible_text"] or "").lower().strip()
+        title = (r["title"] or "").lower()
+        score = 0
+        if text and text in kws:
+            score = 2 + (r["success_count"] or 0)
+        elif title and all(k in title for k in kws):
+            score = 1
+        if score > best_score:
+            best, best_score = r, score
+    return dict(best) if best else None
+
+
+def find_shortest_path(site_url: str, from_url: str, to_url: str, max_hops: int = 6):
+    """
+    Ikki sahifa orasidagi eng kam click li yo'l (BFS, idx_nav_edges_from orqali) —
+    faqat havola (is_link=1) qirralari bo'yicha.
+    Teng uzunlikdagi yo'llardan ko'p muvaffaqiyatli va tezroq qirralar afzal.
+    Returns: qirralar ro'yxati [{url_before, url_after, element_name, css_selector, ...}],
+             bo'sh ro'yxat — allaqachon shu sahifada, None — yo'l yo'q.
+    """
+    from_url = _normalize_nav_url(from_url)
+    to_url = _normalize_nav_url(to_url)
+    if from_url == to_url:
+        return []
+    conn = get_connection()
+    try:
+        start = conn.execute(
+            "SELECT id FROM nav_nodes WHERE url=? AND site_url=?", (from_url, site_url)
+        ).fetchone()
+        goal = conn.execute(
+            "SELECT id FROM nav_nodes WHERE url=? AND site_url=?", (to_url, site_url)
+        ).fetchone()
+        if not start or not goal:
+            return None
+
+        parent = {start["id"]: None}
+        frontier = [start["id"]]
+        for _ in range(max_hops):
+            next_frontier = []
+            for node in frontier:
+                edges = conn.execute("""
+                    SELECT e.*, f.url AS url_before, t.url AS url_after
+                    FROM nav_edges e
+                    JOIN nav_nodes f ON f.id = e.from_node
+                    JOIN nav_nodes t ON t.id = e.to_node
+                    WHERE e.from_node = ? AND e.success_count > 0 AND e.is_link = 1
+                    ORDER BY e.success_count DESC,
+                             e.total_latency_ms * 1.0 / e.success_count ASC
+                """, (node,)).fetchall()
+                for e in edges:
+                    if e["to_node"] in parent:
+                        continue
+                    parent[e["to_node"]] = dict(e)
+                    if e["to_node"] == goal["id"]:
+                        path = []
+                        cur = goal["id"]
+                        while parent[cur] is not None:
+                            path.append(parent[cur])
+                            cur = parent[cur]["from_node"]
+                        return list(reversed(path))
+                    next_frontier.append(e["to_node"])
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return None
+    finally:
+        conn.close()
+
+
 # ─── FORM KNOWLEDGE ───────────────────────────────────────────
 
+@_invalidates("form_knowledge")
 def save_form_knowledge(site_url: str, form_name: str, form_url: str,
                         fields: list, submit_selector: str = ""):
     conn = get_connection()
@@ -195,11 +682,12 @@ def save_form_knowledge(site_url: str, form_name: str, form_url: str,
         VALUES (?, ?, ?, ?, ?)
         ON CONFLICT(site_url, form_name) DO UPDATE SET
             form_url=excluded.form_url, fields=excluded.fields, submit_selector=excluded.submit_selector
-    """, (site_url, form_name, form_url, json.dumps(fields, ensure_ascii=False), submit_selector))
+    """, (site_url, form_name, form_url, codec.encode(fields), submit_selector))
     conn.commit()
     conn.close()
 
 
+@_cached_read("form_knowledge")
 def get_form_knowledge(site_url: str, form_name: str) -> dict:
     conn = get_connection()
     row = conn.execute(
@@ -209,13 +697,14 @@ def get_form_knowledge(site_url: str, form_name: str) -> dict:
     conn.close()
     if row:
         data = dict(row)
-        data["fields"] = json.loads(data["fields"])
+        data["fields"] = codec.decode(data["fields"], [])
         return data
     return None
 
 
 # ─── TEST RUNS ────────────────────────────────────────────────
 
+@_timed_write
 def save_test_run(test_name: str, site_url: str, prompt: str, status: str,
                   steps: list, token_summary: dict) -> int:
     conn = get_connection()
@@ -223,29 +712,221 @@ def save_test_run(test_name: str, site_url: str, prompt: str, status: str,
         INSERT INTO test_runs (test_name, site_url, prompt, status, steps, token_summary)
         VALUES (?, ?, ?, ?, ?, ?)
     """, (test_name, site_url, prompt, status,
-          json.dumps(steps, ensure_ascii=False),
-          json.dumps(token_summary, ensure_ascii=False)))
+          codec.encode(steps),
+          codec.encode(token_summary)))
     run_id = cur.lastrowid
     conn.commit()
     conn.close()
     return run_id
 
 
+@_timed_write
 def save_step_result(test_run_id: int, step_id: int, description: str,
-                     action_type: str, status: str, token_info: dict, error_message: str = ""):
+                     action_type: str, status: str, token_info: dict, error_message: str = "",
+                     artifact_hash: str = None):
     conn = get_connection()
     conn.execute("""
         INSERT INTO step_results
-            (test_run_id, step_id, description, action_type, status, token_info, error_message)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+            (test_run_id, step_id, description, action_type, status, token_info, error_message,
+             artifact_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     """, (test_run_id, step_id, description, action_type, status,
-          json.dumps(token_info, ensure_ascii=False), error_message))
+          codec.encode(token_info), error_message, artifact_hash))
     conn.commit()
     conn.close()
 
 
+# ─── NETWORK RULES ────────────────────────────────────────────
+
+@_invalidates("network_rules")
+def save_network_rule(site_url: str, pattern: str):
+    """Sayt uchun bloklanadigan URL pattern qo'shadi ('*' — glob, aks holda substring)."""
+    conn = get_connection()
+    conn.execute("""
+        INSERT INTO network_rules (site_url, pattern) VALUES (?, ?)
+        ON CONFLICT(site_url, pattern) DO NOTHING
+    """, (site_url, pattern))
+    conn.commit()
+    conn.close()
+
+
+@_cached_read("network_rules")
+def get_network_rules(site_url: str) -> list:
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT pattern FROM network_rules WHERE site_url=?", (site_url,)
+    ).fetchall()
+    conn.close()
+    return [r["pattern"] for r in rows]
+
+
+@_timed_write
+def finish_test_run(test_run_id: int, status: str, steps: list, token_summary: dict):
+    """Run oxirida yakuniy holat, qadamlar va token hisobotini yozadi."""
+    conn = get_connection()
+    conn.execute(
+        "UPDATE test_runs SET status=?, steps=?, token_summary=? WHERE id=?",
+        (status, codec.encode(steps), codec.encode(token_summary), test_run_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_test_run(test_run_id: int, decode: bool = True) -> dict:
+    """
+    Bitta test run. decode=False bo'lsa steps/token_summary xom (kodlangan) holda qoladi —
+    ro'yxatlar uchun, faqat kerak bo'lganda decode_run_column() bilan ochiladi.
+    """
+    conn = get_connection()
+    row = conn.execute("SELECT * FROM test_runs WHERE id=?", (test_run_id,)).fetchone()
+    conn.close()
+    if not row:
+        return None
+    data = dict(row)
+    if decode:
+        data["steps"] = codec.decode(data["steps"], [])
+        data["token_summary"] = codec.decode(data["token_summary"], {})
+    return data
+
+
+def get_step_results(test_run_id: int, decode: bool = True) -> list:
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT * FROM step_results WHERE test_run_id=? ORDER BY step_id", (test_run_id,)
+    ).fetchall()
+    conn.close()
+    results = [dict(r) for r in rows]
+    if decode:
+        for r in results:
+            r["token_info"] = codec.decode(r["token_info"], {})
+    return results
+
+
+def decode_run_column(value, default=None):
+    """Xom (decode=False) o'qilgan JSON ustunni ochadi."""
+    return codec.decode(value, default)
+
+
+# ─── JOB QUEUE ────────────────────────────────────────────────
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@_timed_write
+def enqueue_job(prompt: str, suite: str = None, priority: int = 0, max_attempts: int = 2) -> int:
+    conn = get_connection()
+    cur = conn.execute(
+        "INSERT INTO jobs (prompt, suite, priority, max_attempts) VALUES (?, ?, ?, ?)",
+        (prompt, suite, priority, max_attempts)
+    )
+    conn.commit()
+    job_id = cur.lastrowid
+    conn.close()
+    return job_id
+
+
+@_timed_write
+def claim_job(worker_id: str, lease_seconds: int = 600):
+    """
+    Navbatdan bitta ishni atomar oladi (BEGIN IMMEDIATE — yozish qulfi darhol olinadi,
+    ikki worker bitta ishni ololmaydi). Muddati o'tgan lease lar ham qayta olinadi;
+    max_attempts ga yetganlari 'failed' qilinadi.
+    Returns: job dict yoki None (navbat bo'sh)
+    """
+    now = time.time()
+    conn = get_connection()
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""
+            UPDATE jobs SET status='failed', error='lease muddati tugadi (urinishlar tugadi)',
+                            lease_owner=NULL, finished_at=CURRENT_TIMESTAMP
+            WHERE status='running' AND lease_expires_at < ? AND attempts >= max_attempts
+        """, (now,))
+        row = conn.execute("""
+            SELECT * FROM jobs
+            WHERE status='queued' OR (status='running' AND lease_expires_at < ?)
+            ORDER BY priority DESC, id
+            LIMIT 1
+        """, (now,)).fetchone()
+        if not row:
+            conn.execute("COMMIT")
+            return None
+        conn.execute("""
+            UPDATE jobs SET status='running', attempts=attempts+1, lease_owner=?,
+                            lease_expires_at=?, started_at=CURRENT_TIMESTAMP
+            WHERE id=?
+        """, (worker_id, now + lease_seconds, row["id"]))
+        conn.execute("COMMIT")
+        job = dict(row)
+        job.update(status="running", attempts=row["attempts"] + 1, lease_owner=worker_id)
+        return job
+    except Exception:
+        # BEGIN IMMEDIATE ning o'zi "database is locked" bilan yiqilsa tranzaksiya yo'q —
+        # ROLLBACK asl xatoni "no transaction is active" bilan yashirmasligi kerak
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+@_timed_write
+def renew_lease(job_id: int, worker_id: str, lease_seconds: int = 600) -> bool:
+    """Lease ni uzaytiradi. False — ish boshqa workerga o'tib ketgan (lease yo'qotilgan)."""
+    conn = get_connection()
+    cur = conn.execute(
+        "UPDATE jobs SET lease_expires_at=? WHERE id=? AND lease_owner=? AND status='running'",
+        (time.time() + lease_seconds, job_id, worker_id)
+    )
+    conn.commit()
+    conn.close()
+    return cur.rowcount == 1
+
+
+@_timed_write
+def complete_job(job_id: int, worker_id: str, status: str, test_run_id: int = None,
+                 error: str = None, retry: bool = False) -> bool:
+    """
+    Ishni yakunlaydi. retry=True va urinishlar qolgan bo'lsa — navbatga qaytariladi.
+    Faqat lease egasi yakunlay oladi (kech qolgan worker boshqaning natijasini yozmaydi).
+    """
+    conn = get_connection()
+    if retry:
+        cur = conn.execute("""
+            UPDATE jobs SET status=CASE WHEN attempts < max_attempts THEN 'queued' ELSE ? END,
+                            test_run_id=?, error=?, lease_owner=NULL, lease_expires_at=NULL,
+                            finished_at=CASE WHEN attempts < max_attempts THEN NULL
+                                             ELSE CURRENT_TIMESTAMP END
+            WHERE id=? AND lease_owner=?
+        """, (status, test_run_id, error, job_id, worker_id))
+    else:
+        cur = conn.execute("""
+            UPDATE jobs SET status=?, test_run_id=?, error=?, lease_owner=NULL,
+                            lease_expires_at=NULL, finished_at=CURRENT_TIMESTAMP
+            WHERE id=? AND lease_owner=?
+        """, (status, test_run_id, error, job_id, worker_id))
+    conn.commit()
+    conn.close()
+    return cur.rowcount == 1
+
+
+def get_job_stats(suite: str = None) -> dict:
+    conn = get_connection()
+    sql = "SELECT status, COUNT(*) AS c FROM jobs"
+    params = ()
+    if suite:
+        sql += " WHERE suite=?"
+        params = (suite,)
+    rows = conn.execute(sql + " GROUP BY status", params).fetchall()
+    conn.close()
+    return {r["status"]: r["c"] for r in rows}
+
+
 # ─── USER HINTS ───────────────────────────────────────────────
 
+@_invalidates("user_hints")
 def save_user_hint(site_url: str, action_keyword: str, hint: str, nav_path: list = None):
     """User bergan yo'nalish ko'rsatmasini saqlaydi."""
     conn = get_connection()
@@ -260,6 +941,7 @@ def save_user_hint(site_url: str, action_keyword: str, hint: str, nav_path: list
     conn.close()
 
 
+@_cached_read("user_hints")
 def get_user_hint(site_url: str, action_keyword: str):
     """Saqlangan user hint'ini oladi."""
     conn = get_connection()
@@ -275,6 +957,7 @@ def get_user_hint(site_url: str, action_keyword: str):
     return None
 
 
+@_cached_read("user_hints")
 def search_user_hints(site_url: str, keywords: list):
     """
     Kalit so'zlar bo'yicha user hint'larini qidiradi.
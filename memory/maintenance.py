@@ -0,0 +1,191 @@
+"""
+qa_memory.db ni ixcham saqlash: eski runlarni arxivlash, eskirgan elementlarni o'chirish,
+incremental VACUUM va ANALYZE.
+Ishlatish:
+    python -m memory.maintenance                      # standart qoidalar
+    python -m memory.maintenance --keep-days 30 --keep-runs 100 --stale-after-runs 10
+    python -m memory.maintenance --dry-run            # faqat nima qilinishini ko'rsatadi
+
+Qoidalar:
+- test_runs: --keep-days dan eski YOKI eng yangi --keep-runs tadan tashqaridagilar
+  (step_results bilan birga) memory/archive/test_runs-YYYY-MM.jsonl.gz ga yoziladi va o'chiriladi
+- page_elements: sayt uchun oxirgi --stale-after-runs ta run davomida tasdiqlanmagan
+  (last_confirmed_at) elementlar o'chiriladi
+- memory/artifacts: hajm QA_ARTIFACTS_MAX_MB dan oshsa eng eski screenshotlar o'chiriladi
+"""
+import gzip
+import json
+import os
+import sys
+from collections import defaultdict
+
+from memory import artifacts, codec
+from memory.db import get_connection, init_db, clear_cache
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), "archive")
+
+DEFAULT_KEEP_DAYS = 90
+DEFAULT_KEEP_RUNS = 500
+DEFAULT_STALE_AFTER_RUNS = 20
+INCREMENTAL_VACUUM_PAGES = 2000
+
+
+def _runs_to_archive(conn, keep_days: int, keep_runs: int) -> list:
+    conditions, params = [], []
+    if keep_days:
+        conditions.append("created_at < datetime('now', ?)")
+        params.append(f"-{int(keep_days)} days")
+    if keep_runs:
+        conditions.append("""id NOT IN (
+            SELECT id FROM test_runs ORDER BY created_at DESC, id DESC LIMIT ?
+        )""")
+        params.append(int(keep_runs))
+    if not conditions:
+        return []
+    rows = conn.execute(
+        f"SELECT id FROM test_runs WHERE status != 'running' AND ({' OR '.join(conditions)}) ORDER BY id",
+        params
+    )
+    return [r["id"] for r in rows]
+
+
+def archive_runs(conn, run_ids: list, archive_dir: str = ARCHIVE_DIR) -> dict:
+    """Runlarni oylik gzip JSONL ga yozadi va bazadan o'chiradi. Returns: {fayl: soni}."""
+    written = defaultdict(int)
+    if not run_ids:
+        return written
+    os.makedirs(archive_dir, exist_ok=True)
+    handles = {}
+    try:
+        for run_id in run_ids:
+            run = dict(conn.execute("SELECT * FROM test_runs WHERE id=?", (run_id,)).fetchone())
+            run["steps"] = codec.decode(run["steps"], [])
+            run["token_summary"] = codec.decode(run["token_summary"], {})
+            run["step_results"] = []
+            for sr in conn.execute(
+                "SELECT * FROM step_results WHERE test_run_id=? ORDER BY step_id", (run_id,)
+            ):
+                sr = dict(sr)
+                sr["token_info"] = codec.decode(sr["token_info"], {})
+                run["step_results"].append(sr)
+
+            month = str(run["created_at"])[:7] or "unknown"
+            path = os.path.join(archive_dir, f"test_runs-{month}.jsonl.gz")
+            if path not in handles:
+                # "at" — mavjud arxivga yangi gzip member qo'shiladi (gzip.open o'qiy oladi)
+                handles[path] = gzip.open(path, "at", encoding="utf-8")
+            handles[path].write(json.dumps(run, ensure_ascii=False, default=str) + "\n")
+            written[path] += 1
+    finally:
+        for f in handles.values():
+            f.close()
+
+    # Arxiv diskka yozilgandan keyingina o'chiramiz
+    conn.executemany("DELETE FROM step_results WHERE test_run_id=?", [(i,) for i in run_ids])
+    conn.executemany("DELETE FROM test_runs WHERE id=?", [(i,) for i in run_ids])
+    conn.commit()
+    return written
+
+
+def _stale_elements_query(stale_after_runs: int):
+    """Har sayt uchun: N-chi eng yangi rundan oldin oxirgi marta tasdiqlangan elementlar."""
+    return """
+        FROM page_elements pe
+        WHERE COALESCE(pe.last_confirmed_at, pe.created_at) < (
+            SELECT created_at FROM test_runs tr
+            WHERE tr.site_url = pe.site_url
+            ORDER BY tr.created_at DESC, tr.id DESC
+            LIMIT 1 OFFSET ?
+        )
+    """, (int(stale_after_runs) - 1,)
+
+
+def delete_stale_elements(conn, stale_after_runs: int, dry_run: bool = False) -> int:
+    if not stale_after_runs:
+        return 0
+    where, params = _stale_elements_query(stale_after_runs)
+    count = conn.execute(f"SELECT COUNT(*) AS c {where}", params).fetchone()["c"]
+    if count and not dry_run:
+        conn.execute(f"DELETE FROM page_elements WHERE id IN (SELECT pe.id {where})", params)
+        conn.commit()
+    return count
+
+
+def compact(conn) -> str:
+    """
+    auto_vacuum=INCREMENTAL bo'lmasa bir marta yoqiladi (to'liq VACUUM bilan),
+    keyingi safarlar faqat bo'sh sahifalarni qisman qaytaradi. Keyin ANALYZE.
+    """
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        action = "VACUUM (auto_vacuum=INCREMENTAL yoqildi)"
+    else:
+        conn.execute(f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})")
+        action = f"incremental_vacuum({INCREMENTAL_VACUUM_PAGES})"
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    return action
+
+
+def run_maintenance(keep_days: int = DEFAULT_KEEP_DAYS, keep_runs: int = DEFAULT_KEEP_RUNS,
+                    stale_after_runs: int = DEFAULT_STALE_AFTER_RUNS,
+                    archive_dir: str = ARCHIVE_DIR, dry_run: bool = False) -> dict:
+    init_db()
+    from memory.db import DB_PATH
+    size_before = os.path.getsize(DB_PATH)
+
+    conn = get_connection()
+    try:
+        run_ids = _runs_to_archive(conn, keep_days, keep_runs)
+        archived = {} if dry_run else archive_runs(conn, run_ids, archive_dir)
+        stale = delete_stale_elements(conn, stale_after_runs, dry_run)
+        vacuum = "o'tkazib yuborildi (dry-run)" if dry_run else compact(conn)
+    finally:
+        conn.close()
+    clear_cache()
+    evicted = {"removed": 0} if dry_run else artifacts.evict()
+
+    return {
+        "runs_archived": len(run_ids),
+        "archive_files": dict(archived),
+        "stale_elements": stale,
+        "vacuum": vacuum,
+        "artifacts_evicted": evicted["removed"],
+        "size_before": size_before,
+        "size_after": os.path.getsize(DB_PATH),
+    }
+
+
+def main(argv: list = None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    def opt(name, default):
+        return int(argv[argv.index(name) + 1]) if name in argv else default
+
+    dry_run = "--dry-run" in argv
+    result = run_maintenance(
+        keep_days=opt("--keep-days", DEFAULT_KEEP_DAYS),
+        keep_runs=opt("--keep-runs", DEFAULT_KEEP_RUNS),
+        stale_after_runs=opt("--stale-after-runs", DEFAULT_STALE_AFTER_RUNS),
+        archive_dir=argv[argv.index("--archive-dir") + 1] if "--archive-dir" in argv else ARCHIVE_DIR,
+        dry_run=dry_run,
+    )
+
+    print("\n" + "═" * 50)
+    print(f"  🧹 DB MAINTENANCE{' (DRY-RUN)' if dry_run else ''}")
+    print("═" * 50)
+    print(f"  Arxivlangan runlar : {result['runs_archived']} ta")
+    for path, count in result["archive_files"].items():
+        print(f"      → {os.path.basename(path)}: {count} ta")
+    print(f"  Eskirgan elementlar: {result['stale_elements']} ta o'chirildi")
+    print(f"  Vacuum             : {result['vacuum']}")
+    print(f"  Artefaktlar        : {result['artifacts_evicted']} ta eski fayl o'chirildi")
+    print(f"  Hajm               : {result['size_before'] / 1024:,.0f} KB → "
+          f"{result['size_after'] / 1024:,.0f} KB")
+    print("═" * 50)
+
+
+if __name__ == "__main__":
+    main()
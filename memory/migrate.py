@@ -0,0 +1,86 @@
+"""
+Mavjud qa_memory.db dagi JSON ustunlarni boshqa kodlashga o'tkazadi (memory/codec.py).
+Ishlatish:
+    python -m memory.migrate                 # hammasini zjson ga (standart)
+    python -m memory.migrate --to json       # orqaga — oddiy JSON matnga
+    python -m memory.migrate --db boshqa.db  # boshqa baza fayli
+Oxirida VACUUM qilinib, fayl hajmi oldin/keyin ko'rsatiladi.
+"""
+import os
+import sqlite3
+import sys
+
+from memory import codec
+from memory.db import DB_PATH
+
+# (jadval, ustun) — kodlanadigan JSON ustunlar
+ENCODED_COLUMNS = [
+    ("test_runs", "steps"),
+    ("test_runs", "token_summary"),
+    ("step_results", "token_info"),
+    ("form_knowledge", "fields"),
+    ("navigation_paths", "steps"),
+]
+
+BATCH_SIZE = 500
+
+
+def migrate(db_path: str = DB_PATH, to: str = "zjson") -> dict:
+    if to not in codec.ENCODINGS:
+        raise ValueError(f"Noma'lum format: {to} (mavjud: {', '.join(codec.ENCODINGS)})")
+
+    size_before = os.path.getsize(db_path)
+    conn = sqlite3.connect(db_path)
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    converted = {}
+
+    for table, column in ENCODED_COLUMNS:
+        if table not in existing:
+            continue
+        count = 0
+        cur = conn.execute(f"SELECT id, {column} FROM {table}")
+        while True:
+            rows = cur.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            updates = []
+            for row_id, value in rows:
+                if value is None or codec.is_encoded_as(value, to):
+                    continue
+                updates.append((codec.encode(codec.decode(value), to), row_id))
+            if updates:
+                conn.executemany(f"UPDATE {table} SET {column}=? WHERE id=?", updates)
+                count += len(updates)
+        conn.commit()
+        converted[f"{table}.{column}"] = count
+
+    conn.execute("VACUUM")
+    conn.close()
+    return {
+        "converted": converted,
+        "size_before": size_before,
+        "size_after": os.path.getsize(db_path),
+    }
+
+
+def main(argv: list = None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    to, db_path = "zjson", DB_PATH
+    if "--to" in argv:
+        to = argv[argv.index("--to") + 1]
+    if "--db" in argv:
+        db_path = argv[argv.index("--db") + 1]
+
+    if not os.path.exists(db_path):
+        print(f"❌ DB topilmadi: {db_path}")
+        return
+
+    print(f"  [🔄 MIGRATE] {db_path} → {to}")
+    result = migrate(db_path, to)
+    for column, count in result["converted"].items():
+        print(f"    {column:<30}: {count} ta yozuv")
+    print(f"  Hajm: {result['size_before'] / 1024:,.0f} KB → {result['size_after'] / 1024:,.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
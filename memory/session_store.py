@@ -0,0 +1,95 @@
+"""
+Login sessiyasini (Playwright storage_state) sayt bo'yicha saqlash.
+
+Fayllar qa_memory.db yonida, memory/sessions/ papkasida shifrlangan holda turadi:
+    memory/sessions/<host>.session   — Fernet bilan shifrlangan storage_state JSON
+    memory/sessions/.key             — shifr kaliti (QA_SESSION_KEY env bo'lmasa avtomatik yaratiladi)
+
+cryptography o'rnatilmagan bo'lsa sessiya umuman saqlanmaydi (ochiq matnda saqlamaymiz).
+"""
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+SESSIONS_DIR = os.path.join(os.path.dirname(__file__), "sessions")
+KEY_PATH = os.path.join(SESSIONS_DIR, ".key")
+
+
+def _get_fernet():
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        print("  [⚠️  SESSIYA] 'cryptography' o'rnatilmagan — sessiya saqlanmaydi "
+              "(pip install cryptography)")
+        return None
+
+    key = os.getenv("QA_SESSION_KEY")
+    if not key:
+        os.makedirs(SESSIONS_DIR, exist_ok=True)
+        if not os.path.exists(KEY_PATH):
+            fd = os.open(KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(Fernet.generate_key())
+        with open(KEY_PATH, "rb") as f:
+            key = f.read().strip()
+    return Fernet(key)
+
+
+def _session_path(site_url: str) -> str:
+    host = urlparse(site_url).netloc or site_url
+    safe = "".join(ch if ch.isalnum() or ch in "-." else "_" for ch in host)
+    return os.path.join(SESSIONS_DIR, f"{safe}.session")
+
+
+def _all_cookies_expired(state: dict) -> bool:
+    """Muddati ko'rsatilgan cookie lar hammasi o'tib ketgan bo'lsa True."""
+    now = time.time()
+    expiring = [c for c in state.get("cookies", []) if c.get("expires", -1) > 0]
+    return bool(expiring) and all(c["expires"] < now for c in expiring)
+
+
+def save_session_state(site_url: str, state: dict):
+    """Muvaffaqiyatli logindan keyingi storage_state ni shifrlab saqlaydi."""
+    fernet = _get_fernet()
+    if not fernet or not state:
+        return
+    os.makedirs(SESSIONS_DIR, exist_ok=True)
+    token = fernet.encrypt(json.dumps(state).encode("utf-8"))
+    path = _session_path(site_url)
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(token)
+    os.replace(tmp, path)
+
+
+def load_session_state(site_url: str):
+    """
+    Saqlangan storage_state ni qaytaradi.
+    Fayl yo'q, shifr ochilmasa yoki cookie lar muddati o'tgan bo'lsa None.
+    """
+    path = _session_path(site_url)
+    if not os.path.exists(path):
+        return None
+    fernet = _get_fernet()
+    if not fernet:
+        return None
+    try:
+        with open(path, "rb") as f:
+            state = json.loads(fernet.decrypt(f.read()).decode("utf-8"))
+    except Exception as e:
+        print(f"  [⚠️  SESSIYA] Sessiya fayli o'qilmadi ({type(e).__name__}) — o'chirildi")
+        clear_session_state(site_url)
+        return None
+    if _all_cookies_expired(state):
+        print(f"  [⚠️  SESSIYA] Cookie muddati o'tgan — o'chirildi")
+        clear_session_state(site_url)
+        return None
+    return state
+
+
+def clear_session_state(site_url: str):
+    path = _session_path(site_url)
+    if os.path.exists(path):
+        os.remove(path)
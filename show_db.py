@@ -1,13 +1,21 @@
 """
 DB Viewer — bazadagi barcha ma'lumotlarni ko'rish uchun.
-Ishlatish: python show_db.py [table_name]
+Ishlatish: python show_db.py [table_name] [test_run_id] [--limit N] [--offset N]
+                             [--since YYYY-MM-DD] [--site URL] [--format text|json|csv]
 Jadvallar: credentials, page_elements, user_hints, navigation_paths,
-           form_knowledge, test_runs, step_results
+           form_knowledge, test_runs, step_results, network_rules
+
+Filtrlar SQL ga beriladi va natijalar cursor orqali qatorma-qator o'qiladi —
+katta bazada ham xotira sarfi o'zgarmaydi. --format json/csv to'g'ridan stdout ga yozadi.
 """
 import sys
 import json
+import csv
 import sqlite3
 import os
+import argparse
+
+from memory import artifacts, codec
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "memory", "qa_memory.db")
 
@@ -19,36 +27,95 @@ TABLES = [
     "form_knowledge",
     "test_runs",
     "step_results",
+    "network_rules",
 ]
 
+# Qisqa nomlar → jadval
+ALIASES = {
+    "credentials": "credentials", "creds": "credentials", "c": "credentials",
+    "elements": "page_elements", "page_elements": "page_elements", "el": "page_elements",
+    "hints": "user_hints", "user_hints": "user_hints", "h": "user_hints",
+    "nav": "navigation_paths", "navigation_paths": "navigation_paths", "n": "navigation_paths",
+    "forms": "form_knowledge", "form_knowledge": "form_knowledge", "f": "form_knowledge",
+    "tests": "test_runs", "test_runs": "test_runs", "t": "test_runs",
+    "steps": "step_results", "step_results": "step_results", "s": "step_results",
+    "rules": "network_rules", "network_rules": "network_rules",
+}
+
+# Eksportda ochiladigan kodlangan JSON ustunlar (memory/codec.py)
+ENCODED_COLUMNS = {
+    "test_runs": ("steps", "token_summary"),
+    "step_results": ("token_info",),
+    "form_knowledge": ("fields",),
+    "navigation_paths": ("steps",),
+}
+
+# Eksportda hech qachon chiqarilmaydigan ustunlar
+SECRET_COLUMNS = {"credentials": ("password",)}
+
 def sep(char="═", n=70):
     print(char * n)
 
-def show_credentials(conn):
+
+def select_rows(conn, table, columns="*", opts=None, order_by=None,
+                default_limit=None, extra_where=None, extra_params=()):
+    """
+    Filtrlarni (--site, --since, --limit, --offset) SQL ga qo'shib cursor qaytaradi.
+    fetchall() qilinmaydi — chaqiruvchi cursor ni iteratsiya qiladi.
+    """
+    where, params = [], []
+    if extra_where:
+        where.append(extra_where)
+        params.extend(extra_params)
+    if opts is not None and opts.site:
+        if table == "step_results":
+            where.append("test_run_id IN (SELECT id FROM test_runs WHERE site_url = ?)")
+        else:
+            where.append("site_url = ?")
+        params.append(opts.site)
+    if opts is not None and opts.since:
+        where.append("created_at >= ?")
+        params.append(opts.since)
+
+    sql = f"SELECT {columns} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+
+    limit = opts.limit if opts is not None and opts.limit is not None else default_limit
+    offset = opts.offset if opts is not None else 0
+    if limit is not None or offset:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([limit if limit is not None else -1, offset or 0])
+    return conn.execute(sql, params)
+
+def show_credentials(conn, opts=None):
     sep()
     print("  🔑 CREDENTIALS (login ma'lumotlari)")
     sep()
-    rows = conn.execute("SELECT id, site_url, email, created_at FROM credentials").fetchall()
-    if not rows:
-        print("  (bo'sh)")
-        return
-    for r in rows:
+    empty = True
+    for r in select_rows(conn, "credentials", "id, site_url, email, created_at", opts, "id"):
+        empty = False
         print(f"  [{r['id']}] {r['site_url']}")
         print(f"       email: {r['email']}")
         print(f"       vaqt : {r['created_at']}")
+    if empty:
+        print("  (bo'sh)")
 
-def show_page_elements(conn):
+def show_page_elements(conn, opts=None):
     sep()
     print("  📌 PAGE ELEMENTS (sahifa elementlari)")
     sep()
-    rows = conn.execute(
-        "SELECT id, site_url, page_url, element_name, element_type, css_selector, xpath, visible_text FROM page_elements ORDER BY site_url, page_url"
-    ).fetchall()
-    if not rows:
-        print("  (bo'sh)")
-        return
+    rows = select_rows(
+        conn, "page_elements",
+        "id, site_url, page_url, element_name, element_type, css_selector, xpath, visible_text",
+        opts, "site_url, page_url"
+    )
     cur_page = None
+    empty = True
     for r in rows:
+        empty = False
         if r['page_url'] != cur_page:
             cur_page = r['page_url']
             print(f"\n  📄 {cur_page}")
@@ -57,18 +124,20 @@ def show_page_elements(conn):
         print(f"         xpath: {r['xpath']}")
         if r['visible_text']:
             print(f"         text : {r['visible_text']}")
+    if empty:
+        print("  (bo'sh)")
 
-def show_user_hints(conn):
+def show_user_hints(conn, opts=None):
     sep()
     print("  💡 USER HINTS (foydalanuvchi ko'rsatmalari)")
     sep()
-    rows = conn.execute(
-        "SELECT id, site_url, action_keyword, hint, nav_path, created_at FROM user_hints ORDER BY site_url"
-    ).fetchall()
-    if not rows:
-        print("  (bo'sh)")
-        return
+    rows = select_rows(
+        conn, "user_hints", "id, site_url, action_keyword, hint, nav_path, created_at",
+        opts, "site_url"
+    )
+    empty = True
     for r in rows:
+        empty = False
         print(f"  [{r['id']}] kalit: '{r['action_keyword']}'")
         print(f"       sayt : {r['site_url']}")
         print(f"       hint : {r['hint']}")
@@ -76,23 +145,25 @@ def show_user_hints(conn):
             print(f"       yo'l : {r['nav_path']}")
         print(f"       vaqt : {r['created_at']}")
         print()
+    if empty:
+        print("  (bo'sh)")
 
-def show_navigation_paths(conn):
+def show_navigation_paths(conn, opts=None):
     sep()
     print("  🗺️  NAVIGATION PATHS (navigatsiya yo'llari)")
     sep()
-    rows = conn.execute(
-        "SELECT id, site_url, action_name, steps, final_url, created_at FROM navigation_paths ORDER BY site_url"
-    ).fetchall()
-    if not rows:
-        print("  (bo'sh)")
-        return
+    rows = select_rows(
+        conn, "navigation_paths", "id, site_url, action_name, steps, final_url, created_at",
+        opts, "site_url"
+    )
+    empty = True
     for r in rows:
+        empty = False
         print(f"  [{r['id']}] {r['action_name']}")
         print(f"       sayt      : {r['site_url']}")
         print(f"       final_url : {r['final_url']}")
         try:
-            steps = json.loads(r['steps'])
+            steps = codec.decode(r['steps'], [])
             print(f"       qadamlar  : {len(steps)} ta")
             for i, s in enumerate(steps, 1):
                 stype = s.get('type', '')
@@ -107,74 +178,99 @@ def show_navigation_paths(conn):
                 else:
                     print(f"         {i}. {s}")
         except Exception:
-            print(f"       steps: {r['steps'][:100]}")
+            print(f"       steps: {str(r['steps'])[:100]}")
         print(f"       vaqt : {r['created_at']}")
         print()
+    if empty:
+        print("  (bo'sh)")
 
-def show_form_knowledge(conn):
+def show_form_knowledge(conn, opts=None):
     sep()
     print("  📋 FORM KNOWLEDGE (formalar)")
     sep()
-    rows = conn.execute(
-        "SELECT id, site_url, form_name, form_url, fields, submit_selector FROM form_knowledge ORDER BY site_url"
-    ).fetchall()
-    if not rows:
-        print("  (bo'sh)")
-        return
+    rows = select_rows(
+        conn, "form_knowledge", "id, site_url, form_name, form_url, fields, submit_selector",
+        opts, "site_url"
+    )
+    empty = True
     for r in rows:
+        empty = False
         print(f"  [{r['id']}] {r['form_name']} @ {r['form_url']}")
         print(f"       sayt  : {r['site_url']}")
         print(f"       submit: {r['submit_selector']}")
         try:
-            fields = json.loads(r['fields'])
+            fields = codec.decode(r['fields'], [])
             print(f"       maydonlar ({len(fields)} ta):")
             for f in fields:
                 print(f"         - {f.get('label','?')} ({f.get('type','?')}) css='{f.get('css_selector','')}'")
         except Exception:
-            print(f"       fields: {r['fields'][:100]}")
+            print(f"       fields: {str(r['fields'])[:100]}")
         print()
+    if empty:
+        print("  (bo'sh)")
 
-def show_test_runs(conn):
+def show_test_runs(conn, opts=None):
     sep()
     print("  🧪 TEST RUNS (test natijalari)")
     sep()
-    rows = conn.execute(
-        "SELECT id, test_name, site_url, status, created_at FROM test_runs ORDER BY created_at DESC LIMIT 20"
-    ).fetchall()
-    if not rows:
-        print("  (bo'sh)")
-        return
+    rows = select_rows(
+        conn, "test_runs", "id, test_name, site_url, status, created_at",
+        opts, "created_at DESC", default_limit=20
+    )
+    empty = True
     for r in rows:
+        empty = False
         icon = "✅" if r['status'] == 'passed' else ("⏳" if r['status'] == 'running' else "❌")
         print(f"  {icon} [{r['id']}] {r['test_name']}")
         print(f"       sayt  : {r['site_url']}")
         print(f"       holat : {r['status']}")
         print(f"       vaqt  : {r['created_at']}")
         print()
+    if empty:
+        print("  (bo'sh)")
 
-def show_step_results(conn, test_run_id=None):
+def show_step_results(conn, test_run_id=None, opts=None):
     sep()
     print(f"  📊 STEP RESULTS{f' (test #{test_run_id})' if test_run_id else ' (oxirgi 30 ta)'}")
     sep()
     if test_run_id:
-        rows = conn.execute(
-            "SELECT * FROM step_results WHERE test_run_id=? ORDER BY step_id",
-            (test_run_id,)
-        ).fetchall()
+        rows = select_rows(
+            conn, "step_results", "*", opts, "step_id",
+            extra_where="test_run_id = ?", extra_params=(test_run_id,)
+        )
     else:
-        rows = conn.execute(
-            "SELECT * FROM step_results ORDER BY created_at DESC LIMIT 30"
-        ).fetchall()
-    if not rows:
-        print("  (bo'sh)")
-        return
+        rows = select_rows(conn, "step_results", "*", opts, "created_at DESC", default_limit=30)
+    empty = True
     for r in rows:
+        empty = False
         icon = "✅" if r['status'] == 'passed' else "❌"
         print(f"  {icon} test#{r['test_run_id']} qadam#{r['step_id']} [{r['action_type']}] {r['status'].upper()}")
         print(f"       tavsif: {r['description']}")
         if r['error_message']:
             print(f"       xato  : {r['error_message']}")
+        if "artifact_hash" in r.keys() and r['artifact_hash']:
+            print(f"       ekran : {artifacts.path_for(r['artifact_hash'])}")
         print()
+    if empty:
+        print("  (bo'sh)")
+
+def show_network_rules(conn, opts=None):
+    sep()
+    print("  🚫 NETWORK RULES (bloklanadigan so'rovlar)")
+    sep()
+    rows = select_rows(
+        conn, "network_rules", "id, site_url, pattern, created_at", opts, "site_url, id"
+    )
+    cur_site = None
+    empty = True
+    for r in rows:
+        empty = False
+        if r['site_url'] != cur_site:
+            cur_site = r['site_url']
+            print(f"\n  🌐 {cur_site}")
+        print(f"    [{r['id']}] {r['pattern']}  ({r['created_at']})")
+    if empty:
+        print("  (bo'sh)")
 
 def show_summary(conn):
     sep()
@@ -188,47 +284,117 @@ def show_summary(conn):
             print(f"  {t:<20}: xato — {e}")
     sep()
 
-def main():
+
+# ─── EXPORT (JSON / CSV) ──────────────────────────────────────
+
+def _export_row(table, row, fmt):
+    data = {k: row[k] for k in row.keys() if k not in SECRET_COLUMNS.get(table, ())}
+    for col in ENCODED_COLUMNS.get(table, ()):
+        if col in data:
+            try:
+                data[col] = codec.decode(data[col])
+            except Exception:
+                data[col] = None
+            if fmt == "csv":
+                data[col] = json.dumps(data[col], ensure_ascii=False)
+    for k, v in data.items():
+        if isinstance(v, bytes):
+            data[k] = v.hex()
+    return data
+
+
+def export_table(conn, table, opts, test_run_id=None, out=None):
+    """Jadvalni JSON massiv yoki CSV sifatida qatorma-qator stdout ga yozadi."""
+    out = out or sys.stdout
+    extra_where, extra_params = None, ()
+    if table == "step_results" and test_run_id:
+        extra_where, extra_params = "test_run_id = ?", (test_run_id,)
+    rows = select_rows(conn, table, "*", opts, "id",
+                       extra_where=extra_where, extra_params=extra_params)
+
+    if opts.format == "csv":
+        writer = None
+        for r in rows:
+            data = _export_row(table, r, "csv")
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(data.keys()))
+                writer.writeheader()
+            writer.writerow(data)
+        return
+
+    out.write("[")
+    first = True
+    for r in rows:
+        out.write(("\n  " if first else ",\n  ") +
+                  json.dumps(_export_row(table, r, "json"), ensure_ascii=False, default=str))
+        first = False
+    out.write("\n]\n" if not first else "]\n")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="QA Agent xotira bazasini ko'rish")
+    parser.add_argument("table", nargs="?", default="all")
+    parser.add_argument("run_id", nargs="?", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--since", default=None, help="YYYY-MM-DD[ HH:MM:SS]")
+    parser.add_argument("--site", default=None, help="site_url, masalan https://example.com")
+    parser.add_argument("--format", choices=("text", "json", "csv"), default="text")
+    opts = parser.parse_args(argv)
+    opts.table = opts.table.lower()
+    return opts
+
+
+def main(argv: list = None):
     if not os.path.exists(DB_PATH):
         print(f"❌ DB topilmadi: {DB_PATH}")
         print("   Avval main.py ni ishga tushiring.")
         return
 
+    opts = parse_args(sys.argv[1:] if argv is None else argv)
+    arg = opts.table
+
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
 
-    arg = sys.argv[1].lower() if len(sys.argv) > 1 else "all"
+    if opts.format != "text":
+        table = ALIASES.get(arg)
+        if not table:
+            print(f"Eksport uchun jadval ko'rsating: {', '.join(TABLES)}", file=sys.stderr)
+        else:
+            try:
+                export_table(conn, table, opts, opts.run_id)
+            except BrokenPipeError:
+                pass
+        conn.close()
+        return
 
     if arg == "all" or arg == "summary":
         show_summary(conn)
 
     if arg in ("all", "credentials", "creds", "c"):
-        show_credentials(conn)
+        show_credentials(conn, opts)
 
     if arg in ("all", "elements", "page_elements", "el"):
-        show_page_elements(conn)
+        show_page_elements(conn, opts)
 
     if arg in ("all", "hints", "user_hints", "h"):
-        show_user_hints(conn)
+        show_user_hints(conn, opts)
 
     if arg in ("all", "nav", "navigation_paths", "n"):
-        show_navigation_paths(conn)
+        show_navigation_paths(conn, opts)
 
     if arg in ("all", "forms", "form_knowledge", "f"):
-        show_form_knowledge(conn)
+        show_form_knowledge(conn, opts)
 
     if arg in ("all", "tests", "test_runs", "t"):
-        show_test_runs(conn)
+        show_test_runs(conn, opts)
 
     if arg in ("all", "steps", "step_results", "s"):
-        # test_run_id berilgan bo'lsa
-        run_id = None
-        if len(sys.argv) > 2:
-            try:
-                run_id = int(sys.argv[2])
-            except ValueError:
-                pass
-        show_step_results(conn, run_id)
+        show_step_results(conn, opts.run_id, opts)
+
+    if arg in ("all", "rules", "network_rules"):
+        show_network_rules(conn, opts)
 
     if arg not in ("all", "summary", "credentials", "creds", "c",
                    "elements", "page_elements", "el",
@@ -236,9 +402,10 @@ def main():
                    "nav", "navigation_paths", "n",
                    "forms", "form_knowledge", "f",
                    "tests", "test_runs", "t",
-                   "steps", "step_results", "s"):
+                   "steps", "step_results", "s",
+                   "rules", "network_rules"):
         print(f"Noma'lum jadval: '{arg}'")
-        print("Mavjud: all, creds, elements, hints, nav, forms, tests, steps")
+        print("Mavjud: all, creds, elements, hints, nav, forms, tests, steps, rules")
 
     conn.close()
 
@@ -252,6 +419,10 @@ def main():
     print("  python show_db.py tests        # test natijalari")
     print("  python show_db.py steps        # qadam natijalari")
     print("  python show_db.py steps 3      # test #3 ning qadamlari")
+    print("  python show_db.py rules        # bloklanadigan tarmoq so'rovlari")
+    print("  python show_db.py elements --site https://example.com --limit 50 --offset 50")
+    print("  python show_db.py tests --since 2026-01-01")
+    print("  python show_db.py steps --format csv > steps.csv     # eksport (json|csv)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,97 @@
+"""
+Import vaqti benchmarki — ishga tushish tezligini nazorat qilish uchun.
+Ishlatish:
+    python -m utils.bench_import                    # main.py ni tekshiradi
+    python -m utils.bench_import --module show_db --budget-ms 150
+    python main.py bench-import --top 20
+
+Har modul alohida (toza) jarayonda `python -X importtime` bilan import qilinadi.
+Tekshiruvlar:
+- jami import vaqti --budget-ms dan oshmasligi (QA_IMPORT_BUDGET_MS env)
+- og'ir kutubxonalar (google.generativeai, playwright) import vaqtida yuklanmasligi —
+  ular faqat birinchi model chaqiruvi / brauzer start() da yuklanadi
+Shartlardan biri buzilsa exit code 1 — CI da ishlatish mumkin.
+"""
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["main"]
+DEFAULT_BUDGET_MS = int(os.getenv("QA_IMPORT_BUDGET_MS", "250"))
+# Import paytida yuklanmasligi kerak bo'lgan paketlar
+LAZY_PACKAGES = ("google.generativeai", "playwright")
+
+
+def measure(module: str) -> dict:
+    """
+    Modulni yangi interpretatorda import qiladi.
+    Returns: {"total_ms", "modules": [(ms, nom), ...], "loaded_lazy": [...], "error"}
+    """
+    code = (
+        f"import {module}, sys; "
+        f"print('\\n'.join(m for m in sys.modules if m.startswith({LAZY_PACKAGES!r})))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True,
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:   self |  cumulative | name"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative) / 1000, name.rstrip()))
+        except ValueError:
+            continue
+
+    # Yuqori darajadagi (indent qilinmagan) importlar yig'indisi = jami vaqt
+    total_ms = sum(ms for ms, name in rows if not name.startswith("  "))
+    loaded = proc.stdout.split()
+    loaded_lazy = [p for p in LAZY_PACKAGES
+                   if any(m == p or m.startswith(p + ".") for m in loaded)]
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "xato"
+    return {"total_ms": total_ms, "modules": rows, "loaded_lazy": loaded_lazy, "error": error}
+
+
+def main(argv: list = None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    modules = [argv[i + 1] for i, a in enumerate(argv) if a == "--module"] or DEFAULT_MODULES
+    budget_ms = int(argv[argv.index("--budget-ms") + 1]) if "--budget-ms" in argv else DEFAULT_BUDGET_MS
+    top = int(argv[argv.index("--top") + 1]) if "--top" in argv else 10
+
+    failed = False
+    for module in modules:
+        result = measure(module)
+        print(f"\n  ┌─ [IMPORT] {module} ─────────────────────────────────")
+        if result["error"]:
+            print(f"  │ ❌ Import xatosi: {result['error']}")
+            print(f"  └───────────────────────────────────────────────────")
+            failed = True
+            continue
+
+        ok_time = result["total_ms"] <= budget_ms
+        print(f"  │ Jami        : {result['total_ms']:.1f} ms "
+              f"(limit {budget_ms} ms) {'✅' if ok_time else '❌'}")
+        print(f"  │ Eng sekin {top} ta (cumulative):")
+        for ms, name in sorted(result["modules"], reverse=True)[:top]:
+            print(f"  │   {ms:8.1f} ms  {name.strip()}")
+        if result["loaded_lazy"]:
+            print(f"  │ ❌ Import vaqtida yuklangan og'ir paketlar: {', '.join(result['loaded_lazy'])}")
+        else:
+            print(f"  │ Og'ir paketlar ({', '.join(LAZY_PACKAGES)}) yuklanmagan ✅")
+        print(f"  └───────────────────────────────────────────────────")
+        failed = failed or not ok_time or bool(result["loaded_lazy"])
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
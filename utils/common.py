@@ -0,0 +1,37 @@
+"""
+main.py va crawler.py uchun umumiy yordamchilar.
+
+crawler.py main.py ni import qilmasligi kerak: "python main.py crawl" da main.py
+__main__ sifatida yuklangan — "from main import ..." uni ikkinchi marta (alohida
+modul sifatida, o'z recorder/NON_INTERACTIVE global lari bilan) bajarib yuboradi.
+"""
+from urllib.parse import urlparse
+
+
+def get_base_url(url: str) -> str:
+    p = urlparse(url)
+    return f"{p.scheme}://{p.netloc}"
+
+
+def get_form_key(page_url: str) -> str:
+    """form_knowledge kaliti — URL ning oxirgi qismi (query siz)."""
+    return page_url.split("?")[0].rstrip("/").split("/")[-1] or "main_form"
+
+
+def print_token_summary(summary: dict):
+    print(f"\n{'═' * 60}")
+    print("  📊 TOKEN HISOBOTI")
+    print(f"{'═' * 60}")
+    print(f"  Jami API chaqiruvlar : {summary['total_api_calls']}")
+    print(f"  Kirish tokenlari     : {summary['total_input']:,}")
+    print(f"  Chiqish tokenlari    : {summary['total_output']:,}")
+    print(f"  JAMI TOKENLAR        : {summary['total_tokens']:,}")
+    if summary.get("total_cached"):
+        # Kirish tokenlari (API ning prompt_token_count i) = keshdan + keshsiz
+        print(f"  Keshdan (kirish)     : {summary['total_cached']:,} "
+              f"({summary['cached_ratio']:.0%}), keshsiz: {summary['total_uncached']:,}")
+    parse = summary.get("json_parse")
+    if parse:
+        print(f"  JSON javoblar        : ok={parse['ok']} tuzatilgan={parse['repaired']} "
+              f"xato={parse['failed']}")
+    print(f"{'═' * 60}")
@@ -0,0 +1,278 @@
+"""
+Uzoq ishlaydigan agent (worker) uchun Prometheus/OpenMetrics ko'rsatkichlari.
+
+    QA_METRICS_PORT=9464 python main.py worker run --processes 2
+    curl localhost:9464/metrics      # 0-jarayon; 1-jarayon 9465 da va h.k.
+
+- Counter/Gauge/Histogram — yengil, faqat standart kutubxona; yangilanishlar Lock ostida
+- Port berilmasa server ochilmaydi, ko'rsatkichlar esa baribir xotirada yig'iladi (arzon)
+- /metrics javobiga ai/usage.py ning token hisoblari va DB/artefakt/model keshi
+  nisbatlari (scrape paytida hisoblanadi) ham qo'shiladi
+
+Manbalar: qadam natijalari (main.persist_step_result), token_info (_call_gemini),
+memory/db.py yozish funksiyalari, BrowserAgent kontekst/tablari va tab pullari.
+"""
+import os
+import threading
+
+METRICS_PORT = int(os.getenv("QA_METRICS_PORT", "0") or 0)
+METRICS_HOST = os.getenv("QA_METRICS_HOST", "127.0.0.1")
+
+# Soniyalarda: qadamlar sekundlab-minutlab, model chaqiruvlari ~0.5–30s, DB yozish ms lar
+STEP_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+MODEL_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+_registry = {}
+_registry_lock = threading.Lock()
+_server = None
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels_text(self.labels, key)} {_number(value)}" for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = STEP_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, {**v, "counts": list(v["counts"])}) for k, v in self._values.items())
+        lines = self.header()
+        for key, entry in items:
+            for bound, count in zip(self.buckets + (float("inf"),),
+                                    entry["counts"] + [entry["count"]]):
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.labels, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labels, key)} {round(entry['sum'], 6)}")
+            lines.append(f"{self.name}_count{_labels_text(self.labels, key)} {entry['count']}")
+        return lines
+
+
+def _register(metric: _Metric) -> _Metric:
+    with _registry_lock:
+        return _registry.setdefault(metric.name, metric)
+
+
+def counter(name: str, help_text: str, labels: tuple = ()) -> Counter:
+    return _register(Counter(name, help_text, labels))
+
+
+def gauge(name: str, help_text: str, labels: tuple = ()) -> Gauge:
+    return _register(Gauge(name, help_text, labels))
+
+
+def histogram(name: str, help_text: str, labels: tuple = (), buckets: tuple = STEP_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help_text, labels, buckets))
+
+
+# ─── AGENT KO'RSATKICHLARI ────────────────────────────────────
+
+step_seconds = histogram("qa_step_duration_seconds", "Qadam bajarilish vaqti",
+                         ("action_type",), STEP_BUCKETS)
+steps_total = counter("qa_steps_total", "Qadamlar natijasi", ("action_type", "status"))
+model_seconds = histogram("qa_model_call_duration_seconds", "Gemini chaqiruvi kechikishi",
+                          ("step_name", "route"), MODEL_BUCKETS)
+model_tokens = histogram("qa_model_call_tokens", "Bitta Gemini chaqiruvidagi tokenlar (in+out)",
+                         ("step_name", "route"), TOKEN_BUCKETS)
+db_write_seconds = histogram("qa_db_write_duration_seconds", "SQLite yozish funksiyalari vaqti",
+                             ("operation",), DB_BUCKETS)
+browser_open = gauge("qa_browser_open", "Ochiq brauzer kontekstlari va tablari", ("kind",))
+pool_slots = gauge("qa_browser_pool_slots", "Tab pulining hajmi", ("pool",))
+pool_busy = gauge("qa_browser_pool_busy", "Tab pulidagi band slotlar", ("pool",))
+
+
+def observe_step(step: dict, result: dict):
+    """Qadam natijasi (step_results elementi) — duration_ms bo'lmasa faqat hisoblanadi."""
+    action_type = step.get("action_type", "")
+    steps_total.inc(action_type=action_type, status=result.get("status", ""))
+    if result.get("duration_ms") is not None:
+        step_seconds.observe(result["duration_ms"] / 1000, action_type=action_type)
+
+
+def observe_model_call(token_info: dict):
+    labels = {"step_name": token_info.get("step", ""), "route": token_info.get("route", "")}
+    model_seconds.observe(token_info.get("latency_ms", 0) / 1000, **labels)
+    model_tokens.observe(token_info.get("total_tokens", 0), **labels)
+
+
+def observe_db_write(operation: str, seconds: float):
+    db_write_seconds.observe(seconds, operation=operation)
+
+
+# ─── SCRAPE PAYTIDA HISOBLANADIGANLAR ─────────────────────────
+
+def _ratio(part: float, whole: float) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+def _derived_lines() -> list:
+    """Kesh nisbatlari va pul bandligi — boshqa modullarning mavjud hisoblaridan."""
+    from ai import usage
+    from memory import artifacts
+    from memory.db import get_cache_stats
+
+    db_cache = get_cache_stats()
+    store = artifacts.get_stats(scan=False)
+    tokens = usage.process_usage.summary()
+    ratio = Gauge("qa_cache_hit_ratio", "Kesh hit nisbati (0..1)", ("cache",))
+    ratio.set(db_cache["hit_ratio"], cache="db_read")
+    ratio.set(_ratio(store["dedup_hits"], store["dedup_hits"] + store["writes"]), cache="artifact_dedup")
+    ratio.set(_ratio(tokens["total_cached"], tokens["total_input"]), cache="model_context")
+
+    utilization = Gauge("qa_browser_pool_utilization", "Band slotlar / pul hajmi", ("pool",))
+    with pool_slots._lock:
+        slots = dict(pool_slots._values)
+    with pool_busy._lock:
+        busy = dict(pool_busy._values)
+    for key, size in slots.items():
+        utilization.set(_ratio(busy.get(key, 0), size), pool=key[0])
+    return ratio.render() + utilization.render() + usage.to_prometheus().rstrip("\n").split("\n")
+
+
+def render() -> str:
+    """Barcha ko'rsatkichlar Prometheus text (0.0.4) formatida."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    try:
+        lines.extend(_derived_lines())
+    except Exception as e:
+        lines.append(f"# qa_derived_metrics xato: {_escape(e)}")
+    return "\n".join(lines) + "\n"
+
+
+# ─── HTTP ─────────────────────────────────────────────────────
+
+def _handler_class():
+    # http.server faqat server ochilganda yuklanadi — db/show_db kabi tez buyruqlar uni import qilmaydi
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass   # har scrape da konsolga yozilmasin
+
+    return Handler
+
+
+def start_server(port: int = None, host: str = None):
+    """
+    /metrics serverini daemon threadda ochadi (jarayonda bir marta).
+    port: standart QA_METRICS_PORT; 0 — o'chirilgan. Returns: server yoki None.
+    """
+    global _server
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+    if _server is not None:
+        return _server
+    from http.server import ThreadingHTTPServer
+    try:
+        _server = ThreadingHTTPServer((host or METRICS_HOST, port), _handler_class())
+    except OSError as e:
+        print(f"  [⚠️  METRICS] {port}-port ochilmadi: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="qa-metrics", daemon=True).start()
+    print(f"  [📈 METRICS] http://{host or METRICS_HOST}:{port}/metrics")
+    return _server
+
+
+def stop_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
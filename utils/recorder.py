@@ -0,0 +1,95 @@
+"""
+Record / replay — testni oflayn va deterministik qayta ishga tushirish uchun.
+
+Yozish (record) rejimida bitta papkaga saqlanadi:
+    memory/recordings/<nom>/network.har     — brauzerning barcha tarmoq trafigi (Playwright HAR)
+    memory/recordings/<nom>/responses.jsonl — Gemini javoblari va user javoblari, kelish tartibida
+    memory/recordings/<nom>/meta.json       — prompt va yozilgan vaqt
+    memory/recordings/<nom>/memory.db       — yozish boshidagi qa_memory.db snapshoti
+
+Qayta ijro (replay) rejimida brauzer HAR dan (route_from_har), Gemini va ask_user esa
+responses.jsonl dan javob oladi — tarmoq ham, API kaliti ham, odam ham kerak emas.
+Javoblar har bir tur (kind) uchun alohida navbatda, yozilgan tartibda beriladi.
+Replay snapshot ning vaqtinchalik nusxasida ishlaydi — jonli qa_memory.db o'qilmaydi ham,
+o'zgarmaydi ham. Saqlangan login sessiyasi record da ham ishlatilmaydi: login yo'li
+(Gemini va ask_user javoblari) har doim yozuvga tushadi.
+"""
+import json
+import os
+import time
+from collections import defaultdict, deque
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "memory", "recordings")
+
+
+class ReplayMissError(Exception):
+    """Replay paytida yozuvda mos javob qolmagan."""
+
+
+class RunRecorder:
+    def __init__(self, name: str, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Noma'lum rejim: {mode}")
+        self.name = name
+        self.mode = mode
+        self.dir = os.path.join(RECORDINGS_DIR, name)
+        self.har_path = os.path.join(self.dir, "network.har")
+        self.log_path = os.path.join(self.dir, "responses.jsonl")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.db_path = os.path.join(self.dir, "memory.db")
+        self._queues = defaultdict(deque)
+
+        if mode == "record":
+            os.makedirs(self.dir, exist_ok=True)
+            # Har yozuv toza boshlanadi
+            open(self.log_path, "w", encoding="utf-8").close()
+        else:
+            if not os.path.exists(self.log_path):
+                raise FileNotFoundError(f"Yozuv topilmadi: {self.dir}")
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._queues[entry["kind"]].append(entry["payload"])
+
+    @property
+    def is_replay(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def is_record(self) -> bool:
+        return self.mode == "record"
+
+    def save_meta(self, prompt: str):
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"prompt": prompt, "recorded_at": time.time()}, f, ensure_ascii=False)
+
+    def load_meta(self) -> dict:
+        if not os.path.exists(self.meta_path):
+            return {}
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def record(self, kind: str, payload):
+        if not self.is_record:
+            return
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": kind, "payload": payload}, ensure_ascii=False) + "\n")
+
+    def next(self, kind: str):
+        queue = self._queues.get(kind)
+        if not queue:
+            raise ReplayMissError(f"'{kind}' uchun yozilgan javob qolmadi ({self.name})")
+        return queue.popleft()
+
+
+_active = None
+
+
+def set_recorder(recorder):
+    global _active
+    _active = recorder
+
+
+def get_recorder():
+    return _active
@@ -0,0 +1,202 @@
+"""
+Worker fleet — katta test to'plamlarini bir nechta jarayonda (va mashinada) bajarish.
+Navbat qa_memory.db dagi jobs jadvalida (memory/db.py: claim_job / renew_lease / complete_job).
+
+Ishlatish:
+    python main.py worker enqueue "<test buyrug'i>" [--suite nightly] [--priority 5]
+    python main.py worker enqueue --file prompts.txt [--suite nightly]   # har qatorda bitta buyruq
+    python main.py worker run [--processes 4] [--lease 600] [--drain]
+    python main.py worker status [--suite nightly]
+
+- Har jarayon o'z Chromium ini ishga tushiradi va uni --recycle ta ishdan keyin qayta ochadi;
+  har test alohida BrowserContext da (cookie/sessiya aralashmaydi)
+- Ish lease bilan olinadi; worker tirikligida lease har lease/3 soniyada uzaytiriladi.
+  Worker o'lsa lease muddati o'tadi va ishni boshqa worker oladi (max_attempts gacha)
+- Bir nechta mashina: qa_memory.db umumiy tarmoq diskida (yoki QA_DB_BUSY_TIMEOUT ni
+  oshirib) turadi; qulflar SQLite fayl qulfi orqali. Mashinalar soati sinxron bo'lsin (NTP)
+- Worker non-interactive: user dan so'raladigan narsa (login va h.k.) DB da bo'lishi kerak
+- QA_METRICS_PORT berilsa har jarayon /metrics ni QA_METRICS_PORT + index portida beradi
+  (utils/metrics.py: qadam/model/DB kechikishlari, tokenlar, kesh nisbatlari, tab pullari)
+- QA_USAGE_PROM_FILE berilsa har jarayon o'z fayliga yozadi (usage.prom → usage.worker0.prom)
+"""
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+
+DEFAULT_PROCESSES = int(os.getenv("QA_WORKER_PROCESSES", str(max(1, (os.cpu_count() or 2) // 2))))
+DEFAULT_LEASE_SECONDS = int(os.getenv("QA_WORKER_LEASE_SECONDS", "600"))
+POLL_SECONDS = float(os.getenv("QA_WORKER_POLL_SECONDS", "5"))
+# Shuncha ishdan keyin Chromium qayta ishga tushiriladi (xotira sizib chiqmasligi uchun)
+RECYCLE_AFTER_JOBS = int(os.getenv("QA_WORKER_RECYCLE_JOBS", "20"))
+
+
+async def _keep_lease(job_id: int, worker_id: str, lease_seconds: int):
+    from memory.db import renew_lease
+    while True:
+        await asyncio.sleep(max(lease_seconds / 3, 1))
+        if not await asyncio.to_thread(renew_lease, job_id, worker_id, lease_seconds):
+            print(f"  [⚠️  WORKER {worker_id}] job #{job_id} lease yo'qotildi")
+            return
+
+
+async def _worker_loop(worker_id: str, lease_seconds: int, drain: bool, recycle: int):
+    from memory.db import init_db, claim_job, complete_job
+    from browser.playwright_agent import launch_browser
+    from main import run_agent
+
+    init_db()
+    playwright = browser = None
+    jobs_on_browser = 0
+    done = 0
+    try:
+        while True:
+            try:
+                job = await asyncio.to_thread(claim_job, worker_id, lease_seconds)
+            except sqlite3.OperationalError as e:
+                # Boshqa worker/mashina yozish qulfini ushlab turibdi — jarayon o'lmaydi
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                print(f"  [⏳ WORKER {worker_id}] DB band ({e}) — {POLL_SECONDS:.0f} s dan keyin qayta")
+                await asyncio.sleep(POLL_SECONDS)
+                continue
+            if not job:
+                if drain:
+                    break
+                await asyncio.sleep(POLL_SECONDS)
+                continue
+
+            if browser is None or jobs_on_browser >= recycle:
+                if browser is not None:
+                    await browser.close()
+                    await playwright.stop()
+                playwright, browser = await launch_browser(headless=True)
+                jobs_on_browser = 0
+
+            print(f"\n  [🛠️  WORKER {worker_id}] job #{job['id']} (urinish {job['attempts']}/"
+                  f"{job['max_attempts']}): {job['prompt'][:80]}")
+            lease_task = asyncio.create_task(_keep_lease(job["id"], worker_id, lease_seconds))
+            started = time.monotonic()
+            try:
+                outcome = await run_agent(job["prompt"], headless=True, shared_browser=browser)
+                await asyncio.to_thread(
+                    complete_job, job["id"], worker_id, outcome["status"], outcome["test_run_id"]
+                )
+            except Exception as e:
+                # Infratuzilma xatosi (brauzer yiqildi va h.k.) — urinish qolgan bo'lsa navbatga
+                await asyncio.to_thread(
+                    complete_job, job["id"], worker_id, "failed", None, str(e)[:500], True
+                )
+                if not browser.is_connected():
+                    jobs_on_browser = recycle   # keyingi ishda brauzer qayta ochiladi
+            finally:
+                lease_task.cancel()
+            jobs_on_browser += 1
+            done += 1
+            print(f"  [🛠️  WORKER {worker_id}] job #{job['id']} tugadi "
+                  f"({time.monotonic() - started:.0f} s)")
+    finally:
+        if browser is not None:
+            await browser.close()
+            await playwright.stop()
+    return done
+
+
+def _process_main(index: int, lease_seconds: int, drain: bool, recycle: int):
+    from ai import usage
+    from memory.db import default_worker_id
+    from utils import metrics
+    worker_id = f"{default_worker_id()}#{index}"
+    # QA_USAGE_PROM_FILE har jarayonda alohida fayl: usage.worker<index>.prom
+    usage.set_worker_index(index)
+    # Har jarayon o'z portida: QA_METRICS_PORT + index
+    if metrics.METRICS_PORT:
+        metrics.start_server(metrics.METRICS_PORT + index)
+    done = asyncio.run(_worker_loop(worker_id, lease_seconds, drain, recycle))
+    print(f"  [🛠️  WORKER {worker_id}] to'xtadi — {done} ta ish bajarildi")
+
+
+def run_workers(processes: int, lease_seconds: int, drain: bool, recycle: int):
+    # Worker lar hech qachon input() kutmasligi kerak — env bolalarga meros o'tadi
+    os.environ["QA_NON_INTERACTIVE"] = "1"
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_process_main, args=(i, lease_seconds, drain, recycle), daemon=False)
+        for i in range(processes)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        print("\n  [🛠️  WORKER] to'xtatilmoqda — olingan ishlar lease tugagach qayta navbatga tushadi")
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+def print_status(suite: str = None):
+    from memory.db import init_db, get_job_stats
+    init_db()
+    stats = get_job_stats(suite)
+    print(f"\n  ┌─ [NAVBAT{f': {suite}' if suite else ''}] ──────────────────────────────")
+    for status in ("queued", "running", "passed", "failed"):
+        print(f"  │ {status:<8}: {stats.get(status, 0)}")
+    print(f"  └───────────────────────────────────────────────────")
+
+
+def main(argv: list = None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("enqueue", "run", "status"):
+        print(__doc__)
+        return
+    command, rest = argv[0], argv[1:]
+
+    def opt(name, default=None):
+        if name in rest:
+            i = rest.index(name)
+            value = rest[i + 1]
+            del rest[i:i + 2]
+            return value
+        return default
+
+    suite = opt("--suite")
+
+    if command == "status":
+        print_status(suite)
+        return
+
+    if command == "enqueue":
+        from memory.db import init_db, enqueue_job
+        init_db()
+        priority = int(opt("--priority", 0))
+        max_attempts = int(opt("--max-attempts", 2))
+        path = opt("--file")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                prompts = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        else:
+            prompts = [" ".join(rest)] if rest else []
+        for prompt in prompts:
+            job_id = enqueue_job(prompt, suite, priority, max_attempts)
+            print(f"  [➕ NAVBAT] job #{job_id}: {prompt[:80]}")
+        if not prompts:
+            print("  Buyruq kiritilmadi.")
+        return
+
+    drain = "--drain" in rest
+    run_workers(
+        processes=int(opt("--processes", DEFAULT_PROCESSES)),
+        lease_seconds=int(opt("--lease", DEFAULT_LEASE_SECONDS)),
+        drain=drain,
+        recycle=int(opt("--recycle", RECYCLE_AFTER_JOBS)),
+    )
+    print_status(suite)
+
+
+if __name__ == "__main__":
+    main()